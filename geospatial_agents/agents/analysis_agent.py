@@ -7,20 +7,36 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 import json
-import re
 
 from langchain_core.language_models import BaseChatModel
 
+from geospatial_agents.utils.code_cache import CodeCache, GeneratedCodeMixin, code_messages
+from geospatial_agents.sandbox import SandboxPool
+
 logger = logging.getLogger(__name__)
 
 
-class AnalysisAgent:
+class AnalysisAgent(GeneratedCodeMixin):
     """Agent for advanced geospatial analysis"""
     
+    # Globals available to generated code -> 'module' or 'module:attribute' they come from
+    EXEC_MODULES = {
+        "gpd": "geopandas",
+        "rasterio": "rasterio",
+        "np": "numpy",
+        "pd": "pandas",
+        "pandas": "pandas",
+        "KMeans": "sklearn.cluster:KMeans",
+        "StandardScaler": "sklearn.preprocessing:StandardScaler",
+        "Path": "pathlib:Path"
+    }
+    
     def __init__(
         self,
         llm: BaseChatModel,
-        work_dir: Path = None
+        work_dir: Path = None,
+        code_cache: Optional[CodeCache] = None,
+        sandbox: Optional[SandboxPool] = None
     ):
         """
         Initialize analysis agent
@@ -28,10 +44,14 @@ class AnalysisAgent:
         Args:
             llm: Language model instance
             work_dir: Working directory
+            code_cache: Cache of generated code that ran successfully
+            sandbox: Worker pool that runs generated code in isolated processes
         """
         self.llm = llm
         self.work_dir = work_dir or Path("./geospatial_data")
         self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.code_cache = code_cache
+        self.sandbox = sandbox
     
     def execute(
         self,
@@ -57,13 +77,46 @@ class AnalysisAgent:
         if not data_paths:
             return {"analysis": {}, "error": "No data available for analysis"}
         
-        code = self._generate_analysis_code(
+        # Reuse code that ran successfully for the same task and input schemas
+        analysis_results = self._run_generated_code(
+            "analysis",
             task_description,
             parameters,
-            data_paths
+            data_paths,
+            messages=lambda failed_code: self._analysis_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_analysis(code, data_paths),
+            succeeded=lambda results: bool(results) and "error" not in results
         )
         
-        analysis_results = self._execute_analysis(code, data_paths)
+        return {
+            "analysis": analysis_results,
+            "analysis_type": parameters.get("type", "general")
+        }
+    
+    async def aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Execute analysis task without blocking the event loop (see execute)"""
+        logger.info(f"Executing analysis: {task_description}")
+        
+        data_paths = self._get_data_paths(context)
+        
+        if not data_paths:
+            return {"analysis": {}, "error": "No data available for analysis"}
+        
+        # Reuse code that ran successfully for the same task and input schemas
+        analysis_results = await self._arun_generated_code(
+            "analysis",
+            task_description,
+            parameters,
+            data_paths,
+            messages=lambda failed_code: self._analysis_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_analysis(code, data_paths),
+            succeeded=lambda results: bool(results) and "error" not in results
+        )
         
         return {
             "analysis": analysis_results,
@@ -82,13 +135,14 @@ class AnalysisAgent:
                         paths.append(data)
         return [Path(p) for p in paths if Path(p).exists()]
     
-    def _generate_analysis_code(
+    def _analysis_code_messages(
         self,
         task_description: str,
         parameters: Dict[str, Any],
-        data_paths: list
-    ) -> str:
-        """Generate analysis code using LLM"""
+        data_paths: list,
+        failed_code: Optional[str] = None
+    ) -> list:
+        """Build the LLM messages for analysis code generation"""
         prompt = f"""Generate Python code to perform this geospatial analysis: "{task_description}"
 
 Parameters: {json.dumps(parameters, indent=2)}
@@ -108,24 +162,26 @@ Use:
 Return only executable Python code that sets 'analysis_results' variable.
 """
         
-        from langchain_core.messages import SystemMessage, HumanMessage
-        
-        messages = [
-            SystemMessage(content="You are a geospatial analysis expert. Generate executable Python code."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = self.llm.invoke(messages)
-        code = response.content
-        
-        code_match = re.search(r'```python\n(.*?)\n```', code, re.DOTALL)
-        if code_match:
-            code = code_match.group(1)
-        
-        return code
+        return code_messages(
+            "You are a geospatial analysis expert. Generate executable Python code.",
+            prompt,
+            failed_code
+        )
     
     def _execute_analysis(self, code: str, data_paths: list) -> Dict[str, Any]:
         """Execute analysis code"""
+        if self.sandbox:
+            outcome = self.sandbox.run(
+                code,
+                self.EXEC_MODULES,
+                {"data_paths": data_paths, "analysis_results": {}},
+                agent=self
+            )
+            if not outcome.success:
+                logger.error(f"Analysis execution failed: {outcome.error}")
+                return {"error": outcome.error}
+            return outcome.namespace.get("analysis_results", {})
+        
         try:
             import geopandas as gpd
             import rasterio
@@ -4,17 +4,60 @@ Handles downloading geospatial datasets from various sources
 """
 
 import logging
-from typing import Dict, Any, Optional, List
+import asyncio
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+import contextvars
+import uuid
 import requests
 import json
 import re
 import os
+import tarfile
+import zipfile
 
 from langchain_core.language_models import BaseChatModel
 
+from geospatial_agents.download.engine import DownloadEngine, DownloadJob, DownloadProgress
+from geospatial_agents.download.adapters import AdapterContext, AdapterRegistry, SourceAdapter
+from geospatial_agents.download.bandwidth import BandwidthLimiter
+from geospatial_agents.download.blob_store import BlobStore
+from geospatial_agents.download.catalog import DownloadCatalog
+from geospatial_agents.download.extract import (
+    TarStreamExtractor,
+    archive_stem,
+    extract_tar,
+    extract_zip,
+    is_geospatial_member,
+    tar_stream_mode
+)
+from geospatial_agents.download.github import (
+    GitHubClient,
+    git_blob_sha,
+    matches_patterns,
+    patterns_from_extensions,
+    select_tree_files
+)
+from geospatial_agents.download.preflight import Preflight
+from geospatial_agents.download.scheduler import DownloadScheduler, QuotaExceeded
+from geospatial_agents.download.script_store import DownloadScriptStore, host_key, script_id, validate_download
+from geospatial_agents.download.huggingface import requested_formats, select_repo_files
+from geospatial_agents.events import emit, DownloadProgressEvent
+from geospatial_agents.utils.llm_cache import uncached
+from geospatial_agents.utils.workspace_janitor import WorkspaceJanitor
+
 logger = logging.getLogger(__name__)
 
+# Archives larger than this are kept as they are
+MAX_EXTRACT_SIZE = 50 * 1024**3
+
+# (tenant, request id) of the download request being executed
+_download_request: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar(
+    "download_request", default=None
+)
+
 
 class DownloadAgent:
     """Agent for downloading geospatial datasets"""
@@ -22,7 +65,23 @@ class DownloadAgent:
     def __init__(
         self,
         llm: BaseChatModel,
-        work_dir: Path = None
+        work_dir: Path = None,
+        max_concurrent_files: int = 8,
+        per_host_limit: int = 4,
+        progress_callback=None,
+        max_concurrent_datasets: int = 3,
+        bandwidth_limit_mbps: Optional[float] = None,
+        huggingface_mode: str = "native",
+        huggingface_workers: int = 8,
+        include_parquet_mirror: bool = False,
+        blob_store: Optional[BlobStore] = None,
+        extract_geospatial_only: bool = True,
+        github_recursive: bool = True,
+        source_adapters: Optional[AdapterRegistry] = None,
+        script_store: Optional[DownloadScriptStore] = None,
+        scheduler: Optional[DownloadScheduler] = None,
+        tenant: str = "default",
+        janitor: Optional[WorkspaceJanitor] = None
     ):
         """
         Initialize download agent
@@ -30,6 +89,32 @@ class DownloadAgent:
         Args:
             llm: Language model instance
             work_dir: Working directory
+            max_concurrent_files: Maximum files downloaded at once within a dataset
+            per_host_limit: Maximum concurrent connections to a single host
+            progress_callback: Called with aggregate progress snapshots during multi-file downloads
+            max_concurrent_datasets: Search results downloaded at once
+            bandwidth_limit_mbps: Total download budget in megabits per second shared by
+                all concurrent transfers (None for unlimited)
+            huggingface_mode: 'native' downloads selected files with huggingface_hub in-process,
+                'cli' runs huggingface-cli for the whole repository
+            huggingface_workers: HuggingFace files downloaded at once in native mode
+            include_parquet_mirror: Also download the Parquet copies in '.parquet/' conversion
+                directories of HuggingFace datasets that have original files
+            blob_store: Content-addressed store that downloaded files are linked into,
+                so identical files across datasets and the HuggingFace cache use disk once
+            extract_geospatial_only: Extract only geospatial data, sidecar and documentation
+                members from downloaded archives (everything if none match)
+            github_recursive: Download GitHub directories with their subdirectories using
+                one Git Trees API call (False lists a single directory level)
+            source_adapters: Native downloaders for known portals (USGS, Sentinel, OSM,
+                Natural Earth, WorldPop, NOAA, NASA); defaults to the built-in adapters
+            script_store: Per-host store of LLM-generated download scripts that produced
+                data, reused before asking the LLM for new code
+            scheduler: Admits downloads against disk quotas by their expected size and
+                applies per-tenant bandwidth budgets
+            tenant: Tenant downloads are charged to unless parameters name one
+            janitor: Workspace janitor that download targets are pinned in from the
+                moment they are known until the workflow run (or execute() call) ends
 
         """
         self.llm = llm
@@ -37,6 +122,97 @@ class DownloadAgent:
         self.work_dir.mkdir(parents=True, exist_ok=True)
         self.downloads_dir = self.work_dir / "downloads"
         self.downloads_dir.mkdir(exist_ok=True)
+        self.max_concurrent_datasets = max(1, max_concurrent_datasets)
+        self.huggingface_mode = huggingface_mode.lower()
+        if self.huggingface_mode not in ("native", "cli"):
+            raise ValueError(f"Unknown HuggingFace download mode: {huggingface_mode}")
+        self.huggingface_workers = max(1, huggingface_workers)
+        self.include_parquet_mirror = include_parquet_mirror
+        self.blob_store = blob_store
+        self.extract_select = is_geospatial_member if extract_geospatial_only else None
+        self.github_recursive = github_recursive
+        self.bandwidth = BandwidthLimiter.from_mbps(bandwidth_limit_mbps)
+        self.engine = DownloadEngine(
+            max_workers=max_concurrent_files,
+            per_host_limit=per_host_limit,
+            progress_callback=self._report_progress,
+            bandwidth=self.bandwidth
+        )
+        self.github = GitHubClient(self.engine)
+        # Data-or-HTML verdicts per URL pattern, checked before direct downloads
+        self.preflight = Preflight(self.engine, self.downloads_dir / ".preflight.json")
+        # Known portals are downloaded natively; the LLM only writes code for unknown hosts
+        self.adapters = source_adapters or AdapterRegistry()
+        self.scheduler = scheduler
+        self.tenant = tenant
+        self.janitor = janitor
+        self.adapter_context = AdapterContext(
+            self.engine,
+            self.downloads_dir,
+            self.extract_select,
+            slot=self._download_slot if scheduler else None
+        )
+        self.script_store = script_store
+        self.progress_callback = progress_callback
+        # Completed downloads, revalidated instead of re-downloaded on later runs
+        self.catalog = DownloadCatalog(self.downloads_dir / ".catalog.json")
+    
+    def _report_progress(self, snapshot: Dict[str, Any]) -> None:
+        """Forward engine progress to the workflow event stream and the user callback"""
+        emit(DownloadProgressEvent(**snapshot))
+        if self.progress_callback:
+            self.progress_callback(snapshot)
+    
+    def _store_blobs(self, *paths: Path) -> None:
+        """Deduplicate downloaded files or directories through the blob store"""
+        if self.blob_store:
+            self.blob_store.store_paths(paths)
+    
+    def _pin(self, path: Any) -> None:
+        """Keep the janitor from evicting a download target while this run uses it"""
+        if self.janitor and path:
+            self.janitor.pin([path])
+    
+    def _cached(self, catalog_key: str) -> Optional[Dict[str, Any]]:
+        """Catalog entry for a source, with its local copy pinned before it is revalidated"""
+        cached = self.catalog.get(catalog_key)
+        if cached:
+            self._pin(cached["path"])
+        return cached
+    
+    @contextmanager
+    def _request_scope(self, parameters: Dict[str, Any]):
+        """Charge the downloads of one execute() call to a tenant and a fresh request quota"""
+        if _download_request.get() is not None:
+            # aexecute() delegating to execute()
+            yield
+            return
+        request_id = uuid.uuid4().hex
+        token = _download_request.set((parameters.get("tenant") or self.tenant, request_id))
+        try:
+            with self.janitor.run() if self.janitor else nullcontext():
+                yield
+        finally:
+            _download_request.reset(token)
+            if self.scheduler:
+                self.scheduler.end_request(request_id)
+    
+    def _download_slot(self, size: Optional[int], label: str):
+        """Scheduler admission for a download of size bytes (no-op without a scheduler)"""
+        if not self.scheduler:
+            return nullcontext()
+        tenant, request_id = _download_request.get() or (self.tenant, "")
+        return self.scheduler.slot(size, tenant, request_id, label)
+    
+    @asynccontextmanager
+    async def _adownload_slot(self, size: Optional[int], label: str):
+        """Like _download_slot(), waiting for admission without blocking the event loop"""
+        if not self.scheduler:
+            yield None
+            return
+        tenant, request_id = _download_request.get() or (self.tenant, "")
+        async with self.scheduler.aslot(size, tenant, request_id, label) as reservation:
+            yield reservation
     
     def execute(
         self,
@@ -49,12 +225,21 @@ class DownloadAgent:
         
         Args:
             task_description: Description of download task
-            parameters: Download parameters
+            parameters: Download parameters ('tenant' overrides the agent's tenant)
             context: Context from previous steps (e.g., search results)
             
         Returns:
             Download results
         """
+        with self._request_scope(parameters):
+            return self._execute(task_description, parameters, context)
+    
+    def _execute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
         logger.info(f"Executing download: {task_description}")
         
         downloaded_data = {}
@@ -78,7 +263,11 @@ class DownloadAgent:
                     file_extensions = [".csv"]
                 elif "json" in task_description.lower():
                     file_extensions = [".json"]
-                result = self._download_from_github_directory(github_info, file_extensions)
+                result = self._download_from_github_directory(
+                    github_info,
+                    file_extensions,
+                    file_patterns=parameters.get("file_patterns")
+                )
                 if result:
                     folder_name = Path(github_info['path']).name if github_info['path'] else github_info['repo']
                     downloaded_data[f"{github_info['owner']}_{github_info['repo']}_{folder_name}"] = str(result)
@@ -108,7 +297,8 @@ class DownloadAgent:
                 result = self._download_from_huggingface({
                     "name": hf_repo_id, 
                     "source": url,
-                    "repo_type": "dataset" if is_dataset else "model"
+                    "repo_type": "dataset" if is_dataset else "model",
+                    "file_formats": parameters.get("formats") or parameters.get("file_formats")
                 })
                 if result:
                     downloaded_data[hf_repo_id.replace("/", "_")] = str(result)
@@ -147,7 +337,8 @@ class DownloadAgent:
                     result = self._download_from_huggingface({
                         "name": hf_repo_id, 
                         "source": url,
-                        "repo_type": "dataset" if is_dataset else "model"
+                        "repo_type": "dataset" if is_dataset else "model",
+                        "file_formats": parameters.get("formats") or parameters.get("file_formats")
                     })
                     if result:
                         downloaded_data[hf_repo_id.replace("/", "_")] = str(result)
@@ -181,7 +372,11 @@ class DownloadAgent:
                     file_extensions = [".csv"]
                 elif "json" in task_description.lower():
                     file_extensions = [".json"]
-                result = self._download_from_github_directory(github_info, file_extensions)
+                result = self._download_from_github_directory(
+                    github_info,
+                    file_extensions,
+                    file_patterns=parameters.get("file_patterns")
+                )
                 if result:
                     folder_name = Path(github_info['path']).name if github_info['path'] else github_info['repo']
                     downloaded_data[f"{github_info['owner']}_{github_info['repo']}_{folder_name}"] = str(result)
@@ -208,7 +403,8 @@ class DownloadAgent:
                 result = self._download_from_huggingface({
                     "name": hf_repo_id, 
                     "source": url,
-                    "repo_type": "dataset" if is_dataset else "model"
+                    "repo_type": "dataset" if is_dataset else "model",
+                    "file_formats": parameters.get("formats") or parameters.get("file_formats")
                 })
                 if result:
                     downloaded_data[hf_repo_id.replace("/", "_")] = str(result)
@@ -237,44 +433,151 @@ class DownloadAgent:
             # Use LLM to determine what to download
             datasets = self._determine_downloads_with_llm(task_description, context)
         
-        # Download each dataset
-        for dataset in datasets[:parameters.get("limit", 5)]:
-            try:
-                source = dataset.get("source", "")
-                name = dataset.get("name", "unknown")
-                
-                # Handle source as dict (from enhanced search results)
-                source_url = None
-                if isinstance(source, dict):
-                    source_url = source.get("url", "")
-                    source_str = source_url or str(source)
-                else:
-                    source_url = source if isinstance(source, str) else ""
-                    source_str = source_url
-                
-                # Check if it's a HuggingFace URL
-                if source_url and self._extract_huggingface_dataset_id(source_url):
-                    path = self._download_from_huggingface(dataset)
-                elif source_url and source_url.startswith("http"):
-                    path = self._download_from_url(source_url, name)
-                elif isinstance(source_str, str) and "huggingface" in source_str.lower():
-                    path = self._download_from_huggingface(dataset)
-                else:
-                    # Use LLM to generate download code
-                    path = self._download_with_llm(dataset)
-                
-                if path:
-                    downloaded_data[name] = str(path)
-            except Exception as e:
-                logger.error(f"Failed to download {dataset.get('name', 'unknown')}: {e}")
-                import traceback
-                logger.debug(traceback.format_exc())
+        # Download the datasets concurrently, collecting results and errors per dataset
+        datasets = datasets[:parameters.get("limit", 5)]
+        errors = {}
+        if datasets:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_concurrent_datasets, len(datasets)),
+                thread_name_prefix="dataset-download"
+            ) as pool:
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._download_dataset, dataset)
+                    for dataset in datasets
+                ]
+                for dataset, future in zip(datasets, futures):
+                    name = dataset.get("name", "unknown")
+                    try:
+                        path = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to download {name}: {e}")
+                        import traceback
+                        logger.debug(traceback.format_exc())
+                        errors[name] = str(e)
+                        continue
+                    if path:
+                        downloaded_data[name] = str(path)
+                    else:
+                        errors[name] = "No data could be downloaded"
         
         return {
             "downloaded_data": downloaded_data,
-            "count": len(downloaded_data)
+            "count": len(downloaded_data),
+            "errors": errors
         }
     
+    def _download_dataset(self, dataset: Dict[str, Any]) -> Optional[Path]:
+        """Download one search result with the method matching its source"""
+        source = dataset.get("source", "")
+        name = dataset.get("name", "unknown")
+        
+        # Handle source as dict (from enhanced search results)
+        source_url = None
+        if isinstance(source, dict):
+            source_url = source.get("url", "")
+            source_str = source_url or str(source)
+        else:
+            source_url = source if isinstance(source, str) else ""
+            source_str = source_url
+        
+        # Check if it's a HuggingFace URL
+        if source_url and self._extract_huggingface_dataset_id(source_url):
+            path = self._download_from_huggingface(dataset)
+        elif source_url and source_url.startswith("http"):
+            path = self._download_from_url(source_url, name)
+        elif isinstance(source_str, str) and "huggingface" in source_str.lower():
+            path = self._download_from_huggingface(dataset)
+        else:
+            # Use LLM to generate download code
+            path = self._download_with_llm(dataset)
+        # Pinned now rather than when all datasets are done
+        self._pin(path)
+        return path
+    
+    async def _adownload_dataset(self, dataset: Dict[str, Any]) -> Optional[Path]:
+        """Download one search result without blocking the event loop (see _download_dataset)"""
+        source = dataset.get("source", "")
+        name = dataset.get("name", "unknown")
+        
+        if isinstance(source, dict):
+            source_url = source.get("url", "")
+            source_str = source_url or str(source)
+        else:
+            source_url = source if isinstance(source, str) else ""
+            source_str = source_url
+        
+        if source_url and self._extract_huggingface_dataset_id(source_url):
+            path = await asyncio.to_thread(self._download_from_huggingface, dataset)
+        elif source_url and source_url.startswith("http"):
+            path = await self._adownload_from_url(source_url, name)
+        elif isinstance(source_str, str) and "huggingface" in source_str.lower():
+            path = await asyncio.to_thread(self._download_from_huggingface, dataset)
+        else:
+            path = await asyncio.to_thread(self._download_with_llm, dataset)
+        self._pin(path)
+        return path
+    
+    async def aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Execute download task without blocking the event loop (see execute)
+        
+        Direct dataset URLs stream through an async HTTP client; repository
+        sources (GitHub, Zenodo, HuggingFace) and LLM-generated download code
+        run in worker threads.
+        """
+        with self._request_scope(parameters):
+            return await self._aexecute(task_description, parameters, context)
+    
+    async def _aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
+        if "url" in parameters or "urls" in parameters or re.search(url_pattern, task_description):
+            # Explicit URLs go through the source detection in execute()
+            return await asyncio.to_thread(self.execute, task_description, parameters, context)
+        
+        logger.info(f"Executing download: {task_description}")
+        
+        if context and "search_results" in context:
+            datasets = context["search_results"]
+        elif "dataset_ids" in parameters:
+            datasets = parameters["dataset_ids"]
+        else:
+            datasets = await asyncio.to_thread(self._determine_downloads_with_llm, task_description, context)
+        
+        datasets = datasets[:parameters.get("limit", 5)]
+        semaphore = asyncio.Semaphore(self.max_concurrent_datasets)
+        
+        async def download(dataset):
+            async with semaphore:
+                return await self._adownload_dataset(dataset)
+        
+        outcomes = await asyncio.gather(*(download(dataset) for dataset in datasets), return_exceptions=True)
+        
+        downloaded_data = {}
+        errors = {}
+        for dataset, outcome in zip(datasets, outcomes):
+            name = dataset.get("name", "unknown")
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed to download {name}: {outcome}")
+                errors[name] = str(outcome)
+            elif outcome:
+                downloaded_data[name] = str(outcome)
+            else:
+                errors[name] = "No data could be downloaded"
+        
+        return {
+            "downloaded_data": downloaded_data,
+            "count": len(downloaded_data),
+            "errors": errors
+        }
     
     def _extract_zenodo_record_id(self, url: str) -> Optional[str]:
         """Extract Zenodo record ID from URL
@@ -376,13 +679,20 @@ class DownloadAgent:
             logger.info(f"Converted GitHub blob URL to raw URL: {url}")
         return url
     
-    def _download_from_github_directory(self, repo_info: Dict[str, str], file_extensions: List[str] = None) -> Optional[Path]:
+    def _download_from_github_directory(
+        self,
+        repo_info: Dict[str, str],
+        file_extensions: List[str] = None,
+        file_patterns: List[str] = None
+    ) -> Optional[Path]:
         """Download all files from a GitHub directory
         
         Args:
             repo_info: Dict with 'owner', 'repo', 'branch', 'path'
             file_extensions: List of file extensions to download (e.g., ['.csv', '.json']). 
                            If None, downloads all files.
+            file_patterns: Glob patterns (e.g., ['data/*.geojson']) files must match,
+                           in addition to file_extensions
         
         Returns:
             Path to directory containing downloaded files
@@ -392,6 +702,12 @@ class DownloadAgent:
         branch = repo_info["branch"]
         path = repo_info["path"]
         
+        if self.github_recursive:
+            result = self._download_from_github_tree(repo_info, file_extensions, file_patterns)
+            if result:
+                return result
+            logger.info("Falling back to listing the GitHub directory through the contents API")
+        
         logger.info(f"Downloading GitHub directory: {owner}/{repo}/{path} (branch: {branch})")
         
         try:
@@ -402,8 +718,15 @@ class DownloadAgent:
             
             logger.info(f"Fetching directory contents from: {api_url}")
             
-            headers = {"Accept": "application/vnd.github.v3+json"}
-            response = requests.get(api_url, headers=headers, timeout=30)
+            # A 304 for the directory listing means the local copy is current
+            catalog_key = f"github:{owner}/{repo}@{branch}/{path}:{','.join(file_extensions or [])}"
+            cached = self._cached(catalog_key)
+            
+            response = self.github.get(api_url, headers=self.catalog.conditional_headers(cached))
+            if response.status_code == 304 and cached:
+                logger.info(f"GitHub directory unchanged, using cached download: {cached['path']}")
+                self.catalog.touch(catalog_key)
+                return Path(cached["path"])
             response.raise_for_status()
             
             contents = response.json()
@@ -415,6 +738,8 @@ class DownloadAgent:
             # Filter files by extension if specified
             if file_extensions:
                 contents = [item for item in contents if any(item.get("name", "").endswith(ext) for ext in file_extensions)]
+            if file_patterns:
+                contents = [item for item in contents if matches_patterns(item.get("name", ""), file_patterns)]
             
             if not contents:
                 logger.warning(f"No files found matching extensions: {file_extensions}")
@@ -427,9 +752,7 @@ class DownloadAgent:
             save_path = self.downloads_dir / f"{owner}_{repo}_{folder_name}"
             save_path.mkdir(parents=True, exist_ok=True)
             
-            downloaded_files = []
-            
-            # Download each file
+            jobs = []
             for item in contents:
                 if item.get("type") != "file":
                     continue  # Skip subdirectories for now
@@ -442,24 +765,24 @@ class DownloadAgent:
                     file_path_in_repo = item.get("path", f"{path}/{filename}" if path else filename)
                     download_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{file_path_in_repo}"
                 
-                logger.info(f"Downloading {filename}...")
-                
-                file_path = save_path / filename
-                
-                try:
-                    file_response = requests.get(download_url, stream=True, timeout=60)
-                    file_response.raise_for_status()
-                    
-                    with open(file_path, 'wb') as f:
-                        for chunk in file_response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                    
-                    downloaded_files.append(file_path)
-                    logger.info(f"Downloaded {filename} to {file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to download {filename}: {e}")
-                    continue
+                jobs.append(DownloadJob(
+                    url=download_url,
+                    dest=save_path / filename,
+                    expected_size=item.get("size")
+                ))
+            
+            # Download all files concurrently
+            with self._download_slot(sum(job.expected_size or 0 for job in jobs), f"{owner}/{repo}/{path}"):
+                results = self.engine.fetch_many(jobs)
+            downloaded_files = [r.path for r in results if r.success]
+            self._store_blobs(*downloaded_files)
+            if results and len(downloaded_files) == len(results):
+                self.catalog.record(
+                    catalog_key,
+                    save_path,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified")
+                )
             
             if downloaded_files:
                 logger.info(f"Successfully downloaded {len(downloaded_files)} file(s) to {save_path}")
@@ -468,6 +791,8 @@ class DownloadAgent:
                 logger.error("No files were downloaded")
                 return None
                 
+        except QuotaExceeded:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch GitHub directory: {e}")
             import traceback
@@ -479,6 +804,93 @@ class DownloadAgent:
             logger.debug(traceback.format_exc())
             return None
     
+    def _download_from_github_tree(
+        self,
+        repo_info: Dict[str, str],
+        file_extensions: List[str] = None,
+        file_patterns: List[str] = None
+    ) -> Optional[Path]:
+        """Download a GitHub directory and its subdirectories
+        
+        The whole tree is listed with a single git/trees?recursive=1 call
+        (conditional on the previous listing's ETag), and the matching files
+        are fetched concurrently from raw.githubusercontent.com, which does not
+        count against the API rate limit. Files whose local content already has
+        the blob SHA from the tree are not downloaded again.
+        
+        Returns:
+            Path to the directory, or None if the tree could not be listed
+        """
+        owner = repo_info["owner"]
+        repo = repo_info["repo"]
+        branch = repo_info["branch"]
+        path = repo_info["path"].strip("/")
+        patterns = patterns_from_extensions(file_extensions) + list(file_patterns or [])
+        
+        catalog_key = f"github-tree:{owner}/{repo}@{branch}/{path}:{','.join(patterns)}"
+        cached = self._cached(catalog_key)
+        try:
+            response = self.github.tree(owner, repo, branch, headers=self.catalog.conditional_headers(cached))
+            if response.status_code == 304 and cached:
+                logger.info(f"GitHub tree unchanged, using cached download: {cached['path']}")
+                self.catalog.touch(catalog_key)
+                return Path(cached["path"])
+            response.raise_for_status()
+            tree = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Could not list GitHub tree for {owner}/{repo}@{branch}: {e}")
+            return None
+        
+        if tree.get("truncated"):
+            # GitHub caps recursive listings (about 100,000 entries); what was listed is still usable
+            logger.warning(f"GitHub tree listing of {owner}/{repo} was truncated, some files may be missing")
+        
+        entries = select_tree_files(tree.get("tree", []), path, patterns)
+        if not entries:
+            logger.warning(f"No files under '{path or '/'}' match {patterns or 'any pattern'}")
+            return None
+        
+        folder_name = Path(path).name if path else repo
+        save_path = self.downloads_dir / f"{owner}_{repo}_{folder_name}"
+        save_path.mkdir(parents=True, exist_ok=True)
+        
+        jobs = []
+        unchanged = 0
+        for entry in entries:
+            dest = save_path / entry["relative_path"]
+            if dest.is_file() and entry.get("sha") and git_blob_sha(dest) == entry["sha"]:
+                unchanged += 1
+                continue
+            jobs.append(DownloadJob(
+                url=f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{entry['path']}",
+                dest=dest,
+                expected_size=entry.get("size")
+            ))
+        logger.info(
+            f"Found {len(entries)} file(s) in the GitHub tree"
+            + (f", {unchanged} already up to date" if unchanged else "")
+        )
+        
+        results = []
+        if jobs:
+            with self._download_slot(sum(job.expected_size or 0 for job in jobs), f"{owner}/{repo}/{path}"):
+                results = self.engine.fetch_many(jobs)
+        downloaded_files = [r.path for r in results if r.success]
+        self._store_blobs(*downloaded_files)
+        if len(downloaded_files) == len(results):
+            self.catalog.record(
+                catalog_key,
+                save_path,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+        
+        if downloaded_files or unchanged:
+            logger.info(f"Successfully downloaded {len(downloaded_files)} file(s) to {save_path}")
+            return save_path
+        logger.error("No files were downloaded")
+        return None
+    
     def _is_html_content(self, content: bytes, content_type: str = None) -> bool:
         """Check if content is HTML"""
         if content_type and 'text/html' in content_type.lower():
@@ -511,52 +923,164 @@ class DownloadAgent:
                 filename = filename.split('?')[0]
             filepath = self.downloads_dir / filename
             
-            logger.info(f"Downloading {url}...")
+            # Revalidate a previous download of this URL with a conditional GET
+            catalog_key = f"url:{url}"
+            cached = self._cached(catalog_key)
+            expected_size = None
+            preflight_size = None
+            if cached:
+                filepath = Path(cached["path"])
+                logger.info(f"Revalidating cached download of {url}...")
+            else:
+                adapter = self.adapters.find(url)
+                if adapter:
+                    return self._download_with_adapter(adapter, url, name)
+                # Landing pages go straight to the source-specific method, before any body is written
+                preflight = self.preflight.check(url)
+                if preflight.verdict == "html":
+                    logger.info(f"{url} is an HTML page, not a data file")
+                    return self._download_with_source_specific_method(url, name)
+                if preflight.accepts_ranges:
+                    expected_size = preflight.size
+                preflight_size = preflight.size
+                logger.info(f"Downloading {url}...")
             
-            # Add headers to avoid blocking
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': '*/*'
-            }
+            self._pin(filepath)
+            # Stream to a resumable .part file through the pooled session
+            with self._download_slot(preflight_size, filename):
+                result = self.engine.fetch(
+                    DownloadJob(
+                        url=url,
+                        dest=filepath,
+                        expected_size=expected_size,
+                        headers=self.catalog.conditional_headers(cached)
+                    ),
+                    DownloadProgress(total_files=1, callback=self._report_progress)
+                )
+            if not result.success:
+                raise IOError(result.error)
+            if result.not_modified:
+                self.catalog.touch(catalog_key)
+                logger.info(f"Using cached download: {filepath}")
+                return filepath
             
-            response = requests.get(url, stream=True, timeout=60, headers=headers)
-            response.raise_for_status()
+            if not self._is_data_file(filepath, result.content_type):
+                self.preflight.record(url, "html")
+                # Try to use LLM to generate proper download code
+                logger.info(f"Attempting to use source-specific download method for: {url}")
+                return self._download_with_source_specific_method(url, name)
+            
+            self._store_blobs(filepath)
+            self.catalog.record(
+                catalog_key,
+                filepath,
+                etag=result.etag,
+                last_modified=result.last_modified
+            )
+            logger.info(f"Downloaded to {filepath}")
+            return filepath
+        except QuotaExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"URL download failed: {e}")
+            return None
+    
+    async def _adownload_from_url(self, url: str, name: str = None) -> Optional[Path]:
+        """Download from direct URL without blocking the event loop (see _download_from_url)
+        
+        Admission is awaited on the event loop; the transfer runs through the
+        download engine in a worker thread, so it resumes, is limited and
+        cleans up exactly like a synchronous download.
+        """
+        try:
+            url = self._convert_github_blob_url(url)
             
-            # Check content type
-            content_type = response.headers.get('Content-Type', '').lower()
+            filename = name or Path(url).name
+            if '?' in filename:
+                filename = filename.split('?')[0]
+            filepath = self.downloads_dir / filename
             
-            # Read first chunk to check if it's HTML
-            first_chunk = b''
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        if not first_chunk:
-                            first_chunk = chunk
-                        f.write(chunk)
+            catalog_key = f"url:{url}"
+            cached = self._cached(catalog_key)
+            expected_size = None
+            preflight_size = None
+            if cached:
+                filepath = Path(cached["path"])
+                logger.info(f"Revalidating cached download of {url}...")
+            else:
+                adapter = self.adapters.find(url)
+                if adapter:
+                    return await asyncio.to_thread(self._download_with_adapter, adapter, url, name)
+                preflight = await asyncio.to_thread(self.preflight.check, url)
+                if preflight.verdict == "html":
+                    logger.info(f"{url} is an HTML page, not a data file")
+                    return await asyncio.to_thread(self._download_with_source_specific_method, url, name)
+                if preflight.accepts_ranges:
+                    expected_size = preflight.size
+                preflight_size = preflight.size
+                logger.info(f"Downloading {url}...")
             
-            # Check if downloaded content is HTML
-            if self._is_html_content(first_chunk, content_type):
-                logger.warning(f"Downloaded content appears to be HTML, not actual data file")
-                # Clean up the HTML file
-                self._cleanup_html_file(filepath)
-                logger.info(f"Attempting to use source-specific download method for: {url}")
-                # Try to use LLM to generate proper download code
-                return self._download_with_source_specific_method(url, name)
+            self._pin(filepath)
+            async with self._adownload_slot(preflight_size, filename):
+                result = await asyncio.to_thread(
+                    self.engine.fetch,
+                    DownloadJob(
+                        url=url,
+                        dest=filepath,
+                        expected_size=expected_size,
+                        headers=self.catalog.conditional_headers(cached)
+                    ),
+                    DownloadProgress(total_files=1, callback=self._report_progress)
+                )
+            if not result.success:
+                raise IOError(result.error)
+            if result.not_modified:
+                self.catalog.touch(catalog_key)
+                logger.info(f"Using cached download: {filepath}")
+                return filepath
             
-            # Check file extension - if no extension or .html, might be wrong
-            if filepath.suffix in ['', '.html', '.htm']:
-                # Try to detect actual file type from content
-                if self._is_html_content(first_chunk):
-                    logger.warning(f"File appears to be HTML, trying source-specific method")
-                    self._cleanup_html_file(filepath)
-                    return self._download_with_source_specific_method(url, name)
+            if not self._is_data_file(filepath, result.content_type):
+                self.preflight.record(url, "html")
+                logger.info(f"Attempting to use source-specific download method for: {url}")
+                return await asyncio.to_thread(self._download_with_source_specific_method, url, name)
             
+            await asyncio.to_thread(self._store_blobs, filepath)
+            self.catalog.record(
+                catalog_key,
+                filepath,
+                etag=result.etag,
+                last_modified=result.last_modified
+            )
             logger.info(f"Downloaded to {filepath}")
             return filepath
+        except QuotaExceeded:
+            raise
         except Exception as e:
             logger.error(f"URL download failed: {e}")
             return None
     
+    def _is_data_file(self, filepath: Path, content_type: str = "") -> bool:
+        """Check a finished download is data rather than an HTML page, removing it if not"""
+        content_type = (content_type or "").lower()
+        
+        # Read first chunk to check if it's HTML
+        with open(filepath, 'rb') as f:
+            first_chunk = f.read(8192)
+        
+        # Check if downloaded content is HTML
+        if self._is_html_content(first_chunk, content_type):
+            logger.warning(f"Downloaded content appears to be HTML, not actual data file")
+            self._cleanup_html_file(filepath)
+            return False
+        
+        # Check file extension - if no extension or .html, might be wrong
+        if filepath.suffix in ['', '.html', '.htm'] and self._is_html_content(first_chunk):
+            logger.warning(f"File appears to be HTML, trying source-specific method")
+            self._cleanup_html_file(filepath)
+            return False
+        
+        return True
+    
     
     def _download_from_zenodo(self, record_id: str, url: str = None) -> Optional[Path]:
         """Download dataset from Zenodo
@@ -570,15 +1094,26 @@ class DownloadAgent:
         """
         logger.info(f"Downloading Zenodo record: {record_id}")
         
+        downloaded_files = []
+        save_path = None
         try:
             # Use Zenodo API to get file information
             api_url = f"https://zenodo.org/api/records/{record_id}"
             logger.info(f"Fetching record metadata from: {api_url}")
             
-            response = requests.get(api_url, timeout=30)
+            response = self.engine.get(api_url, timeout=30)
             response.raise_for_status()
             record_data = response.json()
             
+            # Skip the download if this revision of the record is already local
+            catalog_key = f"zenodo:{record_id}"
+            revision = f"{record_data.get('revision', '')}@{record_data.get('updated', '')}"
+            cached = self._cached(catalog_key)
+            if cached and cached.get("revision") == revision:
+                logger.info(f"Zenodo record {record_id} unchanged, using cached download: {cached['path']}")
+                self.catalog.touch(catalog_key)
+                return Path(cached["path"])
+            
             # Extract files from record
             files = record_data.get("files", [])
             if not files:
@@ -591,9 +1126,7 @@ class DownloadAgent:
             save_path = self.downloads_dir / f"zenodo_{record_id}"
             save_path.mkdir(parents=True, exist_ok=True)
             
-            downloaded_files = []
-            
-            # Download each file
+            jobs = []
             for file_info in files:
                 file_url = file_info.get("links", {}).get("self", "")
                 filename = file_info.get("key", file_info.get("filename", "unknown"))
@@ -603,56 +1136,41 @@ class DownloadAgent:
                     logger.warning(f"No download URL for file: {filename}")
                     continue
                 
-                logger.info(f"Downloading {filename} ({file_size / (1024**3):.2f} GB)...")
-                
-                file_path = save_path / filename
-                
-                # Download with progress for large files
-                response = requests.get(file_url, stream=True, timeout=300)
-                response.raise_for_status()
-                
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                
-                downloaded_files.append(file_path)
-                logger.info(f"Downloaded {filename} to {file_path}")
-                
-                # If it's a zip file, optionally extract it (non-fatal if extraction fails)
-                if filename.endswith('.zip') and file_size < 50 * 1024**3:  # Extract if < 50GB
-                    try:
-                        logger.info(f"Attempting to extract {filename}...")
-                        import zipfile
-                        
-                        # First, verify it's a valid zip file
-                        try:
-                            with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                                # Test if zip file is valid
-                                zip_ref.testzip()
-                        except zipfile.BadZipFile:
-                            logger.warning(f"{filename} is not a valid ZIP file, skipping extraction")
-                        except Exception as e:
-                            logger.warning(f"Could not verify ZIP file: {e}, skipping extraction")
-                        else:
-                            # If valid, try to extract
-                            extract_path = save_path / filename.replace('.zip', '')
-                            extract_path.mkdir(exist_ok=True)
-                            
-                            # Try different extraction methods
-                            try:
-                                with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                                    zip_ref.extractall(extract_path)
-                                logger.info(f"Successfully extracted to {extract_path}")
-                            except zipfile.BadZipFile as e:
-                                logger.warning(f"ZIP file appears corrupted or uses unsupported compression: {e}")
-                                logger.info(f"Keeping original ZIP file at {file_path}")
-                            except Exception as e:
-                                logger.warning(f"Extraction failed: {e}")
-                                logger.info(f"Keeping original ZIP file at {file_path}. You can extract it manually.")
-                    except Exception as e:
-                        logger.warning(f"Failed to extract {filename}: {e}")
-                        logger.info(f"Keeping original ZIP file at {file_path}. You can extract it manually.")
+                logger.info(f"Queueing {filename} ({file_size / (1024**3):.2f} GB)...")
+                jobs.append(DownloadJob(
+                    url=file_url,
+                    dest=save_path / filename,
+                    expected_size=file_size,
+                    checksum=file_info.get("checksum"),
+                    timeout=300
+                ))
+            
+            # Download all files concurrently; zip archives are extracted once complete
+            with self._download_slot(sum(job.expected_size or 0 for job in jobs), f"zenodo_{record_id}"):
+                try:
+                    for job in jobs:
+                        # Tar archives are extracted from the byte stream while they download;
+                        # the extractor threads only start once the download is admitted
+                        mode = tar_stream_mode(job.dest.name)
+                        if mode and job.expected_size < MAX_EXTRACT_SIZE:
+                            job.consumer = TarStreamExtractor(save_path / archive_stem(job.dest.name), mode, self.extract_select)
+                    results = self.engine.fetch_many(jobs)
+                except BaseException:
+                    # Stop extractor threads the engine never finished
+                    for job in jobs:
+                        if job.consumer is not None and not job.consumer.completed:
+                            job.consumer.abort()
+                    raise
+            for result in results:
+                if not result.success:
+                    continue
+                downloaded_files.append(result.path)
+                self._extract_zenodo_archive(result.path, save_path, result.job.expected_size or 0, result.job.consumer)
+            if downloaded_files:
+                self._store_blobs(save_path)
+            
+            if results and all(result.success for result in results):
+                self.catalog.record(catalog_key, save_path, revision=revision)
             
             if downloaded_files:
                 logger.info(f"Successfully downloaded {len(downloaded_files)} file(s) from Zenodo record {record_id}")
@@ -662,6 +1180,8 @@ class DownloadAgent:
                 logger.error("No files were downloaded")
                 return None
                 
+        except QuotaExceeded:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch Zenodo record: {e}")
             import traceback
@@ -677,6 +1197,47 @@ class DownloadAgent:
                 return save_path
             return None
     
+    def _extract_zenodo_archive(
+        self,
+        file_path: Path,
+        save_path: Path,
+        file_size: int,
+        consumer: Optional[TarStreamExtractor] = None
+    ) -> None:
+        """Extract a downloaded Zenodo archive next to it (non-fatal if extraction fails)
+        
+        Tar archives extracted while downloading are left as they are; zip
+        archives (whose member list is at the end of the file) and tar archives
+        whose streaming extraction could not run are extracted here.
+        """
+        filename = file_path.name
+        if consumer is not None and consumer.completed:
+            if consumer.extracted or not self.extract_select:
+                return
+            # Nothing geospatial in the stream: fall back to extracting everything
+        
+        is_zip = filename.lower().endswith('.zip')
+        if not (is_zip or tar_stream_mode(filename)) or file_size >= MAX_EXTRACT_SIZE:
+            return
+        
+        extract_path = save_path / archive_stem(filename)
+        try:
+            logger.info(f"Extracting {filename}...")
+            extract_path.mkdir(exist_ok=True)
+            if is_zip:
+                extracted = extract_zip(file_path, extract_path, self.extract_select, self.engine.max_workers)
+            else:
+                extracted = extract_tar(file_path, extract_path, self.extract_select)
+                if not extracted and self.extract_select:
+                    extracted = extract_tar(file_path, extract_path, None)
+            logger.info(f"Extracted {len(extracted)} file(s) to {extract_path}")
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            logger.warning(f"{filename} is not a valid archive or uses unsupported compression: {e}")
+            logger.info(f"Keeping original archive at {file_path}")
+        except Exception as e:
+            logger.warning(f"Failed to extract {filename}: {e}")
+            logger.info(f"Keeping original archive at {file_path}. You can extract it manually.")
+    
     def _download_with_source_specific_method(self, url: str, name: str = None) -> Optional[Path]:
         """Use source-specific method to download data (not HTML page)"""
         logger.info(f"Using source-specific download method for: {url}")
@@ -686,6 +1247,10 @@ class DownloadAgent:
         if zenodo_record_id:
             return self._download_from_zenodo(zenodo_record_id, url)
         
+        adapter = self.adapters.find(url)
+        if adapter:
+            return self._download_with_adapter(adapter, url, name)
+        
         # Create a dataset dict for LLM download
         dataset = {
             "name": name or "dataset",
@@ -695,8 +1260,23 @@ class DownloadAgent:
         # Use LLM to generate proper download code
         return self._download_with_llm(dataset)
     
+    def _download_with_adapter(self, adapter: SourceAdapter, url: str, name: str = None) -> Optional[Path]:
+        """Download through a native portal adapter (no LLM involved)"""
+        logger.info(f"Using the {adapter.name} adapter for: {url}")
+        try:
+            path = adapter.download(url, name or "", self.adapter_context)
+        except QuotaExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"{adapter.name} adapter failed for {url}: {e}")
+            return None
+        if path:
+            self._store_blobs(path)
+            logger.info(f"Downloaded to {path}")
+        return path
+    
     def _download_from_huggingface(self, dataset: Dict[str, Any]) -> Optional[Path]:
-        """Download from HuggingFace using huggingface-cli
+        """Download from HuggingFace in-process (native mode) or using huggingface-cli
         
         Args:
             dataset: Dict with 'name' (repo ID), 'source' (URL), and optionally 'repo_type'
@@ -704,10 +1284,9 @@ class DownloadAgent:
                     - {"name": "HC-85/flood-prediction", "repo_type": "dataset"}
                     - {"source": "https://huggingface.co/datasets/HC-85/flood-prediction", "repo_type": "dataset"}
                     - {"source": "https://huggingface.co/ibm-nasa-geospatial/model-name", "repo_type": "model"}
+                    'formats' or 'file_formats' (list or text such as "GeoTIFF, CSV") limit
+                    which files are downloaded in native mode
         """
-        import subprocess
-        import shutil
-        
         # Extract repo ID and type
         repo_id = dataset.get("name", "")
         source = dataset.get("source", "")
@@ -738,6 +1317,122 @@ class DownloadAgent:
             return None
         
         logger.info(f"Downloading HuggingFace {repo_type}: {repo_id}")
+        formats = requested_formats(dataset.get("formats") or dataset.get("file_formats"))
+        
+        # Skip the download if the repository revision hasn't changed
+        catalog_key = f"hf:{repo_type}:{repo_id}"
+        if self.huggingface_mode == "native" and formats:
+            catalog_key += f"[{','.join(sorted(formats))}]"
+        revision = self._huggingface_revision(repo_id, repo_type)
+        cached = self._cached(catalog_key)
+        if cached and revision and cached.get("revision") == revision:
+            logger.info(f"HuggingFace {repo_type} {repo_id} unchanged, using cached download: {cached['path']}")
+            self.catalog.touch(catalog_key)
+            return Path(cached["path"])
+        
+        path = None
+        if self.huggingface_mode == "native":
+            path = self._download_huggingface_native(repo_id, repo_type, revision, formats)
+        if path is None:
+            path = self._download_huggingface_repo(repo_id, repo_type)
+        if path:
+            self._store_blobs(path)
+        if path and revision:
+            self.catalog.record(catalog_key, path, revision=revision)
+        return path
+    
+    def _huggingface_revision(self, repo_id: str, repo_type: str) -> Optional[str]:
+        """Return the current commit SHA of a HuggingFace repository, or None if unknown"""
+        try:
+            from huggingface_hub import HfApi
+            
+            return HfApi().repo_info(repo_id=repo_id, repo_type=repo_type).sha
+        except Exception as e:
+            logger.debug(f"Could not look up revision of {repo_id}: {e}")
+            return None
+    
+    def _download_huggingface_native(
+        self,
+        repo_id: str,
+        repo_type: str,
+        revision: Optional[str],
+        formats: List[str]
+    ) -> Optional[Path]:
+        """Download the repository files matching the requested formats with hf_hub_download
+        
+        Files are fetched concurrently (huggingface_workers at a time), skipping
+        Parquet copies in '.parquet/' conversion directories of datasets that
+        have original files unless include_parquet_mirror is set. Returns None so the caller can fall back
+        to huggingface-cli if the file listing or every file fails.
+        """
+        try:
+            from huggingface_hub import HfApi, hf_hub_download
+            from huggingface_hub.hf_api import RepoFile
+        except ImportError:
+            logger.error("huggingface_hub not installed. Install with: pip install huggingface_hub")
+            return None
+        
+        try:
+            tree = HfApi().list_repo_tree(repo_id, repo_type=repo_type, revision=revision, recursive=True)
+            files = {entry.path: entry.size for entry in tree if isinstance(entry, RepoFile)}
+        except Exception as e:
+            logger.error(f"Could not list files of HuggingFace {repo_type} {repo_id}: {e}")
+            return None
+        
+        selected = select_repo_files(files, formats, self.include_parquet_mirror)
+        if not selected:
+            logger.warning(f"No files to download in HuggingFace {repo_type} {repo_id}")
+            return None
+        
+        total_bytes = sum(files[path] or 0 for path in selected)
+        logger.info(
+            f"Downloading {len(selected)}/{len(files)} files ({total_bytes / (1024**2):.1f} MB) "
+            f"from HuggingFace {repo_type} {repo_id}"
+        )
+        
+        save_path = self.downloads_dir / repo_id.replace("/", "_")
+        save_path.mkdir(parents=True, exist_ok=True)
+        progress = DownloadProgress(
+            total_files=len(selected),
+            total_bytes=total_bytes,
+            callback=self._report_progress
+        )
+        
+        def fetch(filename: str) -> bool:
+            try:
+                hf_hub_download(
+                    repo_id=repo_id,
+                    filename=filename,
+                    repo_type=repo_type,
+                    revision=revision,
+                    local_dir=str(save_path)
+                )
+            except Exception as e:
+                logger.warning(f"Failed to download {filename} from {repo_id}: {e}")
+                progress.file_done(False)
+                return False
+            progress.add_bytes(files[filename] or 0)
+            progress.file_done(True)
+            return True
+        
+        with self._download_slot(total_bytes, repo_id), ThreadPoolExecutor(
+            max_workers=min(self.huggingface_workers, len(selected)),
+            thread_name_prefix="hf-download"
+        ) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, fetch, filename) for filename in selected]
+            succeeded = sum(1 for future in futures if future.result())
+        
+        if not succeeded:
+            return None
+        if succeeded < len(selected):
+            logger.warning(f"Downloaded {succeeded}/{len(selected)} files of {repo_id}")
+        logger.info(f"Successfully downloaded HuggingFace {repo_type} to {save_path}")
+        return save_path
+    
+    def _download_huggingface_repo(self, repo_id: str, repo_type: str) -> Optional[Path]:
+        """Download a HuggingFace repository using huggingface-cli, falling back to huggingface_hub"""
+        import subprocess
+        import shutil
         
         # Check if huggingface-cli is available
         if not shutil.which("huggingface-cli"):
@@ -825,16 +1520,24 @@ class DownloadAgent:
             
             logger.info(f"Downloading all files (including originals) using huggingface_hub for {repo_type}: {repo_id}")
             
-            # Use snapshot_download to get all files including originals
-            # This downloads everything: original files + auto-converted Parquet
-            downloaded_path = snapshot_download(
-                repo_id=repo_id,
-                repo_type=repo_type,  # "dataset" or "model"
-                local_dir=str(save_path),
-                local_dir_use_symlinks=False,  # Copy files, don't symlink
-                # Download all files including originals
-                ignore_patterns=None  # Don't ignore any files
-            )
+            if self.blob_store:
+                # Link files out of the HuggingFace cache instead of keeping a second copy
+                snapshot_path = Path(snapshot_download(repo_id=repo_id, repo_type=repo_type))
+                for cached_file in snapshot_path.rglob("*"):
+                    if cached_file.is_file():
+                        self.blob_store.materialize(cached_file, save_path / cached_file.relative_to(snapshot_path))
+                downloaded_path = save_path
+            else:
+                # Use snapshot_download to get all files including originals
+                # This downloads everything: original files + auto-converted Parquet
+                downloaded_path = snapshot_download(
+                    repo_id=repo_id,
+                    repo_type=repo_type,  # "dataset" or "model"
+                    local_dir=str(save_path),
+                    local_dir_use_symlinks=False,  # Copy files, don't symlink
+                    # Download all files including originals
+                    ignore_patterns=None  # Don't ignore any files
+                )
             
             logger.info(f"Downloaded all files to {downloaded_path}")
             
@@ -918,10 +1621,27 @@ class DownloadAgent:
         return None
     
     def _download_with_llm(self, dataset: Dict[str, Any]) -> Optional[Path]:
-        """Use LLM to generate download code for actual data files (not HTML pages)"""
+        """Use LLM to generate download code for actual data files (not HTML pages)
+        
+        Scripts that worked before for the same host are run first; new
+        scripts are kept if they produce data and blacklisted if they fail.
+        Generation bypasses the LLM response cache and lists the host's
+        failed scripts, so a failure is followed by different code.
+        """
         source = dataset.get("source", "")
         source_lower = source.lower() if isinstance(source, str) else str(source).lower()
         name = dataset.get("name", "dataset")
+        source_url = source if isinstance(source, str) else (source.get("url", "") if isinstance(source, dict) else "")
+        store = self.script_store if source_url.startswith("http") else None
+        
+        if store:
+            for sid, code in store.candidates(source_url):
+                logger.info(f"Reusing download script {sid} stored for {host_key(source_url)}")
+                result_path, error = self._run_download_script(code, dataset, source_url)
+                if result_path:
+                    store.record_success(source_url, code)
+                    return result_path
+                store.record_failure(source_url, code, error)
         
         # Provide source-specific guidance
         source_guidance = ""
@@ -1028,9 +1748,13 @@ CRITICAL: The source URL might be an HTML page. You MUST:
 2. Use appropriate APIs or libraries to access the real data
 3. DO NOT download HTML pages - download actual data files
 
+The variables SOURCE_URL (the source URL), DATASET_NAME (the dataset name) and OUTPUT_DIR
+(a pathlib.Path, {self.downloads_dir}) are already defined. Use them instead of literal
+values so the same code can download other datasets from this site.
+
 The code should:
 1. Download ACTUAL DATA FILES (not HTML) from the source
-2. Save to: {self.downloads_dir}
+2. Save under OUTPUT_DIR
 3. Handle authentication if needed (check environment variables)
 4. Extract compressed files (.zip, .tar.gz) if necessary
 5. Return the path to downloaded data as 'result_path'
@@ -1053,35 +1777,80 @@ IMPORTANT:
 Return only executable Python code, no explanations.
 """
         
-        from langchain_core.messages import SystemMessage, HumanMessage
+        failures = store.failures(source_url) if store else []
+        if failures:
+            notes = "\n".join(f"- script {sid}: {error}" for sid, error in failures)
+            prompt += f"""
+These download scripts already failed for this site; use a different approach:
+{notes}
+"""
+        
+        from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
         
         messages = [
             SystemMessage(content="You are a geospatial data download expert. Generate executable Python code."),
             HumanMessage(content=prompt)
         ]
         
-        response = self.llm.invoke(messages)
-        code = response.content
+        # Ask again once if the model returns a script that already failed
+        for attempt in range(2):
+            response = uncached(self.llm).invoke(messages)
+            code = response.content
+            
+            # Extract code block if present
+            code_match = re.search(r'```python\n(.*?)\n```', code, re.DOTALL)
+            if code_match:
+                code = code_match.group(1)
+            
+            if not (store and store.is_known_failure(source_url, code)):
+                break
+            sid = script_id(code)
+            logger.warning(f"Generated download script {sid} already failed for {host_key(source_url)}")
+            if attempt:
+                return None
+            messages += [
+                AIMessage(content=response.content),
+                HumanMessage(content=f"This is script {sid}, which already failed for this site. Write a different script.")
+            ]
         
-        # Extract code block if present
-        code_match = re.search(r'```python\n(.*?)\n```', code, re.DOTALL)
-        if code_match:
-            code = code_match.group(1)
+        result_path, error = self._run_download_script(code, dataset, source_url)
+        if store:
+            if result_path:
+                store.record_success(source_url, code)
+            else:
+                store.record_failure(source_url, code, error)
+        return result_path
+    
+    def _run_download_script(self, code: str, dataset: Dict[str, Any], source_url: str) -> Tuple[Optional[Path], Optional[str]]:
+        """Execute a download script and validate that 'result_path' holds data, not HTML
         
-        # Execute code
-        try:
-            exec_globals = {
-                "requests": requests,
-                "Path": Path,
-                "self": self,
-                "logger": logger
-            }
-            exec(code, exec_globals)
-            # Assume code sets a variable 'result_path'
-            return exec_globals.get("result_path")
-        except Exception as e:
-            logger.error(f"LLM-generated download code failed: {e}")
-            return None
+        The script's size is unknown up front, so its admission only checks
+        that the quotas are not already used up.
+        
+        Returns:
+            The data path (None on failure) and the reason the script failed
+        """
+        with self._download_slot(None, f"download script for {dataset.get('name', 'dataset')}"):
+            try:
+                exec_globals = {
+                    "requests": requests,
+                    "Path": Path,
+                    "self": self,
+                    "logger": logger,
+                    "SOURCE_URL": source_url,
+                    "DATASET_NAME": dataset.get("name", "dataset"),
+                    "OUTPUT_DIR": self.downloads_dir
+                }
+                exec(code, exec_globals)
+                # Assume code sets a variable 'result_path'
+                result_path = exec_globals.get("result_path")
+                if not result_path:
+                    return None, "did not set result_path"
+                path = validate_download(result_path)
+                return path, None if path else f"produced no data at {result_path} (missing, empty or HTML only)"
+            except Exception as e:
+                logger.error(f"LLM-generated download code failed: {e}")
+                return None, f"{type(e).__name__}: {e}"
     
     def _determine_downloads_with_llm(
         self,
@@ -7,20 +7,34 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 import json
-import re
 
 from langchain_core.language_models import BaseChatModel
 
+from geospatial_agents.utils.code_cache import CodeCache, GeneratedCodeMixin, code_messages
+from geospatial_agents.sandbox import SandboxPool
+
 logger = logging.getLogger(__name__)
 
 
-class ExportAgent:
+class ExportAgent(GeneratedCodeMixin):
     """Agent for exporting geospatial data"""
     
+    # Globals available to generated code -> 'module' or 'module:attribute' they come from
+    EXEC_MODULES = {
+        "gpd": "geopandas",
+        "geopandas": "geopandas",
+        "rasterio": "rasterio",
+        "pd": "pandas",
+        "pandas": "pandas",
+        "Path": "pathlib:Path"
+    }
+    
     def __init__(
         self,
         llm: BaseChatModel,
-        work_dir: Path = None
+        work_dir: Path = None,
+        code_cache: Optional[CodeCache] = None,
+        sandbox: Optional[SandboxPool] = None
     ):
         """
         Initialize export agent
@@ -28,10 +42,14 @@ class ExportAgent:
         Args:
             llm: Language model instance
             work_dir: Working directory
+            code_cache: Cache of generated code that ran successfully
+            sandbox: Worker pool that runs generated code in isolated processes
         """
         self.llm = llm
         self.work_dir = work_dir or Path("./geospatial_data")
         self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.code_cache = code_cache
+        self.sandbox = sandbox
         self.exports_dir = self.work_dir / "exports"
         self.exports_dir.mkdir(exist_ok=True)
     
@@ -67,15 +85,52 @@ class ExportAgent:
         export_format = parameters.get("format", "geojson")
         output_name = parameters.get("name", "exported_data")
         
-        code = self._generate_export_code(
+        # Reuse code that ran successfully for the same task and input schemas
+        export_path = self._run_generated_code(
+            "export",
             task_description,
             parameters,
             data_paths,
-            export_format,
-            output_name
+            messages=lambda failed_code: self._export_code_messages(task_description, parameters, data_paths, export_format, output_name, failed_code),
+            execute=lambda code: self._execute_export(code, data_paths, export_format, output_name)
         )
         
-        export_path = self._execute_export(code, data_paths, export_format, output_name)
+        return {
+            "export_path": export_path,
+            "format": export_format
+        }
+    
+    async def aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Execute export task without blocking the event loop (see execute)"""
+        logger.info(f"Executing export: {task_description}")
+        
+        data_paths = self._get_data_paths(context)
+        
+        if not data_paths:
+            logger.warning("No data files found in context. Export requires downloaded or processed data.")
+            logger.warning("Available context keys: " + str(list(context.keys()) if context else []))
+            return {
+                "export_path": None, 
+                "error": "No data available for export. Please download or process data first."
+            }
+        
+        export_format = parameters.get("format", "geojson")
+        output_name = parameters.get("name", "exported_data")
+        
+        # Reuse code that ran successfully for the same task and input schemas
+        export_path = await self._arun_generated_code(
+            "export",
+            task_description,
+            parameters,
+            data_paths,
+            messages=lambda failed_code: self._export_code_messages(task_description, parameters, data_paths, export_format, output_name, failed_code),
+            execute=lambda code: self._execute_export(code, data_paths, export_format, output_name)
+        )
         
         return {
             "export_path": export_path,
@@ -94,15 +149,16 @@ class ExportAgent:
                         paths.append(data)
         return [Path(p) for p in paths if Path(p).exists()]
     
-    def _generate_export_code(
+    def _export_code_messages(
         self,
         task_description: str,
         parameters: Dict[str, Any],
         data_paths: list,
         export_format: str,
-        output_name: str
-    ) -> str:
-        """Generate export code using LLM"""
+        output_name: str,
+        failed_code: Optional[str] = None
+    ) -> list:
+        """Build the LLM messages for export code generation"""
         output_path = self.exports_dir / f"{output_name}.{export_format}"
         
         prompt = f"""Generate Python code to export geospatial data: "{task_description}"
@@ -132,21 +188,11 @@ Use:
 Return only executable Python code.
 """
         
-        from langchain_core.messages import SystemMessage, HumanMessage
-        
-        messages = [
-            SystemMessage(content="You are a geospatial data export expert. Generate executable Python code."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = self.llm.invoke(messages)
-        code = response.content
-        
-        code_match = re.search(r'```python\n(.*?)\n```', code, re.DOTALL)
-        if code_match:
-            code = code_match.group(1)
-        
-        return code
+        return code_messages(
+            "You are a geospatial data export expert. Generate executable Python code.",
+            prompt,
+            failed_code
+        )
     
     def _execute_export(
         self,
@@ -156,13 +202,25 @@ Return only executable Python code.
         output_name: str
     ) -> Optional[Path]:
         """Execute export code"""
+        output_path = self.exports_dir / f"{output_name}.{export_format}"
+        
+        if self.sandbox:
+            outcome = self.sandbox.run(
+                code,
+                self.EXEC_MODULES,
+                {"data_paths": data_paths, "output_path": output_path},
+                agent=self
+            )
+            if not outcome.success:
+                logger.error(f"Export execution failed: {outcome.error}")
+                return None
+            return outcome.namespace.get("result_path") or output_path
+        
         try:
             import geopandas as gpd
             import rasterio
             import pandas as pd
             
-            output_path = self.exports_dir / f"{output_name}.{export_format}"
-            
             exec_globals = {
                 "gpd": gpd,
                 "geopandas": gpd,
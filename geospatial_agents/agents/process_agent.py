@@ -7,20 +7,38 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 import json
-import re
 
 from langchain_core.language_models import BaseChatModel
 
+from geospatial_agents.utils.code_cache import CodeCache, GeneratedCodeMixin, code_messages
+from geospatial_agents.sandbox import SandboxPool
+
 logger = logging.getLogger(__name__)
 
 
-class ProcessAgent:
+class ProcessAgent(GeneratedCodeMixin):
     """Agent for geospatial data processing"""
     
+    # Globals available to generated code -> 'module' or 'module:attribute' they come from
+    EXEC_MODULES = {
+        "gpd": "geopandas",
+        "geopandas": "geopandas",
+        "rasterio": "rasterio",
+        "Point": "shapely.geometry:Point",
+        "Polygon": "shapely.geometry:Polygon",
+        "LineString": "shapely.geometry:LineString",
+        "np": "numpy",
+        "pandas": "pandas",
+        "pd": "pandas",
+        "Path": "pathlib:Path"
+    }
+    
     def __init__(
         self,
         llm: BaseChatModel,
-        work_dir: Path = None
+        work_dir: Path = None,
+        code_cache: Optional[CodeCache] = None,
+        sandbox: Optional[SandboxPool] = None
     ):
         """
         Initialize process agent
@@ -28,10 +46,14 @@ class ProcessAgent:
         Args:
             llm: Language model instance
             work_dir: Working directory
+            code_cache: Cache of generated code that ran successfully
+            sandbox: Worker pool that runs generated code in isolated processes
         """
         self.llm = llm
         self.work_dir = work_dir or Path("./geospatial_data")
         self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.code_cache = code_cache
+        self.sandbox = sandbox
     
     def execute(
         self,
@@ -57,13 +79,44 @@ class ProcessAgent:
         if not data_paths:
             return {"processed_data": None, "error": "No data available for processing"}
         
-        code = self._generate_process_code(
+        # Reuse code that ran successfully for the same task and input schemas
+        processed_path = self._run_generated_code(
+            "process",
             task_description,
             parameters,
-            data_paths
+            data_paths,
+            messages=lambda failed_code: self._process_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_process(code, data_paths)
         )
         
-        processed_path = self._execute_process(code, data_paths)
+        return {
+            "processed_data": processed_path,
+            "processing_type": parameters.get("type", "general")
+        }
+    
+    async def aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Execute processing task without blocking the event loop (see execute)"""
+        logger.info(f"Executing process: {task_description}")
+        
+        data_paths = self._get_data_paths(context)
+        
+        if not data_paths:
+            return {"processed_data": None, "error": "No data available for processing"}
+        
+        # Reuse code that ran successfully for the same task and input schemas
+        processed_path = await self._arun_generated_code(
+            "process",
+            task_description,
+            parameters,
+            data_paths,
+            messages=lambda failed_code: self._process_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_process(code, data_paths)
+        )
         
         return {
             "processed_data": processed_path,
@@ -82,13 +135,14 @@ class ProcessAgent:
                         paths.append(data)
         return [Path(p) for p in paths if Path(p).exists()]
     
-    def _generate_process_code(
+    def _process_code_messages(
         self,
         task_description: str,
         parameters: Dict[str, Any],
-        data_paths: list
-    ) -> str:
-        """Generate processing code using LLM"""
+        data_paths: list,
+        failed_code: Optional[str] = None
+    ) -> list:
+        """Build the LLM messages for processing code generation"""
         prompt = f"""Generate Python code to perform this geospatial processing: "{task_description}"
 
 Parameters: {json.dumps(parameters, indent=2)}
@@ -107,24 +161,26 @@ Use:
 Return only executable Python code.
 """
         
-        from langchain_core.messages import SystemMessage, HumanMessage
-        
-        messages = [
-            SystemMessage(content="You are a geospatial processing expert. Generate executable Python code."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = self.llm.invoke(messages)
-        code = response.content
-        
-        code_match = re.search(r'```python\n(.*?)\n```', code, re.DOTALL)
-        if code_match:
-            code = code_match.group(1)
-        
-        return code
+        return code_messages(
+            "You are a geospatial processing expert. Generate executable Python code.",
+            prompt,
+            failed_code
+        )
     
     def _execute_process(self, code: str, data_paths: list) -> Optional[Path]:
         """Execute processing code"""
+        if self.sandbox:
+            outcome = self.sandbox.run(
+                code,
+                self.EXEC_MODULES,
+                {"data_paths": data_paths},
+                agent=self
+            )
+            if not outcome.success:
+                logger.error(f"Process execution failed: {outcome.error}")
+                return None
+            return outcome.namespace.get("result_path") or outcome.namespace.get("output_path")
+        
         try:
             import geopandas as gpd
             import rasterio
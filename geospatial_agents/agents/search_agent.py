@@ -4,16 +4,63 @@ Uses Tavily and LLM to find geospatial datasets
 """
 
 import logging
+import asyncio
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 import json
 import re
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 
 from langchain_core.language_models import BaseChatModel
-from tavily import TavilyClient
+
+from geospatial_agents.events import emit, SearchResultsEvent
+from geospatial_agents.search.dataset_index import DatasetIndex
+from geospatial_agents.search.enrichment_store import EnrichmentStore
+from geospatial_agents.search.federated import FederatedSearch
+from geospatial_agents.search.providers import (
+    FunctionProvider,
+    HuggingFaceProvider,
+    SearchProvider,
+    ZenodoProvider,
+    request_timeout
+)
+from geospatial_agents.search.tavily_cache import TavilySearchCache
 
 logger = logging.getLogger(__name__)
 
+# Metadata fields the LLM adds to each search result
+ENRICHMENT_FIELDS = (
+    "spatial_coverage",
+    "temporal_coverage",
+    "coordinate_system",
+    "download_method",
+    "file_formats"
+)
+
+# JSON schema for enrichment output, keyed back to results by URL
+ENRICHMENT_SCHEMA = {
+    "title": "DatasetEnrichment",
+    "description": "Geospatial metadata for dataset search results",
+    "type": "object",
+    "properties": {
+        "datasets": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "url": {"type": "string"},
+                    **{field: {"type": "string"} for field in ENRICHMENT_FIELDS}
+                },
+                "required": ["url", *ENRICHMENT_FIELDS],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["datasets"],
+    "additionalProperties": False
+}
+
 
 class SearchAgent:
     """Agent for searching geospatial datasets"""
@@ -22,7 +69,17 @@ class SearchAgent:
         self,
         llm: BaseChatModel,
         tavily_api_key: Optional[str] = None,
-        work_dir: Path = None
+        work_dir: Path = None,
+        enrichment_batch_size: int = 5,
+        enrichment_workers: int = 4,
+        enrichment_store: Optional[EnrichmentStore] = None,
+        tavily_client: Any = None,
+        tavily_cache_ttl: Optional[float] = 3600,
+        dataset_index: Optional[DatasetIndex] = None,
+        local_min_results: int = 3,
+        search_mode: str = "single",
+        search_providers: Optional[List[SearchProvider]] = None,
+        search_deadline: float = 10.0
     ):
         """
         Initialize search agent
@@ -31,18 +88,61 @@ class SearchAgent:
             llm: Language model instance
             tavily_api_key: Tavily API key
             work_dir: Working directory
+            enrichment_batch_size: Search results per LLM enrichment call
+            enrichment_workers: Enrichment batches running at once
+            enrichment_store: Persistent per-URL enrichment cache; known URLs skip the LLM
+            tavily_client: Client to use instead of TavilyClient (any object with a compatible search())
+            tavily_cache_ttl: Seconds to reuse a Tavily response for the same query (None or 0 to disable)
+            dataset_index: Local catalog searched before Tavily/LLM; enriched results are added to it
+            local_min_results: Confident local matches needed (capped at the limit) to skip remote search
+            search_mode: 'single' searches Tavily (or the LLM without a key), 'federated' queries
+                all providers concurrently and returns once enough good results arrive
+            search_providers: Providers for federated mode (defaults to Tavily, LLM, HuggingFace and Zenodo)
+            search_deadline: Seconds federated search waits for providers
         """
         self.llm = llm
         self.work_dir = work_dir or Path("./geospatial_data")
         self.work_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize Tavily if API key provided
-        self.tavily_client = None
-        if tavily_api_key:
+        async_tavily_client = None
+        if tavily_client is None and tavily_api_key:
             try:
-                self.tavily_client = TavilyClient(api_key=tavily_api_key)
+                # Imported here so LLM-only setups don't load the Tavily SDK
+                from tavily import TavilyClient
+                tavily_client = TavilyClient(api_key=tavily_api_key)
+                try:
+                    from tavily import AsyncTavilyClient
+                    async_tavily_client = AsyncTavilyClient(api_key=tavily_api_key)
+                except ImportError:
+                    pass
             except Exception as e:
                 logger.warning(f"Failed to initialize Tavily: {e}")
+        
+        # Repeated and concurrent identical queries share one API call
+        self.tavily_client = None
+        if tavily_client is not None:
+            self.tavily_client = TavilySearchCache(
+                tavily_client,
+                async_client=async_tavily_client,
+                ttl_seconds=tavily_cache_ttl
+            )
+        
+        self.enrichment_batch_size = enrichment_batch_size
+        self.enrichment_workers = max(1, enrichment_workers)
+        self._structured_enrichment_llm = None
+        self.enrichment_store = enrichment_store
+        self.dataset_index = dataset_index
+        self.local_min_results = max(1, local_min_results)
+        
+        self.search_mode = search_mode.lower()
+        if self.search_mode not in ("single", "federated"):
+            raise ValueError(f"Unknown search mode: {search_mode}")
+        self.federated_search = None
+        if self.search_mode == "federated":
+            if search_providers is None:
+                search_providers = self._default_providers()
+            self.federated_search = FederatedSearch(search_providers, deadline=search_deadline)
     
     def execute(
         self,
@@ -70,21 +170,103 @@ class SearchAgent:
         if limit != 5:
             logger.info(f"Using custom limit: {limit} (requested by user)")
         
-        # Use Tavily for web search
-        if self.tavily_client:
-            results = self._search_with_tavily(query, limit)
-        else:
-            # Fallback to LLM-based search
-            results = self._search_with_llm(query, limit)
+        # Answer from the local dataset index when it has enough confident matches
+        results = self._search_local(query, limit)
+        if results is None:
+            results = self._search_remote(query, limit)
+        
+        # Stream raw results before the slower enhancement call
+        emit(SearchResultsEvent(results=list(results), partial=True))
         
         # Enhance results with LLM for geospatial context
         enhanced_results = self._enhance_results_with_llm(results, query, data_type)
+        self._index_results(enhanced_results)
         
         return {
             "results": enhanced_results,
             "count": len(enhanced_results)
         }
     
+    async def aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Execute search task without blocking the event loop (see execute)"""
+        logger.info(f"Executing search: {task_description}")
+        
+        query = parameters.get("query", task_description)
+        data_type = parameters.get("data_type", "auto")
+        limit = parameters.get("limit", 5)
+        
+        results = self._search_local(query, limit)
+        if results is None:
+            results = await self._asearch_remote(query, limit)
+        
+        emit(SearchResultsEvent(results=list(results), partial=True))
+        
+        enhanced_results = await self._aenhance_results_with_llm(results, query, data_type)
+        self._index_results(enhanced_results)
+        
+        return {
+            "results": enhanced_results,
+            "count": len(enhanced_results)
+        }
+    
+    def _search_local(self, query: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """Search the local dataset index, returning None on a miss"""
+        if not self.dataset_index:
+            return None
+        try:
+            results = self.dataset_index.search(query, limit)
+        except Exception as e:
+            logger.warning(f"Local dataset index search failed: {e}")
+            return None
+        if len(results) < min(limit, self.local_min_results):
+            logger.info(f"Local dataset index had {len(results)} match(es), searching remotely")
+            return None
+        logger.info(f"Answered search from local dataset index ({len(results)} results)")
+        return results
+    
+    def _index_results(self, results: List[Dict[str, Any]]) -> None:
+        """Add enriched results to the local dataset index"""
+        if not self.dataset_index or not results:
+            return
+        try:
+            self.dataset_index.add_many(results)
+        except Exception as e:
+            logger.warning(f"Failed to index search results: {e}")
+    
+    def _search_remote(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Search the configured remote backends"""
+        if self.federated_search:
+            return self.federated_search.search(query, limit)
+        # Use Tavily for web search
+        if self.tavily_client:
+            return self._search_with_tavily(query, limit)
+        # Fallback to LLM-based search
+        return self._search_with_llm(query, limit)
+    
+    async def _asearch_remote(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Search the configured remote backends without blocking the event loop"""
+        if self.federated_search:
+            return await self.federated_search.asearch(query, limit)
+        if self.tavily_client:
+            return await self._asearch_with_tavily(query, limit)
+        return await self._asearch_with_llm(query, limit)
+    
+    def _default_providers(self) -> List[SearchProvider]:
+        """Providers queried in federated mode when none are given"""
+        providers = []
+        if self.tavily_client:
+            providers.append(FunctionProvider("tavily", self._search_with_tavily, self._asearch_with_tavily))
+        # LLM suggestions are unverified, so they only fill in when better results are missing
+        providers.append(FunctionProvider("llm", self._search_with_llm, self._asearch_with_llm, default_score=0.4))
+        providers.append(HuggingFaceProvider())
+        providers.append(ZenodoProvider())
+        return providers
+    
     def _search_with_tavily(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search using Tavily API"""
         try:
@@ -94,27 +276,59 @@ class SearchAgent:
             response = self.tavily_client.search(
                 query=geospatial_query,
                 search_depth="advanced",
-                max_results=limit
+                max_results=limit,
+                # Ends with the federated search's deadline when it runs as a provider
+                timeout=request_timeout(None)
             )
             
-            results = []
-            for item in response.get("results", [])[:limit]:
-                url = item.get("url", "")
-                # Keep source as simple string URL for compatibility
-                results.append({
-                    "name": item.get("title", "Unknown"),
-                    "description": item.get("content", "")[:200],
-                    "source": url,  # Keep as string, not dict
-                    "score": item.get("score", 0.0)
-                })
+            return self._parse_tavily_response(response, limit)
+        except Exception as e:
+            logger.error(f"Tavily search error: {e}")
+            return []
+    
+    async def _asearch_with_tavily(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Search using Tavily without blocking the event loop"""
+        try:
+            geospatial_query = f"{query} geospatial data dataset download"
+            
+            response = await self.tavily_client.asearch(
+                query=geospatial_query,
+                search_depth="advanced",
+                max_results=limit
+            )
             
-            return results
+            return self._parse_tavily_response(response, limit)
         except Exception as e:
             logger.error(f"Tavily search error: {e}")
             return []
     
+    def _parse_tavily_response(self, response: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Convert a Tavily response into search results"""
+        results = []
+        for item in response.get("results", [])[:limit]:
+            url = item.get("url", "")
+            # Keep source as simple string URL for compatibility
+            results.append({
+                "name": item.get("title", "Unknown"),
+                "description": item.get("content", "")[:200],
+                "source": url,  # Keep as string, not dict
+                "score": item.get("score", 0.0)
+            })
+        
+        return results
+    
     def _search_with_llm(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search using LLM knowledge"""
+        response = self.llm.invoke(self._llm_search_messages(query, limit))
+        return self._parse_llm_search(response.content, limit)
+    
+    async def _asearch_with_llm(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Search using LLM knowledge without blocking the event loop"""
+        response = await self.llm.ainvoke(self._llm_search_messages(query, limit))
+        return self._parse_llm_search(response.content, limit)
+    
+    def _llm_search_messages(self, query: str, limit: int) -> list:
+        """Build the LLM messages for knowledge-based search"""
         prompt = f"""
             Find {limit} geospatial datasets related to: "{query}"
             Focus on these major geospatial databases:
@@ -144,15 +358,13 @@ class SearchAgent:
         
         from langchain_core.messages import SystemMessage, HumanMessage
         
-        messages = [
+        return [
             SystemMessage(content="You are an expert in geospatial data sources. Return results in JSON format."),
             HumanMessage(content=prompt)
         ]
-        
-        response = self.llm.invoke(messages)
-        text = response.content
-        
-        # Parse JSON response
+    
+    def _parse_llm_search(self, text: str, limit: int) -> List[Dict[str, Any]]:
+        """Parse the JSON array of datasets from an LLM search response"""
         try:
             json_match = re.search(r'\[.*?\]', text, re.DOTALL)
             if json_match:
@@ -168,54 +380,223 @@ class SearchAgent:
         query: str,
         data_type: str
     ) -> List[Dict[str, Any]]:
-        """Enhance search results with geospatial metadata using LLM"""
+        """Enhance search results with geospatial metadata using LLM
+        
+        Results are enriched in fixed-size batches that run in parallel. Each
+        batch returns structured output keyed by result URL, so a failed or
+        truncated batch only leaves its own results unenriched.
+        """
+        if not results:
+            return results
+        
+        pending = self._apply_stored_enrichments(results)
+        if not pending:
+            return results
+        
+        batches = self._enrichment_batches(pending)
+        with ThreadPoolExecutor(max_workers=min(self.enrichment_workers, len(batches))) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._enrich_batch, batch, query)
+                for batch in batches
+            ]
+            enrichments = [future.result() for future in futures]
+        
+        self._apply_enrichments(pending, enrichments)
+        return results
+    
+    async def _aenhance_results_with_llm(
+        self,
+        results: List[Dict[str, Any]],
+        query: str,
+        data_type: str
+    ) -> List[Dict[str, Any]]:
+        """Enhance search results using LLM without blocking the event loop"""
         if not results:
             return results
         
-        prompt = f"""Enhance these geospatial dataset search results for query: "{query}"
+        pending = self._apply_stored_enrichments(results)
+        if not pending:
+            return results
+        
+        semaphore = asyncio.Semaphore(self.enrichment_workers)
+        
+        async def enrich(batch):
+            async with semaphore:
+                return await self._aenrich_batch(batch, query)
+        
+        batches = self._enrichment_batches(pending)
+        enrichments = await asyncio.gather(*(enrich(batch) for batch in batches))
+        self._apply_enrichments(pending, enrichments)
+        return results
+    
+    def _result_key(self, result: Dict[str, Any]) -> str:
+        """Key a result by its URL (falling back to its name) for enrichment"""
+        source = result.get("source", "")
+        if isinstance(source, dict):
+            source = source.get("url", "") or str(source)
+        return source or result.get("name", "")
+    
+    def _apply_stored_enrichments(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill in enrichment from the store, returning the results that still need the LLM"""
+        for result in results:
+            if isinstance(result.get("source"), dict):
+                source_dict = result["source"]
+                result["source"] = source_dict.get("url", str(source_dict))
+        
+        # Results from the local index may already carry every field
+        results = [r for r in results if not all(r.get(field) for field in ENRICHMENT_FIELDS)]
+        if not self.enrichment_store or not results:
+            return results
+        
+        urls = [self._result_key(r) for r in results if self._is_url(self._result_key(r))]
+        stored = self.enrichment_store.get_many(urls)
+        pending = []
+        for result in results:
+            fields = stored.get(self._result_key(result))
+            if fields:
+                result.update(fields)
+            else:
+                pending.append(result)
+        
+        if stored:
+            logger.info(f"Reused stored enrichment for {len(results) - len(pending)}/{len(results)} results")
+        return pending
+    
+    def _is_url(self, key: str) -> bool:
+        return key.startswith(("http://", "https://"))
+    
+    def _enrichment_batches(self, results: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split results into fixed-size enrichment batches"""
+        size = max(1, self.enrichment_batch_size)
+        return [results[i:i + size] for i in range(0, len(results), size)]
+    
+    def _structured_llm(self) -> Any:
+        """LLM bound to the enrichment schema, or None if the model can't do structured output"""
+        if self._structured_enrichment_llm is None:
+            try:
+                self._structured_enrichment_llm = self.llm.with_structured_output(ENRICHMENT_SCHEMA)
+            except Exception as e:
+                logger.debug(f"Structured output unavailable, parsing JSON from text: {e}")
+                self._structured_enrichment_llm = False
+        return self._structured_enrichment_llm or None
+    
+    def _enrich_batch(self, batch: List[Dict[str, Any]], query: str) -> Dict[str, Dict[str, str]]:
+        """Enrich one batch, returning fields keyed by result URL ({} on failure)"""
+        try:
+            messages = self._enhance_messages(batch, query)
+            payload = None
+            structured = self._structured_llm()
+            if structured is not None:
+                try:
+                    payload = structured.invoke(messages)
+                except Exception as e:
+                    logger.debug(f"Structured enrichment failed, retrying as JSON text: {e}")
+            if payload is None:
+                payload = self._parse_enrichment(self.llm.invoke(messages).content)
+            return self._validate_enrichment(payload, batch)
+        except Exception as e:
+            logger.warning(f"Failed to enhance batch of {len(batch)} result(s): {e}")
+            return {}
+    
+    async def _aenrich_batch(self, batch: List[Dict[str, Any]], query: str) -> Dict[str, Dict[str, str]]:
+        """Enrich one batch without blocking the event loop"""
+        try:
+            messages = self._enhance_messages(batch, query)
+            payload = None
+            structured = self._structured_llm()
+            if structured is not None:
+                try:
+                    payload = await structured.ainvoke(messages)
+                except Exception as e:
+                    logger.debug(f"Structured enrichment failed, retrying as JSON text: {e}")
+            if payload is None:
+                response = await self.llm.ainvoke(messages)
+                payload = self._parse_enrichment(response.content)
+            return self._validate_enrichment(payload, batch)
+        except Exception as e:
+            logger.warning(f"Failed to enhance batch of {len(batch)} result(s): {e}")
+            return {}
+    
+    def _enhance_messages(self, results: List[Dict[str, Any]], query: str) -> list:
+        """Build the LLM messages for enriching one batch of results"""
+        datasets = [
+            {
+                "url": self._result_key(result),
+                "name": result.get("name", ""),
+                "description": result.get("description", "")
+            }
+            for result in results
+        ]
+        prompt = f"""Add geospatial metadata to these dataset search results for query: "{query}"
             Results:
-            {json.dumps(results, indent=4)}
+            {json.dumps(datasets, indent=4)}
 
-            For each result, add/update:
+            For each result, provide:
             - spatial_coverage: Geographic area covered (e.g., "California, USA", "Global")
             - temporal_coverage: Time period (e.g., "2020-2024", "Monthly")
             - coordinate_system: CRS if known (e.g., "WGS84", "UTM Zone 10N")
             - download_method: How to access (e.g., "API", "Direct download", "HuggingFace")
             - file_formats: Expected formats (e.g., "GeoTIFF", "Shapefile", "GeoJSON")
 
-            Return enhanced JSON array.
+            Copy each result's "url" unchanged. Return a JSON object matching this schema:
+            {json.dumps(ENRICHMENT_SCHEMA)}
         """
         
         from langchain_core.messages import SystemMessage, HumanMessage
         
-        messages = [
+        return [
             SystemMessage(content="You are a geospatial data expert. Enhance results with spatial metadata."),
             HumanMessage(content=prompt)
         ]
+    
+    def _parse_enrichment(self, text: str) -> Dict[str, Any]:
+        """Parse the JSON object from a free-text enrichment response"""
+        json_match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not json_match:
+            raise ValueError("No JSON object in enrichment response")
+        return json.loads(json_match.group(0))
+    
+    def _validate_enrichment(
+        self,
+        payload: Any,
+        batch: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, str]]:
+        """Keep schema fields for URLs that belong to the batch"""
+        if not isinstance(payload, dict) or not isinstance(payload.get("datasets"), list):
+            raise ValueError("Enrichment response does not match the schema")
+        
+        batch_keys = {self._result_key(result) for result in batch}
+        enriched = {}
+        for item in payload["datasets"]:
+            if not isinstance(item, dict) or item.get("url") not in batch_keys:
+                continue
+            fields = {}
+            for field in ENRICHMENT_FIELDS:
+                value = item.get(field)
+                if isinstance(value, list):
+                    value = ", ".join(str(v) for v in value)
+                if isinstance(value, str) and value:
+                    fields[field] = value
+            enriched[item["url"]] = fields
+        return enriched
+    
+    def _apply_enrichments(
+        self,
+        results: List[Dict[str, Any]],
+        enrichments: List[Dict[str, Dict[str, str]]]
+    ) -> List[Dict[str, Any]]:
+        """Merge enrichment fields into the results by URL"""
+        merged = {}
+        for enrichment in enrichments:
+            merged.update(enrichment)
         
-        response = self.llm.invoke(messages)
-        text = response.content
+        for result in results:
+            fields = merged.get(self._result_key(result))
+            if fields:
+                result.update(fields)
         
-        try:
-            json_match = re.search(r'\[.*?\]', text, re.DOTALL)
-            if json_match:
-                enhanced = json.loads(json_match.group(0))
-                # Merge with original results, but preserve source as string
-                for i, result in enumerate(enhanced):
-                    if i < len(results):
-                        # If enhanced result has source as dict, extract URL
-                        if isinstance(result.get("source"), dict):
-                            source_dict = result.get("source", {})
-                            source_url = source_dict.get("url", "")
-                            if source_url:
-                                result["source"] = source_url
-                        # Update other fields
-                        results[i].update(result)
-                        # Ensure source is always a string
-                        if isinstance(results[i].get("source"), dict):
-                            source_dict = results[i].get("source", {})
-                            results[i]["source"] = source_dict.get("url", str(source_dict))
-        except Exception as e:
-            logger.warning(f"Failed to enhance results: {e}")
+        if self.enrichment_store:
+            self.enrichment_store.put_many({key: fields for key, fields in merged.items() if self._is_url(key)})
         
+        logger.info(f"Enriched {sum(1 for r in results if self._result_key(r) in merged)}/{len(results)} results")
         return results
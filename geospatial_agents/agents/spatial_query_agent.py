@@ -7,20 +7,36 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 import json
-import re
 
 from langchain_core.language_models import BaseChatModel
 
+from geospatial_agents.utils.code_cache import CodeCache, GeneratedCodeMixin, code_messages
+from geospatial_agents.sandbox import SandboxPool
+
 logger = logging.getLogger(__name__)
 
 
-class SpatialQueryAgent:
+class SpatialQueryAgent(GeneratedCodeMixin):
     """Agent for spatial queries and filtering"""
     
+    # Globals available to generated code -> 'module' or 'module:attribute' they come from
+    EXEC_MODULES = {
+        "gpd": "geopandas",
+        "geopandas": "geopandas",
+        "rasterio": "rasterio",
+        "box": "shapely.geometry:box",
+        "Point": "shapely.geometry:Point",
+        "Polygon": "shapely.geometry:Polygon",
+        "pyproj": "pyproj",
+        "Path": "pathlib:Path"
+    }
+    
     def __init__(
         self,
         llm: BaseChatModel,
-        work_dir: Path = None
+        work_dir: Path = None,
+        code_cache: Optional[CodeCache] = None,
+        sandbox: Optional[SandboxPool] = None
     ):
         """
         Initialize spatial query agent
@@ -28,10 +44,14 @@ class SpatialQueryAgent:
         Args:
             llm: Language model instance
             work_dir: Working directory
+            code_cache: Cache of generated code that ran successfully
+            sandbox: Worker pool that runs generated code in isolated processes
         """
         self.llm = llm
         self.work_dir = work_dir or Path("./geospatial_data")
         self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.code_cache = code_cache
+        self.sandbox = sandbox
     
     def execute(
         self,
@@ -58,15 +78,45 @@ class SpatialQueryAgent:
         if not data_paths:
             return {"filtered_data": None, "error": "No data available for spatial query"}
         
-        # Use LLM to generate spatial query code
-        code = self._generate_spatial_query_code(
+        # Reuse code that ran successfully for the same task and input schemas
+        filtered_data = self._run_generated_code(
+            "spatial_query",
             task_description,
             parameters,
-            data_paths
+            data_paths,
+            messages=lambda failed_code: self._spatial_query_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_spatial_query(code, data_paths)
         )
         
-        # Execute spatial query
-        filtered_data = self._execute_spatial_query(code, data_paths)
+        return {
+            "filtered_data": filtered_data,
+            "query_description": task_description
+        }
+    
+    async def aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Execute spatial query task without blocking the event loop (see execute)"""
+        logger.info(f"Executing spatial query: {task_description}")
+        
+        # Get data to query from context
+        data_paths = self._get_data_paths(context)
+        
+        if not data_paths:
+            return {"filtered_data": None, "error": "No data available for spatial query"}
+        
+        # Reuse code that ran successfully for the same task and input schemas
+        filtered_data = await self._arun_generated_code(
+            "spatial_query",
+            task_description,
+            parameters,
+            data_paths,
+            messages=lambda failed_code: self._spatial_query_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_spatial_query(code, data_paths)
+        )
         
         return {
             "filtered_data": filtered_data,
@@ -90,13 +140,14 @@ class SpatialQueryAgent:
         
         return [Path(p) for p in paths if Path(p).exists()]
     
-    def _generate_spatial_query_code(
+    def _spatial_query_code_messages(
         self,
         task_description: str,
         parameters: Dict[str, Any],
-        data_paths: list
-    ) -> str:
-        """Generate spatial query code using LLM"""
+        data_paths: list,
+        failed_code: Optional[str] = None
+    ) -> list:
+        """Build the LLM messages for spatial query code generation"""
         prompt = f"""Generate Python code to perform this spatial query: "{task_description}"
 
 Parameters: {json.dumps(parameters, indent=2)}
@@ -117,25 +168,26 @@ Use appropriate libraries:
 Return only executable Python code, no explanations.
 """
         
-        from langchain_core.messages import SystemMessage, HumanMessage
-        
-        messages = [
-            SystemMessage(content="You are a geospatial analysis expert. Generate executable Python code for spatial operations."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = self.llm.invoke(messages)
-        code = response.content
-        
-        # Extract code block
-        code_match = re.search(r'```python\n(.*?)\n```', code, re.DOTALL)
-        if code_match:
-            code = code_match.group(1)
-        
-        return code
+        return code_messages(
+            "You are a geospatial analysis expert. Generate executable Python code for spatial operations.",
+            prompt,
+            failed_code
+        )
     
     def _execute_spatial_query(self, code: str, data_paths: list) -> Optional[Path]:
         """Execute spatial query code"""
+        if self.sandbox:
+            outcome = self.sandbox.run(
+                code,
+                self.EXEC_MODULES,
+                {"data_paths": data_paths},
+                agent=self
+            )
+            if not outcome.success:
+                logger.error(f"Spatial query execution failed: {outcome.error}")
+                return None
+            return outcome.namespace.get("result_path") or outcome.namespace.get("output_path")
+        
         try:
             import geopandas as gpd
             import rasterio
@@ -7,20 +7,35 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 import json
-import re
 
 from langchain_core.language_models import BaseChatModel
 
+from geospatial_agents.utils.code_cache import CodeCache, GeneratedCodeMixin, code_messages
+from geospatial_agents.sandbox import SandboxPool
+
 logger = logging.getLogger(__name__)
 
 
-class TransformAgent:
+class TransformAgent(GeneratedCodeMixin):
     """Agent for coordinate and format transformations"""
     
+    # Globals available to generated code -> 'module' or 'module:attribute' they come from
+    EXEC_MODULES = {
+        "gpd": "geopandas",
+        "rasterio": "rasterio",
+        "calculate_default_transform": "rasterio.warp:calculate_default_transform",
+        "reproject": "rasterio.warp:reproject",
+        "Resampling": "rasterio.warp:Resampling",
+        "pyproj": "pyproj",
+        "Path": "pathlib:Path"
+    }
+    
     def __init__(
         self,
         llm: BaseChatModel,
-        work_dir: Path = None
+        work_dir: Path = None,
+        code_cache: Optional[CodeCache] = None,
+        sandbox: Optional[SandboxPool] = None
     ):
         """
         Initialize transform agent
@@ -28,10 +43,14 @@ class TransformAgent:
         Args:
             llm: Language model instance
             work_dir: Working directory
+            code_cache: Cache of generated code that ran successfully
+            sandbox: Worker pool that runs generated code in isolated processes
         """
         self.llm = llm
         self.work_dir = work_dir or Path("./geospatial_data")
         self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.code_cache = code_cache
+        self.sandbox = sandbox
     
     def execute(
         self,
@@ -58,15 +77,45 @@ class TransformAgent:
         if not data_paths:
             return {"transformed_data": None, "error": "No data available for transformation"}
         
-        # Generate transformation code
-        code = self._generate_transform_code(
+        # Reuse code that ran successfully for the same task and input schemas
+        transformed_path = self._run_generated_code(
+            "transform",
             task_description,
             parameters,
-            data_paths
+            data_paths,
+            messages=lambda failed_code: self._transform_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_transform(code, data_paths)
         )
         
-        # Execute transformation
-        transformed_path = self._execute_transform(code, data_paths)
+        return {
+            "transformed_data": transformed_path,
+            "transformation_type": parameters.get("type", "reproject")
+        }
+    
+    async def aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Execute transformation task without blocking the event loop (see execute)"""
+        logger.info(f"Executing transform: {task_description}")
+        
+        # Get data to transform
+        data_paths = self._get_data_paths(context)
+        
+        if not data_paths:
+            return {"transformed_data": None, "error": "No data available for transformation"}
+        
+        # Reuse code that ran successfully for the same task and input schemas
+        transformed_path = await self._arun_generated_code(
+            "transform",
+            task_description,
+            parameters,
+            data_paths,
+            messages=lambda failed_code: self._transform_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_transform(code, data_paths)
+        )
         
         return {
             "transformed_data": transformed_path,
@@ -85,13 +134,14 @@ class TransformAgent:
                         paths.append(data)
         return [Path(p) for p in paths if Path(p).exists()]
     
-    def _generate_transform_code(
+    def _transform_code_messages(
         self,
         task_description: str,
         parameters: Dict[str, Any],
-        data_paths: list
-    ) -> str:
-        """Generate transformation code using LLM"""
+        data_paths: list,
+        failed_code: Optional[str] = None
+    ) -> list:
+        """Build the LLM messages for transformation code generation"""
         prompt = f"""Generate Python code to perform this transformation: "{task_description}"
 
 Parameters: {json.dumps(parameters, indent=2)}
@@ -110,24 +160,26 @@ Use:
 Return only executable Python code.
 """
         
-        from langchain_core.messages import SystemMessage, HumanMessage
-        
-        messages = [
-            SystemMessage(content="You are a geospatial transformation expert. Generate executable Python code."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = self.llm.invoke(messages)
-        code = response.content
-        
-        code_match = re.search(r'```python\n(.*?)\n```', code, re.DOTALL)
-        if code_match:
-            code = code_match.group(1)
-        
-        return code
+        return code_messages(
+            "You are a geospatial transformation expert. Generate executable Python code.",
+            prompt,
+            failed_code
+        )
     
     def _execute_transform(self, code: str, data_paths: list) -> Optional[Path]:
         """Execute transformation code"""
+        if self.sandbox:
+            outcome = self.sandbox.run(
+                code,
+                self.EXEC_MODULES,
+                {"data_paths": data_paths},
+                agent=self
+            )
+            if not outcome.success:
+                logger.error(f"Transform execution failed: {outcome.error}")
+                return None
+            return outcome.namespace.get("result_path") or outcome.namespace.get("output_path")
+        
         try:
             import geopandas as gpd
             import rasterio
@@ -7,20 +7,34 @@ import logging
 from typing import Dict, Any, Optional
 from pathlib import Path
 import json
-import re
 
 from langchain_core.language_models import BaseChatModel
 
+from geospatial_agents.utils.code_cache import CodeCache, GeneratedCodeMixin, code_messages
+from geospatial_agents.sandbox import SandboxPool
+
 logger = logging.getLogger(__name__)
 
 
-class VisualizationAgent:
+class VisualizationAgent(GeneratedCodeMixin):
     """Agent for creating geospatial visualizations"""
     
+    # Globals available to generated code -> 'module' or 'module:attribute' they come from
+    EXEC_MODULES = {
+        "gpd": "geopandas",
+        "folium": "folium",
+        "plt": "matplotlib.pyplot",
+        "matplotlib": "matplotlib",
+        "contextily": "contextily",
+        "Path": "pathlib:Path"
+    }
+    
     def __init__(
         self,
         llm: BaseChatModel,
-        work_dir: Path = None
+        work_dir: Path = None,
+        code_cache: Optional[CodeCache] = None,
+        sandbox: Optional[SandboxPool] = None
     ):
         """
         Initialize visualization agent
@@ -28,10 +42,14 @@ class VisualizationAgent:
         Args:
             llm: Language model instance
             work_dir: Working directory
+            code_cache: Cache of generated code that ran successfully
+            sandbox: Worker pool that runs generated code in isolated processes
         """
         self.llm = llm
         self.work_dir = work_dir or Path("./geospatial_data")
         self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.code_cache = code_cache
+        self.sandbox = sandbox
         self.viz_dir = self.work_dir / "visualizations"
         self.viz_dir.mkdir(exist_ok=True)
     
@@ -64,13 +82,49 @@ class VisualizationAgent:
                 "error": "No data available for visualization. Please download or process data first."
             }
         
-        code = self._generate_visualization_code(
+        # Reuse code that ran successfully for the same task and input schemas
+        viz_path = self._run_generated_code(
+            "visualization",
             task_description,
             parameters,
-            data_paths
+            data_paths,
+            messages=lambda failed_code: self._visualization_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_visualization(code, data_paths)
         )
         
-        viz_path = self._execute_visualization(code, data_paths)
+        return {
+            "visualization_path": viz_path,
+            "visualization_type": parameters.get("type", "map")
+        }
+    
+    async def aexecute(
+        self,
+        task_description: str,
+        parameters: Dict[str, Any],
+        context: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Execute visualization task without blocking the event loop (see execute)"""
+        logger.info(f"Executing visualization: {task_description}")
+        
+        data_paths = self._get_data_paths(context)
+        
+        if not data_paths:
+            logger.warning("No data files found in context. Visualization requires downloaded or processed data.")
+            logger.warning("Available context keys: " + str(list(context.keys()) if context else []))
+            return {
+                "visualization_path": None, 
+                "error": "No data available for visualization. Please download or process data first."
+            }
+        
+        # Reuse code that ran successfully for the same task and input schemas
+        viz_path = await self._arun_generated_code(
+            "visualization",
+            task_description,
+            parameters,
+            data_paths,
+            messages=lambda failed_code: self._visualization_code_messages(task_description, parameters, data_paths, failed_code),
+            execute=lambda code: self._execute_visualization(code, data_paths)
+        )
         
         return {
             "visualization_path": viz_path,
@@ -89,13 +143,14 @@ class VisualizationAgent:
                         paths.append(data)
         return [Path(p) for p in paths if Path(p).exists()]
     
-    def _generate_visualization_code(
+    def _visualization_code_messages(
         self,
         task_description: str,
         parameters: Dict[str, Any],
-        data_paths: list
-    ) -> str:
-        """Generate visualization code using LLM"""
+        data_paths: list,
+        failed_code: Optional[str] = None
+    ) -> list:
+        """Build the LLM messages for visualization code generation"""
         prompt = f"""Generate Python code to create this visualization: "{task_description}"
 
 Parameters: {json.dumps(parameters, indent=2)}
@@ -114,24 +169,26 @@ Use:
 Return only executable Python code.
 """
         
-        from langchain_core.messages import SystemMessage, HumanMessage
-        
-        messages = [
-            SystemMessage(content="You are a geospatial visualization expert. Generate executable Python code."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = self.llm.invoke(messages)
-        code = response.content
-        
-        code_match = re.search(r'```python\n(.*?)\n```', code, re.DOTALL)
-        if code_match:
-            code = code_match.group(1)
-        
-        return code
+        return code_messages(
+            "You are a geospatial visualization expert. Generate executable Python code.",
+            prompt,
+            failed_code
+        )
     
     def _execute_visualization(self, code: str, data_paths: list) -> Optional[Path]:
         """Execute visualization code"""
+        if self.sandbox:
+            outcome = self.sandbox.run(
+                code,
+                self.EXEC_MODULES,
+                {"data_paths": data_paths},
+                agent=self
+            )
+            if not outcome.success:
+                logger.error(f"Visualization execution failed: {outcome.error}")
+                return None
+            return outcome.namespace.get("viz_path") or outcome.namespace.get("output_path")
+        
         try:
             import geopandas as gpd
             import folium
@@ -0,0 +1,97 @@
+"""
+Startup benchmark for GEOAGENT
+Measures cold-start time and which heavy modules get imported, each stage in a fresh interpreter
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Modules a search-only request should not have to import
+HEAVY_MODULES = [
+    "langchain_openai",
+    "langchain_anthropic",
+    "tavily",
+    "geopandas",
+    "rasterio",
+    "fiona",
+    "shapely",
+    "pyproj",
+    "matplotlib",
+    "folium",
+    "sklearn",
+    "huggingface_hub",
+    "httpx"
+]
+
+STAGES = {
+    "import package": "import geospatial_agents",
+    "import orchestrator": "from geospatial_agents.orchestrator_langgraph import GeoOrchestratorLangGraph",
+    "construct orchestrator": (
+        "from geospatial_agents.orchestrator_langgraph import GeoOrchestratorLangGraph\n"
+        "orchestrator = GeoOrchestratorLangGraph(llm_api_key='sk-benchmark', llm_provider={provider!r},"
+        " llm_model={model!r}, work_dir={work_dir!r})"
+    ),
+    "construct + search agent": (
+        "from geospatial_agents.orchestrator_langgraph import GeoOrchestratorLangGraph\n"
+        "orchestrator = GeoOrchestratorLangGraph(llm_api_key='sk-benchmark', llm_provider={provider!r},"
+        " llm_model={model!r}, work_dir={work_dir!r})\n"
+        "orchestrator.search_agent"
+    )
+}
+
+SNIPPET = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+_start = time.perf_counter()
+{body}
+_elapsed = time.perf_counter() - _start
+print(json.dumps({{"seconds": _elapsed, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_stage(body: str, runs: int) -> dict:
+    """Run a stage in fresh interpreters and collect timings"""
+    timings = []
+    modules = []
+    for _ in range(runs):
+        code = SNIPPET.format(root=str(PROJECT_ROOT), body=body, heavy=HEAVY_MODULES)
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        modules = result["modules"]
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "modules": modules
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GEOAGENT cold-start time")
+    parser.add_argument("--provider", default="openai", choices=["openai", "anthropic"])
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per stage")
+    parser.add_argument("--work-dir", default="./geospatial_data")
+    args = parser.parse_args()
+    
+    print(f"Startup benchmark ({args.runs} runs per stage, provider={args.provider})\n")
+    for name, template in STAGES.items():
+        body = template.format(provider=args.provider, model=args.model, work_dir=args.work_dir)
+        result = run_stage(body, args.runs)
+        if "error" in result:
+            print(f"{name:<28} failed: {result['error']}")
+            continue
+        heavy = ", ".join(result["modules"]) or "none"
+        print(f"{name:<28} {result['median_ms']:8.1f} ms (min {result['min_ms']:.1f})  heavy imports: {heavy}")
+
+
+if __name__ == "__main__":
+    main()
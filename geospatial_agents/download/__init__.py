@@ -0,0 +1,58 @@
+"""
+Download infrastructure for the Download Agent
+"""
+
+from geospatial_agents.download.engine import (
+    DownloadEngine,
+    DownloadJob,
+    DownloadResult,
+    DownloadProgress,
+    verify_checksum
+)
+from geospatial_agents.download.catalog import DownloadCatalog
+from geospatial_agents.download.bandwidth import BandwidthLimiter
+from geospatial_agents.download.blob_store import BlobStore
+from geospatial_agents.download.extract import (
+    TarStreamExtractor,
+    extract_tar,
+    extract_zip,
+    is_geospatial_member
+)
+from geospatial_agents.download.github import GitHubClient, select_tree_files
+from geospatial_agents.download.preflight import Preflight, PreflightResult, sniff
+from geospatial_agents.download.adapters import (
+    AdapterContext,
+    AdapterRegistry,
+    SourceAdapter,
+    default_adapters
+)
+from geospatial_agents.download.script_store import DownloadScriptStore, validate_download
+from geospatial_agents.download.scheduler import DownloadScheduler, QuotaExceeded
+
+__all__ = [
+    "DownloadEngine",
+    "DownloadJob",
+    "DownloadResult",
+    "DownloadProgress",
+    "verify_checksum",
+    "DownloadCatalog",
+    "BandwidthLimiter",
+    "BlobStore",
+    "TarStreamExtractor",
+    "extract_tar",
+    "extract_zip",
+    "is_geospatial_member",
+    "GitHubClient",
+    "select_tree_files",
+    "Preflight",
+    "PreflightResult",
+    "sniff",
+    "AdapterContext",
+    "AdapterRegistry",
+    "SourceAdapter",
+    "default_adapters",
+    "DownloadScriptStore",
+    "validate_download",
+    "DownloadScheduler",
+    "QuotaExceeded"
+]
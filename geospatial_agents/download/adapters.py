@@ -0,0 +1,392 @@
+"""
+Source Adapters
+Native downloaders for well-known data portals, dispatched by URL pattern
+so the LLM is only asked to write download code for unknown hosts
+"""
+
+import logging
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path, PurePosixPath
+from urllib.parse import unquote, urljoin, urlparse
+import contextvars
+import os
+import re
+
+from geospatial_agents.download.engine import DownloadEngine, DownloadJob
+from geospatial_agents.download.extract import (
+    archive_stem,
+    extract_tar,
+    extract_zip,
+    is_geospatial_member,
+    tar_stream_mode
+)
+
+logger = logging.getLogger(__name__)
+
+# File extensions that count as data when collecting links from portal pages
+DATA_LINK_EXTENSIONS = (
+    ".tif", ".tiff", ".zip", ".gz", ".bz2", ".tar", ".7z", ".nc", ".nc4", ".hdf", ".h5", ".he5",
+    ".grb", ".grib", ".grib2", ".csv", ".json", ".geojson", ".gpkg", ".shp", ".kml", ".kmz",
+    ".pbf", ".osm", ".parquet", ".las", ".laz", ".jp2", ".txt", ".dat", ".asc"
+)
+
+
+def safe_filename(name: str) -> str:
+    """Final component of a remote-supplied name ('' if it is empty or '..')"""
+    name = PurePosixPath(name.replace("\\", "/")).name
+    return "" if name in ("", ".", "..") else name
+
+
+def filename_from_url(url: str) -> str:
+    """Last path segment of a URL, unquoted ('download' if there is none)"""
+    # Unquote first: an encoded '..%2F' must not survive as a path separator
+    return safe_filename(unquote(urlparse(url).path)) or "download"
+
+
+def data_links(html: str, base_url: str, extensions: Iterable[str] = DATA_LINK_EXTENSIONS) -> List[str]:
+    """Absolute URLs of the data files an HTML page (or directory listing) links to"""
+    extensions = tuple(extensions)
+    links = []
+    for href in re.findall(r'href\s*=\s*["\']([^"\'#]+)["\']', html, re.IGNORECASE):
+        url = urljoin(base_url, href.strip())
+        if urlparse(url).path.lower().endswith(extensions) and url not in links:
+            links.append(url)
+    return links
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_")[:80] or "dataset"
+
+
+@dataclass
+class AdapterContext:
+    """What adapters download with"""
+    engine: DownloadEngine
+    downloads_dir: Path
+    extract_select: Optional[Callable[[str], bool]] = is_geospatial_member
+    max_files: int = 100  # Files fetched per dataset at most
+    # Admission around each fetch, called with (total bytes or None, label),
+    # e.g. DownloadAgent._download_slot for the disk quotas
+    slot: Optional[Callable[[Optional[int], str], ContextManager]] = None
+    
+    def get_json(self, url: str, headers: Optional[Dict[str, str]] = None) -> Any:
+        response = self.engine.get(url, headers=headers, timeout=60)
+        response.raise_for_status()
+        return response.json()
+    
+    def get_text(self, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        response = self.engine.get(url, headers=headers, timeout=60)
+        response.raise_for_status()
+        return response.text
+    
+    def content_length(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[int]:
+        """Size of a remote file from a HEAD request (None if the server does not say)"""
+        try:
+            response = self.engine.head(url, headers=headers, timeout=30)
+        except Exception as e:
+            logger.debug(f"HEAD request failed for {url}: {e}")
+            return None
+        length = response.headers.get("Content-Length", "")
+        return int(length) if response.ok and length.isdigit() else None
+    
+    def fetch(
+        self,
+        urls: Iterable[str],
+        dest_dir: Path,
+        headers: Optional[Dict[str, str]] = None,
+        filenames: Optional[List[str]] = None
+    ) -> List[Path]:
+        """Download files concurrently into dest_dir and extract archives among them
+        
+        With a slot, the files' total size is looked up with HEAD requests
+        first and the download and extraction run inside the admission.
+        """
+        urls = list(urls)
+        if len(urls) > self.max_files:
+            logger.warning(f"Limiting download to the first {self.max_files} of {len(urls)} files")
+            urls = urls[:self.max_files]
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        root = dest_dir.resolve()
+        jobs = []
+        for i, url in enumerate(urls):
+            filename = (safe_filename(filenames[i]) if filenames else "") or filename_from_url(url)
+            dest = dest_dir / filename
+            if dest.resolve().parent != root:
+                logger.warning(f"Skipping {url}: {filename!r} would be written outside {dest_dir}")
+                continue
+            jobs.append(DownloadJob(url=url, dest=dest, headers=dict(headers or {})))
+        
+        admission = nullcontext()
+        if self.slot is not None and jobs:
+            with ThreadPoolExecutor(max_workers=min(self.engine.max_workers, len(jobs))) as pool:
+                sizes = list(pool.map(
+                    lambda job: contextvars.copy_context().run(self.content_length, job.url, job.headers or None),
+                    jobs
+                ))
+            admission = self.slot(sum(size or 0 for size in sizes), dest_dir.name)
+        
+        with admission:
+            results = self.engine.fetch_many(jobs)
+            paths = [result.path for result in results if result.success]
+            for path in paths:
+                try:
+                    if path.name.lower().endswith(".zip"):
+                        extract_zip(path, dest_dir / archive_stem(path.name), self.extract_select, self.engine.max_workers)
+                    elif tar_stream_mode(path.name):
+                        extract_tar(path, dest_dir / archive_stem(path.name), self.extract_select)
+                except Exception as e:
+                    logger.warning(f"Could not extract {path.name}: {e}")
+        return paths
+
+
+class SourceAdapter:
+    """Native downloader for one data portal
+    
+    Subclasses set name and patterns (regular expressions searched in the
+    URL) and implement download(). Patterns should only match the URL forms
+    the adapter understands, typically landing pages and API endpoints;
+    direct file links are handled by the generic URL download.
+    """
+    
+    name = "source"
+    patterns: Tuple[str, ...] = ()
+    
+    def match(self, url: str) -> Optional[re.Match]:
+        for pattern in self.patterns:
+            found = re.search(pattern, url, re.IGNORECASE)
+            if found:
+                return found
+        return None
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        """
+        Download the dataset behind url
+        
+        Returns:
+            Path to the downloaded data, or None on failure
+        """
+        raise NotImplementedError
+    
+    def target_dir(self, context: AdapterContext, key: str) -> Path:
+        return context.downloads_dir / f"{self.name}_{_slug(key)}"
+
+
+class NaturalEarthAdapter(SourceAdapter):
+    """Natural Earth vector layer pages -> zipped shapefile from the NACIS CDN"""
+    
+    name = "naturalearth"
+    patterns = (r"naturalearthdata\.com/downloads/(10|50|110)m-(cultural|physical)-vectors/(?:\1m-)?([a-z0-9-]+)",)
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        scale, theme, layer = self.match(url).groups()
+        filename = f"ne_{scale}m_{layer.replace('-', '_')}.zip"
+        file_url = f"https://naciscdn.org/naturalearth/{scale}m/{theme}/{filename}"
+        dest_dir = self.target_dir(context, filename[:-4])
+        return dest_dir if context.fetch([file_url], dest_dir) else None
+
+
+class GeofabrikAdapter(SourceAdapter):
+    """Geofabrik region pages -> latest OSM extract (.osm.pbf, or shapefiles if asked for)"""
+    
+    name = "geofabrik"
+    patterns = (r"download\.geofabrik\.de/([a-z0-9/_-]+?)(?:\.html)?/?(?:[?#].*)?$",)
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        region = self.match(url).group(1).strip("/")
+        if region == "index" or region.endswith(("-latest", "-updates")):
+            return None
+        wants_shapefile = re.search(r"\bshp\b|shapefile", name or "", re.IGNORECASE)
+        suffix = "-latest-free.shp.zip" if wants_shapefile else "-latest.osm.pbf"
+        dest_dir = self.target_dir(context, region.replace("/", "_"))
+        return dest_dir if context.fetch([f"https://download.geofabrik.de/{region}{suffix}"], dest_dir) else None
+
+
+class OpenStreetMapAdapter(SourceAdapter):
+    """openstreetmap.org node/way/relation pages -> OSM XML from the editing API"""
+    
+    name = "osm"
+    patterns = (r"openstreetmap\.org/(node|way|relation)/(\d+)",)
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        element, element_id = self.match(url).groups()
+        api_url = f"https://api.openstreetmap.org/api/0.6/{element}/{element_id}"
+        if element != "node":
+            # Include member ways and nodes so the geometry is complete
+            api_url += "/full"
+        dest_dir = self.target_dir(context, f"{element}_{element_id}")
+        paths = context.fetch([api_url], dest_dir, filenames=[f"{element}_{element_id}.osm"])
+        return dest_dir if paths else None
+
+
+class WorldPopAdapter(SourceAdapter):
+    """WorldPop REST API responses and dataset pages -> the GeoTIFF/CSV files they list"""
+    
+    name = "worldpop"
+    patterns = (
+        r"worldpop\.org/rest/data/",
+        r"worldpop\.org/geodata/(summary|listing)\?id=\d+"
+    )
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        if "/rest/data/" in url:
+            data = context.get_json(url).get("data", [])
+            records = data if isinstance(data, list) else [data]
+            files = [f for record in records for f in record.get("files", []) if isinstance(f, str)]
+        else:
+            files = [link for link in data_links(context.get_text(url), url) if "data.worldpop.org" in link]
+        if not files:
+            logger.warning(f"No WorldPop files found at {url}")
+            return None
+        dest_dir = self.target_dir(context, name or filename_from_url(url))
+        return dest_dir if context.fetch(files, dest_dir) else None
+
+
+class USGSAdapter(SourceAdapter):
+    """USGS ScienceBase items and The National Map product API -> their attached files"""
+    
+    name = "usgs"
+    patterns = (
+        r"sciencebase\.gov/catalog/item/([0-9a-f]{24})",
+        r"tnmaccess\.nationalmap\.gov/api/v\d+/products"
+    )
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        found = self.match(url)
+        if "sciencebase" in found.group(0).lower():
+            item_id = found.group(1)
+            item = context.get_json(f"https://www.sciencebase.gov/catalog/item/{item_id}?format=json")
+            files = [f["url"] for f in item.get("files", []) if f.get("url")]
+            key = item_id
+        else:
+            products = context.get_json(url)
+            files = [item["downloadURL"] for item in products.get("items", []) if item.get("downloadURL")]
+            key = name or "tnm_products"
+        if not files:
+            logger.warning(f"No USGS files listed at {url}")
+            return None
+        dest_dir = self.target_dir(context, key)
+        return dest_dir if context.fetch(files, dest_dir) else None
+
+
+class StacItemAdapter(SourceAdapter):
+    """Sentinel/Landsat STAC items (e.g. Earth Search on AWS) -> their data assets"""
+    
+    name = "sentinel"
+    patterns = (r"/collections/((?:sentinel|landsat)[^/]*)/items/([^/?#]+)",)
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        collection, item_id = self.match(url).groups()
+        assets = context.get_json(url).get("assets", {})
+        data_assets = [a for a in assets.values() if "data" in (a.get("roles") or [])]
+        if not data_assets:
+            data_assets = [a for a in assets.values() if "tiff" in a.get("type", "") or a.get("href", "").endswith(".jp2")]
+        files = []
+        for asset in data_assets:
+            href = asset.get("href", "")
+            if href.startswith("s3://"):
+                bucket, _, key = href[5:].partition("/")
+                href = f"https://{bucket}.s3.amazonaws.com/{key}"
+            if href.startswith("http"):
+                files.append(href)
+        if not files:
+            logger.warning(f"STAC item {item_id} has no downloadable data assets")
+            return None
+        dest_dir = self.target_dir(context, f"{collection}_{item_id}")
+        return dest_dir if context.fetch(files, dest_dir) else None
+
+
+class NOAAAdapter(SourceAdapter):
+    """NOAA data directory listings (NCEI, PSL, NGDC, NODC) -> the data files in them"""
+    
+    name = "noaa"
+    patterns = (r"(?:ncei|ncdc|psl|ngdc|nodc)\.noaa\.gov/(?:data|pub|Datasets)/[^?#]*/(?:[?#].*)?$",)
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        base = url.split("?")[0].split("#")[0]
+        files = [link for link in data_links(context.get_text(url), base) if link.startswith(base)]
+        if not files:
+            logger.warning(f"No data files listed at {url}")
+            return None
+        dest_dir = self.target_dir(context, urlparse(base).path.strip("/").replace("/", "_"))
+        return dest_dir if context.fetch(files, dest_dir) else None
+
+
+class NASAEarthdataAdapter(SourceAdapter):
+    """NASA CMR collections/granules and Earthdata Search links -> granule files
+    
+    Downloads send EARTHDATA_TOKEN as a bearer token when it is set; most
+    Earthdata archives require it.
+    """
+    
+    name = "earthdata"
+    patterns = (
+        r"cmr\.earthdata\.nasa\.gov/search/concepts/([CG]\d+-[A-Z0-9_]+)",
+        r"earthdata\.nasa\.gov/search[^?]*\?(?:.*&)?p=(C\d+-[A-Z0-9_]+)"
+    )
+    max_granules = 20
+    
+    def download(self, url: str, name: str, context: AdapterContext) -> Optional[Path]:
+        concept_id = self.match(url).group(1).upper()
+        search = "https://cmr.earthdata.nasa.gov/search/granules.json?"
+        if concept_id.startswith("G"):
+            search += f"concept_id={concept_id}"
+        else:
+            search += f"collection_concept_id={concept_id}&page_size={self.max_granules}&sort_key=-start_date"
+        entries = context.get_json(search).get("feed", {}).get("entry", [])
+        files = [
+            link["href"]
+            for entry in entries
+            for link in entry.get("links", [])
+            if link.get("rel", "").endswith("/data#") and not link.get("inherited") and link.get("href", "").startswith("http")
+        ]
+        if not files:
+            logger.warning(f"No granule files found for {concept_id}")
+            return None
+        token = os.getenv("EARTHDATA_TOKEN")
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        dest_dir = self.target_dir(context, concept_id)
+        return dest_dir if context.fetch(files, dest_dir, headers=headers) else None
+
+
+def default_adapters() -> List[SourceAdapter]:
+    """The built-in portal adapters"""
+    return [
+        NaturalEarthAdapter(),
+        GeofabrikAdapter(),
+        OpenStreetMapAdapter(),
+        WorldPopAdapter(),
+        USGSAdapter(),
+        StacItemAdapter(),
+        NOAAAdapter(),
+        NASAEarthdataAdapter()
+    ]
+
+
+class AdapterRegistry:
+    """Ordered collection of source adapters, first match wins"""
+    
+    def __init__(self, adapters: Optional[Iterable[SourceAdapter]] = None):
+        """
+        Initialize the registry
+        
+        Args:
+            adapters: Adapters to dispatch to (defaults to default_adapters())
+        """
+        self.adapters = list(default_adapters() if adapters is None else adapters)
+    
+    def register(self, adapter: SourceAdapter) -> SourceAdapter:
+        """Add an adapter ahead of the existing ones, so it can override them"""
+        self.adapters.insert(0, adapter)
+        return adapter
+    
+    def find(self, url: str) -> Optional[SourceAdapter]:
+        """Adapter handling url, or None if no adapter knows it"""
+        if not isinstance(url, str):
+            return None
+        for adapter in self.adapters:
+            if adapter.match(url):
+                return adapter
+        return None
@@ -0,0 +1,89 @@
+"""
+Bandwidth Limiter
+Token bucket shared by all transfers so concurrent downloads stay within one bandwidth budget
+"""
+
+import logging
+from typing import Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Limiter charged in addition to the engine-wide one by transfers of the current
+# task (e.g. a tenant's budget), inherited by worker threads that copy the context
+_scoped_limiter: ContextVar[Optional["BandwidthLimiter"]] = ContextVar("scoped_bandwidth_limiter", default=None)
+
+
+class BandwidthLimiter:
+    """Token bucket measured in bytes
+    
+    Transfers call consume() with each chunk they receive. Tokens refill at
+    the configured rate up to the burst size; a chunk larger than the
+    available tokens puts the bucket into debt and its caller sleeps until
+    the debt is repaid, so the long-run rate across all threads and
+    coroutines never exceeds the budget.
+    """
+    
+    def __init__(self, bytes_per_second: float, burst_bytes: Optional[int] = None):
+        """
+        Initialize the limiter
+        
+        Args:
+            bytes_per_second: Sustained transfer budget
+            burst_bytes: Bytes that may be transferred at once after an idle period
+                (defaults to one second's worth)
+        """
+        if bytes_per_second <= 0:
+            raise ValueError("bytes_per_second must be positive")
+        self.rate = float(bytes_per_second)
+        self.capacity = float(burst_bytes or bytes_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_mbps(cls, megabits_per_second: Optional[float]) -> Optional["BandwidthLimiter"]:
+        """Create a limiter from a megabit-per-second budget (None for unlimited)"""
+        if not megabits_per_second:
+            return None
+        return cls(megabits_per_second * 1_000_000 / 8)
+    
+    def reserve(self, count: int) -> float:
+        """Take count bytes from the bucket, returning how long the caller must wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= count
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+    
+    def consume(self, count: int) -> None:
+        """Account for count bytes, blocking the thread while over budget"""
+        delay = self.reserve(count)
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def aconsume(self, count: int) -> None:
+        """Account for count bytes without blocking the event loop"""
+        delay = self.reserve(count)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def scoped_limiter() -> Optional[BandwidthLimiter]:
+    """The limiter set by limit_bandwidth() for the current context, if any"""
+    return _scoped_limiter.get()
+
+
+@contextmanager
+def limit_bandwidth(limiter: Optional[BandwidthLimiter]) -> Iterator[None]:
+    """Charge transfers started in this context against limiter as well"""
+    token = _scoped_limiter.set(limiter)
+    try:
+        yield
+    finally:
+        _scoped_limiter.reset(token)
@@ -0,0 +1,211 @@
+"""
+Blob Store
+Content-addressed file store that lets datasets share identical files through links
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Optional
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import threading
+
+logger = logging.getLogger(__name__)
+
+# FICLONE ioctl (Linux): copy-on-write clone on btrfs, XFS and other reflink filesystems
+FICLONE = 0x40049409
+
+# Files the downloaders keep next to datasets that must not be shared
+SKIPPED_SUFFIXES = (".part", ".state", ".tmp", ".lock", ".incomplete")
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(source: Path, dest: Path) -> bool:
+    """Clone source to dest copy-on-write, returning False where unsupported"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            dest.unlink()
+        except OSError:
+            pass
+        return False
+
+
+class BlobStore:
+    """Stores each distinct file content once under work_dir
+    
+    Files are addressed by SHA-256. Dataset directories under downloads/
+    keep their normal layout, but each file is a reflink (copy-on-write, on
+    filesystems that support it) or hardlink to its blob, so the same file
+    downloaded for several datasets, or present in both the HuggingFace
+    cache and a dataset directory, takes disk space once. Copies are only
+    made when neither link type works, e.g. across filesystems. Hardlinked
+    files share one inode, so downloaded files must be treated as read-only.
+    """
+    
+    def __init__(self, root: Path):
+        """
+        Initialize the store
+        
+        Args:
+            root: Directory holding the blobs (must be on the same filesystem as
+                the download directories for links to work)
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+    
+    def has(self, digest: str) -> bool:
+        return self.blob_path(digest).exists()
+    
+    def add_file(self, path: Path, digest: Optional[str] = None) -> str:
+        """
+        Store a file's content and turn the file into a link to its blob
+        
+        Args:
+            path: File to store (left in place)
+            digest: SHA-256 of the file if already known
+        
+        Returns:
+            The content digest
+        """
+        path = Path(path)
+        digest = digest or file_digest(path)
+        blob = self.blob_path(digest)
+        with self._lock:
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    # The file itself becomes the blob: no data is copied
+                    os.link(path, blob)
+                    return digest
+                except OSError:
+                    tmp = blob.with_name(f"{blob.name}.tmp")
+                    shutil.copy2(path, tmp)
+                    os.replace(tmp, blob)
+        if not self._same_file(blob, path):
+            self._link(blob, path)
+        return digest
+    
+    def add_tree(self, directory: Path) -> Dict[str, Any]:
+        """Store every file under a directory, returning counts and bytes saved"""
+        stats = {"files": 0, "deduplicated": 0, "bytes_saved": 0}
+        for path in Path(directory).rglob("*"):
+            if not path.is_file() or path.is_symlink() or path.name.endswith(SKIPPED_SUFFIXES):
+                continue
+            if any(part.startswith(".") for part in path.relative_to(directory).parts[:-1]):
+                # Tool metadata such as .cache/huggingface
+                continue
+            size = path.stat().st_size
+            digest = file_digest(path)
+            existed = self.has(digest)
+            self.add_file(path, digest)
+            stats["files"] += 1
+            if existed:
+                stats["deduplicated"] += 1
+                stats["bytes_saved"] += size
+        return stats
+    
+    def materialize(self, source: Path, dest: Path) -> Path:
+        """Place a file's content at dest as a link to its blob (e.g. from the HuggingFace cache)"""
+        digest = self.add_file(Path(source).resolve())
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        self._link(self.blob_path(digest), dest)
+        return dest
+    
+    def store_paths(self, paths: Iterable[Path]) -> Dict[str, Any]:
+        """Store files and directory trees, logging the space saved"""
+        totals = {"files": 0, "deduplicated": 0, "bytes_saved": 0}
+        for path in paths:
+            path = Path(path)
+            try:
+                if path.is_dir():
+                    stats = self.add_tree(path)
+                elif path.is_file():
+                    digest = file_digest(path)
+                    existed = self.has(digest)
+                    self.add_file(path, digest)
+                    stats = {"files": 1, "deduplicated": int(existed), "bytes_saved": path.stat().st_size if existed else 0}
+                else:
+                    continue
+            except OSError as e:
+                logger.warning(f"Could not add {path} to the blob store: {e}")
+                continue
+            for key in totals:
+                totals[key] += stats[key]
+        if totals["deduplicated"]:
+            logger.info(
+                f"Blob store: {totals['deduplicated']}/{totals['files']} file(s) already stored, "
+                f"saved {totals['bytes_saved'] / (1024**2):.1f} MB"
+            )
+        return totals
+    
+    def gc(self) -> int:
+        """Delete blobs no dataset links to any more, returning bytes freed"""
+        freed = 0
+        with self._lock:
+            for blob in self.root.glob("??/*"):
+                try:
+                    info = blob.stat()
+                    if info.st_nlink <= 1:
+                        blob.unlink()
+                        freed += info.st_size
+                except OSError:
+                    continue
+        if freed:
+            logger.info(f"Blob store freed {freed / (1024**2):.1f} MB")
+        return freed
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return blob count, stored bytes and how many blobs are shared"""
+        count = size = shared = 0
+        for blob in self.root.glob("??/*"):
+            try:
+                info = blob.stat()
+            except OSError:
+                continue
+            count += 1
+            size += info.st_size
+            if info.st_nlink > 2:
+                shared += 1
+        return {"blobs": count, "bytes": size, "shared_blobs": shared}
+    
+    @staticmethod
+    def _same_file(a: Path, b: Path) -> bool:
+        try:
+            return os.path.samefile(a, b)
+        except OSError:
+            return False
+    
+    @staticmethod
+    def _link(blob: Path, dest: Path) -> None:
+        """Atomically replace dest with a reflink, hardlink or (last resort) copy of blob"""
+        tmp = dest.with_name(f".{dest.name}.link")
+        if tmp.exists():
+            tmp.unlink()
+        if not _reflink(blob, tmp):
+            try:
+                os.link(blob, tmp)
+            except OSError:
+                shutil.copy2(blob, tmp)
+        os.replace(tmp, dest)
@@ -0,0 +1,106 @@
+"""
+Download Catalog
+Remembers completed downloads so repeated requests revalidate instead of re-downloading
+"""
+
+import logging
+from typing import Any, Dict, Optional
+from pathlib import Path
+import json
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadCatalog:
+    """JSON catalog of completed downloads keyed by source
+    
+    Keys identify the source ('url:<url>', 'zenodo:<record>', 'hf:<type>:<repo>',
+    'github:<owner>/<repo>@<branch>/<path>'). Each entry stores the local path plus
+    whatever validators the source offers (ETag, Last-Modified, revision) so the
+    next request can be a conditional GET or a metadata comparison.
+    """
+    
+    def __init__(self, catalog_path: Path):
+        """
+        Initialize the catalog
+        
+        Args:
+            catalog_path: JSON file holding the catalog
+        """
+        self.catalog_path = Path(catalog_path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if self.catalog_path.exists():
+            try:
+                self._entries = json.loads(self.catalog_path.read_text(encoding="utf-8"))
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring unreadable download catalog {self.catalog_path}: {e}")
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry for key if its local copy still exists"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not Path(entry.get("path", "")).exists():
+            logger.info(f"Cached download for {key} is missing on disk, dropping it")
+            self.remove(key)
+            return None
+        return dict(entry)
+    
+    def record(
+        self,
+        key: str,
+        path: Path,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        revision: Optional[str] = None
+    ) -> None:
+        """Record a completed download and its validators"""
+        entry = {
+            "path": str(path),
+            "etag": etag,
+            "last_modified": last_modified,
+            "revision": revision,
+            "fetched_at": time.time()
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._save()
+    
+    def touch(self, key: str) -> None:
+        """Mark an entry as revalidated now"""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]["fetched_at"] = time.time()
+                self._save()
+    
+    def remove(self, key: str) -> None:
+        """Forget an entry"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+    
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Return a copy of all entries"""
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._entries.items()}
+    
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers from an entry"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def _save(self) -> None:
+        self.catalog_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.catalog_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._entries, indent=2), encoding="utf-8")
+        tmp_path.replace(self.catalog_path)
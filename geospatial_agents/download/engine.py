@@ -0,0 +1,652 @@
+"""
+Download Engine
+Concurrent multi-file downloader with per-host connection pooling,
+resumable transfers and integrity verification
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+from pathlib import Path
+from urllib.parse import urlparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from geospatial_agents.download.bandwidth import BandwidthLimiter, scoped_limiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': '*/*'
+}
+
+CHUNK_SIZE = 1024 * 1024
+
+# Network errors after which a transfer is resumed from the bytes already on disk
+RESUMABLE_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+
+class RemoteFileChanged(IOError):
+    """The remote file changed while it was being downloaded in ranges"""
+
+
+def verify_checksum(path: Path, checksum: str) -> bool:
+    """Verify a file against a checksum like 'md5:abc123' (bare digests are treated as MD5)"""
+    algorithm, _, expected = checksum.partition(":")
+    if not expected:
+        algorithm, expected = "md5", algorithm
+    digest = hashlib.new(algorithm.lower())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(8 * 1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest().lower() == expected.strip().lower()
+
+
+def resume_validator(response: requests.Response) -> Optional[str]:
+    """Validator for If-Range: a strong ETag, else Last-Modified (None if the server sends neither)"""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def content_range_total(response: requests.Response) -> Optional[int]:
+    """Full size of the file from a Content-Range header ('bytes 0-99/1234' or 'bytes */1234')"""
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+@dataclass
+class DownloadJob:
+    """A single file to download"""
+    url: str
+    dest: Path
+    expected_size: Optional[int] = None
+    checksum: Optional[str] = None  # e.g. "md5:..." as published by Zenodo
+    headers: Dict[str, str] = field(default_factory=dict)
+    timeout: Optional[float] = None
+    # Receives each chunk as it arrives, e.g. extract.TarStreamExtractor
+    # (needs position, feed(chunk), finish() and abort())
+    consumer: Optional[Any] = None
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of a DownloadJob"""
+    job: DownloadJob
+    path: Optional[Path] = None
+    error: Optional[str] = None
+    bytes_downloaded: int = 0
+    content_type: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False  # Conditional request answered with 304
+    
+    @property
+    def success(self) -> bool:
+        return self.path is not None
+
+
+class DownloadProgress:
+    """Thread-safe aggregate progress across all files of a download batch"""
+    
+    def __init__(
+        self,
+        total_files: int = 0,
+        total_bytes: int = 0,
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        report_interval: float = 2.0
+    ):
+        """
+        Initialize progress tracking
+        
+        Args:
+            total_files: Number of files in the batch
+            total_bytes: Expected total bytes (0 if unknown)
+            callback: Called with a snapshot dict whenever progress is reported
+            report_interval: Minimum seconds between reports
+        """
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.completed_files = 0
+        self.failed_files = 0
+        self.downloaded_bytes = 0
+        self.callback = callback
+        self.report_interval = report_interval
+        self.started = time.monotonic()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+    
+    def add_bytes(self, count: int) -> None:
+        """Record bytes received"""
+        with self._lock:
+            self.downloaded_bytes += count
+        self._maybe_report()
+    
+    def file_done(self, success: bool) -> None:
+        """Record a finished file"""
+        with self._lock:
+            if success:
+                self.completed_files += 1
+            else:
+                self.failed_files += 1
+        self._maybe_report(force=True)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current progress as a dict"""
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                "total_files": self.total_files,
+                "completed_files": self.completed_files,
+                "failed_files": self.failed_files,
+                "total_bytes": self.total_bytes,
+                "downloaded_bytes": self.downloaded_bytes,
+                "elapsed_seconds": elapsed,
+                "bytes_per_second": self.downloaded_bytes / elapsed if elapsed > 0 else 0.0
+            }
+    
+    def _maybe_report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_report < self.report_interval:
+                return
+            self._last_report = now
+        snapshot = self.snapshot()
+        total = f"/{snapshot['total_bytes'] / (1024**2):.1f}" if snapshot["total_bytes"] else ""
+        logger.info(
+            f"Progress: {snapshot['completed_files']}/{snapshot['total_files']} files, "
+            f"{snapshot['downloaded_bytes'] / (1024**2):.1f}{total} MB "
+            f"({snapshot['bytes_per_second'] / (1024**2):.1f} MB/s)"
+        )
+        if self.callback:
+            try:
+                self.callback(snapshot)
+            except Exception as e:
+                logger.debug(f"Progress callback failed: {e}")
+
+
+class DownloadEngine:
+    """Downloads many files concurrently over pooled keep-alive connections
+    
+    Each host gets its own requests.Session whose connection pool matches the
+    per-host concurrency limit, so parallel files to the same server reuse
+    connections instead of opening a new one per request.
+    
+    Files are written to a '.part' file next to the destination and resumed
+    with HTTP Range requests after a dropped connection. Large files on servers
+    that accept ranges are fetched as parallel byte ranges. The ETag or
+    Last-Modified of the first response is kept in '<part>.json' and sent as
+    If-Range, so a partial file is never continued with a newer version of
+    the remote file.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = 8,
+        per_host_limit: int = 4,
+        timeout: float = 60,
+        max_retries: int = 3,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_resume_attempts: int = 5,
+        parallel_segments: int = 4,
+        parallel_threshold: int = 256 * 1024 * 1024,
+        bandwidth: Optional[BandwidthLimiter] = None
+    ):
+        """
+        Initialize the engine
+        
+        Args:
+            max_workers: Maximum number of files downloaded at once
+            per_host_limit: Maximum concurrent connections to a single host
+            timeout: Default request timeout in seconds
+            max_retries: Retries for connection errors and 429/5xx responses
+            progress_callback: Called with aggregate progress snapshots
+            max_resume_attempts: How often a dropped transfer is resumed before giving up
+            parallel_segments: Number of byte ranges fetched in parallel for large files
+            parallel_threshold: Minimum size in bytes for a file to be split into ranges
+            bandwidth: Shared limiter every received chunk is charged against (None for unlimited)
+        """
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.progress_callback = progress_callback
+        self.max_resume_attempts = max_resume_attempts
+        self.parallel_segments = max(1, parallel_segments)
+        self.parallel_threshold = parallel_threshold
+        self.bandwidth = bandwidth
+        self._sessions: Dict[str, requests.Session] = {}
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+    
+    def session_for(self, url: str) -> requests.Session:
+        """Return the pooled session for the URL's host"""
+        host = self._host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                retry = Retry(
+                    total=self.max_retries,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=("HEAD", "GET"),
+                    respect_retry_after_header=True
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.per_host_limit,
+                    max_retries=retry
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+    
+    def host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Return the semaphore bounding concurrent transfers to the URL's host"""
+        host = self._host(url)
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the host's pooled session (for API and metadata calls)"""
+        kwargs.setdefault("timeout", self.timeout)
+        with self.host_slot(url):
+            return self.session_for(url).get(url, **kwargs)
+    
+    def head(self, url: str, **kwargs) -> requests.Response:
+        """HEAD through the host's pooled session"""
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("allow_redirects", True)
+        with self.host_slot(url):
+            return self.session_for(url).head(url, **kwargs)
+    
+    @staticmethod
+    def part_path(dest: Path) -> Path:
+        """Return the temporary path a download is written to before completion"""
+        return dest.with_name(dest.name + ".part")
+    
+    @staticmethod
+    def state_path(part_path: Path) -> Path:
+        """Return the sidecar holding the resume validator (and range progress) of a .part file"""
+        return part_path.with_name(part_path.name + ".json")
+    
+    def fetch(self, job: DownloadJob, progress: Optional[DownloadProgress] = None) -> DownloadResult:
+        """Download a single job to its destination path
+        
+        Data goes to '<dest>.part' and is only moved to dest once complete and,
+        if the job carries a checksum, verified.
+        """
+        result = DownloadResult(job=job)
+        part_path = self.part_path(job.dest)
+        try:
+            job.dest.parent.mkdir(parents=True, exist_ok=True)
+            
+            segmented = False
+            if (self.parallel_segments > 1 and job.expected_size
+                    and job.expected_size >= self.parallel_threshold):
+                segmented = self._accepts_ranges(job)
+            
+            if segmented:
+                if job.consumer is not None:
+                    # Ranges arrive out of order; the consumer works from the file afterwards
+                    job.consumer.abort()
+                try:
+                    self._fetch_segmented(job, part_path, result, progress)
+                except RemoteFileChanged as e:
+                    # Start over once against the new version; a file that keeps changing fails
+                    logger.info(f"{e}, restarting")
+                    result.bytes_downloaded = 0
+                    self._fetch_segmented(job, part_path, result, progress)
+            else:
+                self._fetch_stream(job, part_path, result, progress)
+            
+            if result.not_modified:
+                # Conditional request: the copy already at dest is current
+                result.path = job.dest
+                if job.consumer is not None:
+                    job.consumer.abort()
+                logger.info(f"{job.dest.name} not modified, keeping local copy")
+                if progress:
+                    progress.file_done(True)
+                return result
+            
+            if job.checksum:
+                if not verify_checksum(part_path, job.checksum):
+                    part_path.unlink()
+                    raise IOError(f"Checksum mismatch for {job.dest.name} (expected {job.checksum})")
+                logger.info(f"Verified {job.checksum.split(':')[0]} checksum of {job.dest.name}")
+            
+            os.replace(part_path, job.dest)
+            self.state_path(part_path).unlink(missing_ok=True)
+            result.path = job.dest
+            logger.info(f"Downloaded {job.dest.name} ({result.bytes_downloaded / (1024**2):.1f} MB)")
+            if job.consumer is not None:
+                job.consumer.finish()
+        except Exception as e:
+            if job.consumer is not None:
+                job.consumer.abort()
+            result.error = str(e)
+            logger.warning(f"Failed to download {job.url}: {e}")
+        if progress:
+            progress.file_done(result.success)
+        return result
+    
+    def _accepts_ranges(self, job: DownloadJob) -> bool:
+        """Check whether the server supports byte-range requests for the job's URL"""
+        try:
+            response = self.head(job.url, headers=job.headers or None)
+            return response.ok and response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"HEAD request failed for {job.url}: {e}")
+            return False
+    
+    def _fetch_stream(
+        self,
+        job: DownloadJob,
+        part_path: Path,
+        result: DownloadResult,
+        progress: Optional[DownloadProgress]
+    ) -> None:
+        """Stream the job into part_path, resuming with If-Range requests after drops"""
+        state_path = self.state_path(part_path)
+        validator = None
+        total = None
+        if part_path.exists():
+            try:
+                state = json.loads(state_path.read_text())
+                if state.get("url") == job.url:
+                    validator = state.get("validator")
+            except (OSError, ValueError):
+                pass
+            if not validator:
+                # Nothing to tell whether the partial file matches the remote file
+                logger.info(f"Discarding unverifiable partial download of {job.dest.name}")
+                part_path.unlink()
+        
+        attempts = 0
+        while True:
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            if offset and not validator:
+                # Without a validator a Range request could append another version of the file
+                logger.info(f"{job.dest.name} has no ETag or Last-Modified to resume against, restarting")
+                part_path.unlink()
+                offset = 0
+            
+            headers = dict(job.headers)
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                if validator:
+                    headers["If-Range"] = validator
+            
+            try:
+                with self.host_slot(job.url):
+                    response = self.session_for(job.url).get(
+                        job.url,
+                        stream=True,
+                        headers=headers,
+                        timeout=job.timeout or self.timeout
+                    )
+                    if response.status_code == 304 and job.dest.exists():
+                        result.not_modified = True
+                        return
+                    if response.status_code == 416 and offset:
+                        if content_range_total(response) == offset:
+                            # The partial file already holds the whole (unchanged) file
+                            return
+                        logger.info(f"Partial download of {job.dest.name} does not match the remote file, restarting")
+                        response.close()
+                        part_path.unlink()
+                        continue
+                    response.raise_for_status()
+                    result.content_type = response.headers.get("Content-Type", "")
+                    result.etag = response.headers.get("ETag")
+                    result.last_modified = response.headers.get("Last-Modified")
+                    
+                    current = resume_validator(response)
+                    if offset and response.status_code == 206 and (
+                        (validator and current and current != validator)
+                        or (total and content_range_total(response) not in (None, total))
+                    ):
+                        # Server ignored If-Range although the file changed
+                        logger.info(f"{job.dest.name} changed on the server, restarting")
+                        response.close()
+                        part_path.unlink()
+                        validator = None
+                        continue
+                    if offset and response.status_code != 206:
+                        logger.info(f"Server ignored Range request or the file changed, restarting {job.dest.name}")
+                        offset = 0
+                    elif offset:
+                        logger.info(f"Resuming {job.dest.name} from byte {offset}")
+                    if not offset:
+                        validator = current
+                        length = response.headers.get("Content-Length", "")
+                        # Content-Length of an encoded response is not the file size
+                        encoded = response.headers.get("Content-Encoding", "identity") != "identity"
+                        total = int(length) if length.isdigit() and not encoded else None
+                        if validator:
+                            state_path.write_text(json.dumps({"url": job.url, "validator": validator}))
+                        else:
+                            state_path.unlink(missing_ok=True)
+                    
+                    scoped = scoped_limiter()
+                    consumer = job.consumer
+                    if consumer is not None and consumer.position != offset:
+                        # Resumed from a partial file it never saw, or restarted from zero
+                        consumer.abort()
+                    
+                    with open(part_path, 'ab' if offset else 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if chunk:
+                                if self.bandwidth:
+                                    self.bandwidth.consume(len(chunk))
+                                if scoped:
+                                    scoped.consume(len(chunk))
+                                f.write(chunk)
+                                if consumer is not None:
+                                    consumer.feed(chunk)
+                                result.bytes_downloaded += len(chunk)
+                                if progress:
+                                    progress.add_bytes(len(chunk))
+                
+                size = part_path.stat().st_size
+                if not job.expected_size or size >= job.expected_size:
+                    return
+                error = IOError(f"Transfer ended early at {size}/{job.expected_size} bytes")
+            except RESUMABLE_ERRORS as e:
+                error = e
+            
+            attempts += 1
+            if attempts > self.max_resume_attempts:
+                raise error
+            logger.warning(f"Download of {job.dest.name} interrupted ({error}), retrying ({attempts}/{self.max_resume_attempts})")
+            time.sleep(min(2 ** attempts, 30))
+    
+    def _fetch_segmented(
+        self,
+        job: DownloadJob,
+        part_path: Path,
+        result: DownloadResult,
+        progress: Optional[DownloadProgress]
+    ) -> None:
+        """Fetch the job as parallel byte ranges written in place into part_path
+        
+        Per-range progress and the file's validator are kept in '<part>.json'
+        so an interrupted download resumes each range where it left off, as
+        long as the remote file has not changed in between.
+        """
+        size = job.expected_size
+        state_path = self.state_path(part_path)
+        
+        segments = None
+        validator = [None]
+        if state_path.exists() and part_path.exists():
+            try:
+                state = json.loads(state_path.read_text())
+                if state.get("size") == size and state.get("url") == job.url and state.get("validator"):
+                    segments = state["segments"]
+                    validator[0] = state["validator"]
+                    logger.info(f"Resuming {job.dest.name} from {sum(s['done'] for s in segments)} bytes")
+            except (ValueError, KeyError) as e:
+                logger.debug(f"Ignoring unreadable segment state {state_path}: {e}")
+        
+        if segments is None:
+            segment_size = -(-size // self.parallel_segments)
+            segments = [
+                {"start": start, "end": min(start + segment_size, size) - 1, "done": 0}
+                for start in range(0, size, segment_size)
+            ]
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+        
+        state_lock = threading.Lock()
+        last_saved = [0.0]
+        changed = [False]
+        
+        def save_state(force: bool = False) -> None:
+            with state_lock:
+                now = time.monotonic()
+                if force or now - last_saved[0] >= 1.0:
+                    state = {"url": job.url, "size": size, "segments": segments, "validator": validator[0]}
+                    state_path.write_text(json.dumps(state))
+                    last_saved[0] = now
+        
+        def fetch_segment(segment: Dict[str, int]) -> None:
+            scoped = scoped_limiter()
+            attempts = 0
+            while segment["start"] + segment["done"] <= segment["end"]:
+                position = segment["start"] + segment["done"]
+                done_before = segment["done"]
+                headers = dict(job.headers)
+                headers["Range"] = f"bytes={position}-{segment['end']}"
+                if validator[0]:
+                    headers["If-Range"] = validator[0]
+                try:
+                    with self.host_slot(job.url):
+                        response = self.session_for(job.url).get(
+                            job.url,
+                            stream=True,
+                            headers=headers,
+                            timeout=job.timeout or self.timeout
+                        )
+                        response.raise_for_status()
+                        if response.status_code != 206:
+                            if "If-Range" in headers:
+                                changed[0] = True
+                                raise IOError(f"{job.dest.name} changed on the server during the download")
+                            raise IOError("Server did not honour the byte-range request")
+                        current = resume_validator(response)
+                        with state_lock:
+                            if validator[0] is None:
+                                validator[0] = current
+                            elif current and current != validator[0]:
+                                changed[0] = True
+                        if changed[0] or content_range_total(response) not in (None, size):
+                            changed[0] = True
+                            raise IOError(f"{job.dest.name} changed on the server during the download")
+                        result.content_type = response.headers.get("Content-Type", "")
+                        result.etag = response.headers.get("ETag")
+                        result.last_modified = response.headers.get("Last-Modified")
+                        with open(part_path, 'r+b') as f:
+                            f.seek(position)
+                            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                                if chunk:
+                                    if self.bandwidth:
+                                        self.bandwidth.consume(len(chunk))
+                                    if scoped:
+                                        scoped.consume(len(chunk))
+                                    chunk = chunk[:segment["end"] + 1 - segment["start"] - segment["done"]]
+                                    f.write(chunk)
+                                    segment["done"] += len(chunk)
+                                    with state_lock:
+                                        result.bytes_downloaded += len(chunk)
+                                    if progress:
+                                        progress.add_bytes(len(chunk))
+                                    save_state()
+                    if segment["done"] == done_before:
+                        raise requests.exceptions.ConnectionError("No data received for range")
+                except RESUMABLE_ERRORS as e:
+                    attempts += 1
+                    if attempts > self.max_resume_attempts:
+                        raise
+                    logger.warning(f"Range {position}-{segment['end']} of {job.dest.name} interrupted ({e}), retrying")
+                    time.sleep(min(2 ** attempts, 30))
+        
+        logger.info(f"Downloading {job.dest.name} as {len(segments)} parallel ranges")
+        try:
+            with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+                futures = [
+                    pool.submit(contextvars.copy_context().run, fetch_segment, segment)
+                    for segment in segments
+                ]
+                for future in futures:
+                    future.result()
+        except BaseException:
+            if not changed[0]:
+                save_state(force=True)
+                raise
+            # The ranges on disk belong to another version; the next attempt starts over
+            state_path.unlink(missing_ok=True)
+            part_path.unlink(missing_ok=True)
+            raise RemoteFileChanged(f"{job.dest.name} changed on the server during the download")
+        state_path.unlink()
+    
+    def fetch_many(self, jobs: List[DownloadJob]) -> List[DownloadResult]:
+        """Download jobs concurrently, returning results in job order"""
+        if not jobs:
+            return []
+        
+        progress = DownloadProgress(
+            total_files=len(jobs),
+            total_bytes=sum(job.expected_size or 0 for job in jobs),
+            callback=self.progress_callback
+        )
+        logger.info(f"Downloading {len(jobs)} file(s) with up to {self.max_workers} workers")
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            # Each worker runs in a copy of the caller's context so progress reaches its listeners
+            futures = [
+                pool.submit(contextvars.copy_context().run, self.fetch, job, progress)
+                for job in jobs
+            ]
+            results = [future.result() for future in futures]
+        
+        snapshot = progress.snapshot()
+        logger.info(
+            f"Finished {snapshot['completed_files']}/{len(jobs)} file(s), "
+            f"{snapshot['downloaded_bytes'] / (1024**2):.1f} MB in {snapshot['elapsed_seconds']:.1f}s"
+        )
+        return results
+    
+    def close(self) -> None:
+        """Close all pooled sessions"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,271 @@
+"""
+Archive Extraction
+Extracts downloaded archives while they download (tar) or in parallel (zip),
+keeping only the geospatial members
+"""
+
+import logging
+from typing import Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+import os
+import shutil
+import tarfile
+import threading
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# Members worth extracting: geospatial data, their sidecar files and documentation
+GEOSPATIAL_SUFFIXES = (
+    ".tif", ".tiff", ".jp2", ".img", ".vrt", ".ovr", ".aux.xml", ".tfw",
+    ".shp", ".shx", ".dbf", ".prj", ".cpg", ".sbn", ".sbx", ".qix",
+    ".geojson", ".json", ".jsonl", ".gpkg", ".sqlite", ".kml", ".kmz", ".gml", ".gpx",
+    ".csv", ".tsv", ".parquet", ".nc", ".nc4", ".h5", ".hdf", ".hdf5", ".he5",
+    ".grib", ".grib2", ".grb", ".las", ".laz", ".xyz", ".asc", ".dem", ".hgt",
+    ".xml", ".txt", ".md", ".pdf"
+)
+
+# tarfile stream modes by file name ending
+TAR_STREAM_MODES = (
+    (".tar.gz", "r|gz"),
+    (".tgz", "r|gz"),
+    (".tar.bz2", "r|bz2"),
+    (".tbz2", "r|bz2"),
+    (".tar.xz", "r|xz"),
+    (".txz", "r|xz"),
+    (".tar", "r|")
+)
+
+COPY_BUFFER = 1024 * 1024
+
+
+def is_geospatial_member(name: str) -> bool:
+    """Whether an archive member looks like geospatial data, a sidecar or documentation"""
+    return name.lower().endswith(GEOSPATIAL_SUFFIXES)
+
+
+def tar_stream_mode(filename: str) -> Optional[str]:
+    """tarfile stream mode for an archive file name, or None if it isn't a tar archive"""
+    lower = filename.lower()
+    for suffix, mode in TAR_STREAM_MODES:
+        if lower.endswith(suffix):
+            return mode
+    return None
+
+
+def archive_stem(filename: str) -> str:
+    """Name of the directory an archive is extracted into"""
+    lower = filename.lower()
+    for suffix, _ in TAR_STREAM_MODES + ((".zip", None),):
+        if lower.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+def safe_member_path(dest_dir: Path, name: str) -> Optional[Path]:
+    """Destination for a member, or None if it would escape dest_dir"""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    if not parts or parts[0] == "/" or ".." in parts or ":" in parts[0]:
+        return None
+    return dest_dir.joinpath(*parts)
+
+
+class TarStreamExtractor:
+    """Extracts a tar archive from bytes as they arrive from the network
+    
+    The download engine feeds each received chunk into a pipe; a background
+    thread reads the tar stream from the other end and writes the selected
+    members. The archive is extracted by the time the download finishes,
+    without reading it back from disk.
+    """
+    
+    def __init__(
+        self,
+        dest_dir: Path,
+        mode: str,
+        select: Optional[Callable[[str], bool]] = is_geospatial_member
+    ):
+        """
+        Start the extraction thread
+        
+        Args:
+            dest_dir: Directory members are extracted into
+            mode: tarfile stream mode ('r|gz', 'r|bz2', 'r|xz' or 'r|')
+            select: Predicate on member names (None to extract everything)
+        """
+        self.dest_dir = Path(dest_dir)
+        self.mode = mode
+        self.select = select
+        self.position = 0
+        self.extracted: List[Path] = []
+        self.skipped = 0
+        self.error: Optional[BaseException] = None
+        self.completed = False
+        self._closed = False
+        
+        read_fd, write_fd = os.pipe()
+        self._reader = os.fdopen(read_fd, "rb")
+        self._writer = os.fdopen(write_fd, "wb")
+        self._thread = threading.Thread(target=self._run, name="tar-stream", daemon=True)
+        self._thread.start()
+    
+    def feed(self, chunk: bytes) -> None:
+        """Pass the next downloaded bytes to the extractor (never raises)"""
+        if self._closed:
+            return
+        try:
+            self._writer.write(chunk)
+            self.position += len(chunk)
+        except (BrokenPipeError, OSError, ValueError) as e:
+            # Extraction thread gave up; the download itself carries on
+            self.error = self.error or e
+            self._close_writer()
+    
+    def finish(self) -> bool:
+        """Signal the end of the download and wait for extraction, returning success"""
+        self._close_writer()
+        self._thread.join()
+        self.completed = self.error is None
+        if self.completed:
+            logger.info(
+                f"Extracted {len(self.extracted)} member(s) to {self.dest_dir} while downloading"
+                + (f" (skipped {self.skipped} non-geospatial)" if self.skipped else "")
+            )
+        else:
+            logger.warning(f"Streaming extraction into {self.dest_dir} failed: {self.error}")
+        return self.completed
+    
+    def abort(self) -> None:
+        """Stop extracting and remove what was extracted (the download restarted or failed)"""
+        if self.error is None:
+            self.error = RuntimeError("aborted")
+        self._close_writer()
+        self._thread.join()
+        for path in self.extracted:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        self.extracted = []
+    
+    def _close_writer(self) -> None:
+        if not self._closed:
+            self._closed = True
+            try:
+                self._writer.close()
+            except OSError:
+                pass
+    
+    def _run(self) -> None:
+        try:
+            with tarfile.open(fileobj=self._reader, mode=self.mode) as archive:
+                for member in archive:
+                    if self.error is not None:
+                        break
+                    if not member.isfile():
+                        continue
+                    if self.select and not self.select(member.name):
+                        self.skipped += 1
+                        continue
+                    target = safe_member_path(self.dest_dir, member.name)
+                    if target is None:
+                        logger.warning(f"Skipping unsafe archive member: {member.name}")
+                        continue
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    # Tracked before writing so abort() also removes a partial file
+                    self.extracted.append(target)
+                    source = archive.extractfile(member)
+                    with open(target, "wb") as f:
+                        shutil.copyfileobj(source, f, COPY_BUFFER)
+        except Exception as e:
+            self.error = self.error or e
+        finally:
+            # Keep reading so the downloader never blocks on a full pipe
+            try:
+                while self._reader.read(COPY_BUFFER):
+                    pass
+            except (OSError, ValueError):
+                pass
+            self._reader.close()
+
+
+def extract_tar(
+    archive_path: Path,
+    dest_dir: Path,
+    select: Optional[Callable[[str], bool]] = is_geospatial_member
+) -> List[Path]:
+    """Extract the selected members of a tar archive already on disk in one sequential pass"""
+    mode = tar_stream_mode(archive_path.name) or "r|*"
+    extracted = []
+    with open(archive_path, "rb") as f, tarfile.open(fileobj=f, mode=mode) as archive:
+        for member in archive:
+            if not member.isfile() or (select and not select(member.name)):
+                continue
+            target = safe_member_path(dest_dir, member.name)
+            if target is None:
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(target, "wb") as out:
+                shutil.copyfileobj(archive.extractfile(member), out, COPY_BUFFER)
+            extracted.append(target)
+    return extracted
+
+
+def extract_zip(
+    archive_path: Path,
+    dest_dir: Path,
+    select: Optional[Callable[[str], bool]] = is_geospatial_member,
+    workers: int = 4
+) -> List[Path]:
+    """
+    Extract the selected members of a zip archive in parallel
+    
+    Members are read straight from the central directory, each worker with its
+    own handle on the archive. CRCs are checked as members are read, which
+    replaces a separate testzip() pass over the whole file. If no member
+    matches select, everything is extracted.
+    
+    Returns:
+        Paths of the extracted files
+    """
+    with zipfile.ZipFile(archive_path) as archive:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+    chosen = [info for info in members if not select or select(info.filename)]
+    if not chosen:
+        chosen = members
+    if len(chosen) < len(members):
+        logger.info(f"Extracting {len(chosen)}/{len(members)} geospatial member(s) of {archive_path.name}")
+    
+    # Balance the work by uncompressed size
+    batches: List[List[zipfile.ZipInfo]] = [[] for _ in range(max(1, min(workers, len(chosen))))]
+    loads = [0] * len(batches)
+    for info in sorted(chosen, key=lambda i: i.file_size, reverse=True):
+        index = loads.index(min(loads))
+        batches[index].append(info)
+        loads[index] += info.file_size
+    
+    def extract_batch(batch: List[zipfile.ZipInfo]) -> List[Path]:
+        done = []
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in batch:
+                target = safe_member_path(dest_dir, info.filename)
+                if target is None:
+                    logger.warning(f"Skipping unsafe archive member: {info.filename}")
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    with archive.open(info) as source, open(target, "wb") as out:
+                        shutil.copyfileobj(source, out, COPY_BUFFER)
+                except (zipfile.BadZipFile, NotImplementedError, OSError) as e:
+                    logger.warning(f"Could not extract {info.filename}: {e}")
+                    try:
+                        target.unlink()
+                    except OSError:
+                        pass
+                    continue
+                done.append(target)
+        return done
+    
+    with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix="unzip") as pool:
+        return [path for paths in pool.map(extract_batch, batches) for path in paths]
@@ -0,0 +1,157 @@
+"""
+GitHub Tree Listing
+Lists a whole repository directory with one Git Trees API call and selects the files to fetch
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+from fnmatch import fnmatch
+from pathlib import Path
+import hashlib
+import os
+import time
+
+import requests
+
+from geospatial_agents.download.engine import DownloadEngine
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API = "https://api.github.com"
+
+# Remaining API calls below which a warning is logged
+LOW_RATE_LIMIT = 10
+
+
+def git_blob_sha(path: Path) -> str:
+    """SHA-1 git uses for a file's content, comparable with the 'sha' of tree entries"""
+    digest = hashlib.sha1(f"blob {path.stat().st_size}\0".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def patterns_from_extensions(extensions: Optional[Iterable[str]]) -> List[str]:
+    """Turn extensions like '.csv' into glob patterns"""
+    return [f"*{ext if ext.startswith('.') else '.' + ext}" for ext in extensions or []]
+
+
+def matches_patterns(path: str, patterns: Iterable[str]) -> bool:
+    """Whether a relative path or its file name matches any glob pattern"""
+    name = path.rsplit("/", 1)[-1]
+    return any(fnmatch(path, pattern) or fnmatch(name, pattern) for pattern in patterns)
+
+
+def select_tree_files(
+    tree: List[Dict[str, Any]],
+    path: str = "",
+    patterns: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Pick the files of a recursive tree listing that lie under path and match patterns
+    
+    Args:
+        tree: 'tree' entries of a git/trees?recursive=1 response
+        path: Directory within the repository ('' for the root)
+        patterns: Glob patterns matched against the path relative to the
+            directory and against the file name (None for every file)
+    
+    Returns:
+        Blob entries with an added 'relative_path'
+    """
+    prefix = path.strip("/")
+    patterns = list(patterns or [])
+    selected = []
+    for entry in tree:
+        if entry.get("type") != "blob":
+            continue
+        full_path = entry.get("path", "")
+        if prefix and full_path != prefix and not full_path.startswith(prefix + "/"):
+            continue
+        relative = full_path[len(prefix):].lstrip("/") if prefix else full_path
+        # The path named a single file
+        relative = relative or full_path.rsplit("/", 1)[-1]
+        if patterns and not matches_patterns(relative, patterns):
+            continue
+        selected.append(dict(entry, relative_path=relative))
+    return selected
+
+
+def rate_limit_delay(response: requests.Response) -> Optional[float]:
+    """Seconds until the API may be called again if the response is a rate-limit refusal, else None"""
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        reset = response.headers.get("X-RateLimit-Reset", "")
+        return max(0.0, float(reset) - time.time()) if reset.isdigit() else 60.0
+    return None
+
+
+class GitHubClient:
+    """GitHub REST API calls that respect the rate-limit headers
+    
+    Requests are authenticated with GITHUB_TOKEN when it is set (5000 instead
+    of 60 calls per hour). A rate-limited call is retried after the reset
+    time GitHub reports if that is at most max_rate_limit_wait away.
+    """
+    
+    def __init__(
+        self,
+        engine: DownloadEngine,
+        token: Optional[str] = None,
+        max_rate_limit_wait: float = 60.0
+    ):
+        """
+        Initialize the client
+        
+        Args:
+            engine: Download engine whose pooled sessions make the calls
+            token: GitHub token (defaults to the GITHUB_TOKEN environment variable)
+            max_rate_limit_wait: Longest wait in seconds for a rate limit to reset
+        """
+        self.engine = engine
+        self.token = token or os.getenv("GITHUB_TOKEN")
+        self.max_rate_limit_wait = max_rate_limit_wait
+    
+    def headers(self, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        headers = {"Accept": "application/vnd.github.v3+json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        headers.update(extra or {})
+        return headers
+    
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> requests.Response:
+        """GET an API URL, waiting out a short rate-limit reset once"""
+        response = self.engine.get(url, headers=self.headers(headers), timeout=timeout)
+        delay = rate_limit_delay(response)
+        if delay is not None:
+            if delay > self.max_rate_limit_wait:
+                raise requests.exceptions.HTTPError(
+                    f"GitHub API rate limit exhausted, resets in {delay:.0f}s"
+                    + ("" if self.token else " (set GITHUB_TOKEN for a higher limit)"),
+                    response=response
+                )
+            logger.info(f"GitHub API rate limit reached, waiting {delay:.0f}s")
+            time.sleep(delay)
+            response = self.engine.get(url, headers=self.headers(headers), timeout=timeout)
+        
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining and remaining.isdigit() and int(remaining) < LOW_RATE_LIMIT:
+            logger.warning(f"Only {remaining} GitHub API call(s) left before the rate limit")
+        return response
+    
+    def tree(
+        self,
+        owner: str,
+        repo: str,
+        ref: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        """List every file of a repository at ref with one recursive Git Trees call"""
+        url = f"{GITHUB_API}/repos/{owner}/{repo}/git/trees/{ref}?recursive=1"
+        logger.info(f"Fetching repository tree from: {url}")
+        return self.get(url, headers=headers)
@@ -0,0 +1,137 @@
+"""
+HuggingFace File Selection
+Chooses which files of a HuggingFace repository to download for the requested formats
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+from fnmatch import fnmatch
+import re
+
+logger = logging.getLogger(__name__)
+
+# Glob patterns for each format name a user or the search enrichment may mention
+FORMAT_PATTERNS = {
+    "geotiff": ["*.tif", "*.tiff"],
+    "tiff": ["*.tif", "*.tiff"],
+    "cog": ["*.tif", "*.tiff"],
+    "raster": ["*.tif", "*.tiff", "*.img", "*.vrt", "*.jp2"],
+    "shapefile": ["*.shp", "*.shx", "*.dbf", "*.prj", "*.cpg"],
+    "shp": ["*.shp", "*.shx", "*.dbf", "*.prj", "*.cpg"],
+    "geojson": ["*.geojson", "*.json"],
+    "json": ["*.json", "*.jsonl"],
+    "geopackage": ["*.gpkg"],
+    "gpkg": ["*.gpkg"],
+    "csv": ["*.csv", "*.csv.gz"],
+    "parquet": ["*.parquet"],
+    "geoparquet": ["*.parquet"],
+    "netcdf": ["*.nc", "*.nc4"],
+    "hdf": ["*.h5", "*.hdf", "*.hdf5", "*.he5"],
+    "hdf5": ["*.h5", "*.hdf", "*.hdf5", "*.he5"],
+    "h5": ["*.h5", "*.hdf", "*.hdf5", "*.he5"],
+    "zarr": ["*.zarr/**", "**/.zarray", "**/.zattrs", "**/.zgroup"],
+    "kml": ["*.kml", "*.kmz"],
+    "grib": ["*.grib", "*.grib2", "*.grb"],
+    "las": ["*.las", "*.laz"],
+    "lidar": ["*.las", "*.laz"],
+    "zip": ["*.zip"]
+}
+
+# Always fetched: they are small and describe the data
+DOCUMENTATION_PATTERNS = ["README.md", "*.md", "dataset_infos.json", "*.yaml", "*.yml"]
+
+# Never useful as data
+ALWAYS_IGNORED = [".gitattributes", ".gitignore"]
+
+# Extensions of files that count as data (as opposed to docs and configuration)
+DATA_EXTENSIONS = {
+    pattern[2:]
+    for patterns in FORMAT_PATTERNS.values()
+    for pattern in patterns
+    if pattern.startswith("*.") and "/" not in pattern
+}
+
+
+def requested_formats(value: Any) -> List[str]:
+    """Normalize formats given as a list or free text ('GeoTIFF, Shapefile') into format names"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[,;/|]|\band\b|\s+", value.lower())
+    names = []
+    for item in value:
+        name = str(item).strip(" .()[]").lower()
+        if name in FORMAT_PATTERNS and name not in names:
+            names.append(name)
+    return names
+
+
+def format_patterns(formats: Iterable[str]) -> List[str]:
+    """Glob patterns matching the given format names"""
+    patterns = []
+    for name in formats:
+        for pattern in FORMAT_PATTERNS.get(name, []):
+            if pattern not in patterns:
+                patterns.append(pattern)
+    return patterns
+
+
+def _matches(path: str, patterns: Iterable[str]) -> bool:
+    name = path.rsplit("/", 1)[-1]
+    return any(fnmatch(path, pattern) or fnmatch(name, pattern) for pattern in patterns)
+
+
+def _in_parquet_conversion(path: str) -> bool:
+    """Whether a path lies in a '<name>.parquet/' directory of converted Parquet files"""
+    return any(part.lower().endswith(".parquet") for part in path.split("/")[:-1])
+
+
+def _is_data(path: str) -> bool:
+    if _matches(path, DOCUMENTATION_PATTERNS):
+        return False
+    lower = path.lower()
+    return any(lower.endswith(f".{extension}") for extension in DATA_EXTENSIONS)
+
+
+def select_repo_files(
+    files: Dict[str, Optional[int]],
+    formats: Iterable[str] = (),
+    include_parquet_mirror: bool = False
+) -> List[str]:
+    """
+    Pick the repository files worth downloading
+    
+    Args:
+        files: Repository path -> size in bytes (None if unknown)
+        formats: Requested format names (see requested_formats); empty for all data
+        include_parquet_mirror: Keep Parquet copies in '.parquet/' conversion directories
+            even when the original files are present
+    
+    Returns:
+        Repository paths to download
+    """
+    candidates = [path for path in files if not _matches(path, ALWAYS_IGNORED)]
+    allow = format_patterns(formats)
+    
+    selected = candidates
+    if allow:
+        selected = [path for path in candidates if _matches(path, allow) or _matches(path, DOCUMENTATION_PATTERNS)]
+        if not any(_is_data(path) for path in selected):
+            # Nothing in the requested formats; better the whole dataset than only its README
+            logger.info(f"No files match formats {list(formats)}, downloading all data files")
+            selected = candidates
+    
+    if not include_parquet_mirror and "parquet" not in formats and "geoparquet" not in formats:
+        # Only Parquet in a '.parquet/' conversion directory is a copy of other files; Parquet
+        # anywhere else is the repository's own data (HuggingFace's automatic conversion
+        # lives on the refs/convert/parquet revision, not in the listed tree)
+        originals = [path for path in selected if _is_data(path) and not _in_parquet_conversion(path)]
+        if originals:
+            mirror = [path for path in selected if _in_parquet_conversion(path)]
+            if mirror:
+                skipped = sum(files.get(path) or 0 for path in mirror)
+                logger.info(f"Skipping {len(mirror)} Parquet mirror file(s) ({skipped / (1024**2):.1f} MB)")
+                mirror = set(mirror)
+                selected = [path for path in selected if path not in mirror]
+    
+    return selected
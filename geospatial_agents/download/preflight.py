@@ -0,0 +1,283 @@
+"""
+Download Pre-flight
+Decides whether a URL serves data or an HTML page from its first few KB,
+before the download starts, and remembers the verdict per host and path pattern
+"""
+
+import logging
+from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from urllib.parse import parse_qsl, urlparse
+import json
+import re
+import threading
+import time
+
+import requests
+
+from geospatial_agents.download.engine import DownloadEngine
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of data formats, checked before anything else
+DATA_SIGNATURES = (
+    b"PK\x03\x04",  # zip, kmz, xlsx
+    b"\x1f\x8b",  # gzip
+    b"BZh",  # bzip2
+    b"\xfd7zXZ\x00",  # xz
+    b"7z\xbc\xaf\x27\x1c",  # 7z
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"II*\x00", b"MM\x00*",  # TIFF / GeoTIFF
+    b"II+\x00", b"MM\x00+",  # BigTIFF
+    b"\x89HDF\r\n\x1a\n",  # HDF5 / NetCDF4
+    b"CDF\x01", b"CDF\x02",  # NetCDF classic
+    b"SQLite format 3\x00",  # GeoPackage, SpatiaLite
+    b"PAR1",  # Parquet
+    b"\x00\x00\x27\x0a",  # Shapefile
+    b"GRIB",  # GRIB
+    b"LASF",  # LAS / LAZ
+    b"%PDF",
+    b"\x89PNG",
+    b"\xff\xd8\xff",  # JPEG
+    b"\x00\x00\x00\x0cjP  ",  # JPEG 2000
+)
+
+HTML_MARKERS = (b"<!doctype html", b"<html", b"<head", b"<body")
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+DATA_CONTENT_TYPES = (
+    "application/octet-stream", "application/zip", "application/x-zip", "application/gzip",
+    "application/x-gzip", "application/x-tar", "application/x-bzip2", "application/x-xz",
+    "application/x-7z", "application/x-hdf", "application/x-netcdf", "application/netcdf",
+    "application/json", "application/geo+json", "application/vnd.geo+json",
+    "application/geopackage", "application/x-sqlite3", "application/vnd.google-earth",
+    "application/parquet", "application/vnd.apache.parquet", "application/pdf",
+    "image/tiff", "text/csv", "binary/octet-stream"
+)
+
+# Matching observations before a pattern's verdict is used without probing
+MIN_CONFIRMATIONS = 2
+
+# Compression suffixes kept together with the suffix before them in path patterns
+COMPRESSION_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+
+# Suffixes of server-side scripts, whose responses depend on the query
+SCRIPT_SUFFIXES = (".php", ".asp", ".aspx", ".jsp", ".cgi", ".pl")
+
+# Path segments that identify a record or version rather than a kind of URL
+ID_SEGMENT = re.compile(r"v?\d+(\.\d+)*|[0-9a-f-]{8,}", re.IGNORECASE)
+
+
+def sniff(content: bytes, content_type: str = "") -> str:
+    """
+    Classify the start of a response
+    
+    Magic bytes win over the Content-Type header, which servers often get
+    wrong in both directions.
+    
+    Returns:
+        'data', 'html' or 'unknown'
+    """
+    if content.startswith(DATA_SIGNATURES):
+        return "data"
+    head = content[:1024].lstrip().lower()
+    if any(marker in head for marker in HTML_MARKERS):
+        return "html"
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in HTML_CONTENT_TYPES:
+        return "html"
+    if media_type.startswith(DATA_CONTENT_TYPES):
+        return "data"
+    if head[:1] in (b"{", b"["):
+        # JSON served as text/plain
+        return "data"
+    return "unknown"
+
+
+def file_suffix(segment: str) -> str:
+    """File suffix of a path segment (e.g. '.tif' or '.tar.gz'), '' for endpoints and scripts"""
+    path = PurePosixPath(segment)
+    suffix = path.suffix.lower()
+    if suffix in COMPRESSION_SUFFIXES:
+        suffix = PurePosixPath(path.stem).suffix.lower() + suffix
+    if not re.fullmatch(r"(\.[a-z0-9]{1,8}){1,2}", suffix) or suffix in SCRIPT_SUFFIXES:
+        return ""
+    return suffix
+
+
+def is_file_url(url: str) -> bool:
+    """Whether a URL names a file by its suffix rather than an endpoint or script"""
+    segments = [segment for segment in urlparse(url).path.split("/") if segment]
+    return bool(segments) and bool(file_suffix(segments[-1]))
+
+
+def url_pattern(url: str) -> str:
+    """
+    Host, path and query keys with identifiers generalized, e.g.
+    'zenodo.org/records/*', 'example.com/data/*/*.tif' or 'example.com/get.php?id'
+    
+    Numeric, version and hex-like segments become '*', a file name keeps
+    only its suffix and the query only its sorted keys, so URLs of the same
+    kind share a verdict. Extensionless endpoints and scripts keep their
+    name, since 'files/view' and 'files/download' are different kinds.
+    """
+    parsed = urlparse(url)
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    pattern = []
+    for segment in segments[:-1]:
+        pattern.append("*" if ID_SEGMENT.fullmatch(segment) else segment)
+    if segments:
+        suffix = file_suffix(segments[-1])
+        if suffix:
+            pattern.append(f"*{suffix}")
+        else:
+            pattern.append("*" if ID_SEGMENT.fullmatch(segments[-1]) else segments[-1])
+    keys = sorted({key for key, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    query = f"?{'&'.join(keys)}" if keys else ""
+    return f"{parsed.netloc.lower()}/{'/'.join(pattern)}{query}"
+
+
+@dataclass
+class PreflightResult:
+    """What a pre-flight check learned about a URL"""
+    verdict: str  # 'data', 'html' or 'unknown'
+    content_type: str = ""
+    size: Optional[int] = None  # Total size when the server reported it
+    accepts_ranges: bool = False
+    cached: bool = False  # Verdict came from an earlier URL with the same pattern
+
+
+class Preflight:
+    """Checks URLs before they are downloaded
+    
+    A probe is a single ranged GET for the first probe_bytes: its headers
+    give the content type, total size and Range support, and its body is
+    sniffed for magic bytes or HTML. Servers that ignore Range are only
+    read up to probe_bytes before the connection is dropped. Confirmed
+    verdicts are stored per URL pattern, so later file URLs of the same
+    kind skip the probe once they have been seen serving data
+    MIN_CONFIRMATIONS times; a pattern that has yielded both verdicts is
+    probed URL by URL until its entry expires. HTML verdicts, and any
+    verdict for an endpoint or script without a file suffix, are never
+    taken from the cache: such URLs answer differently with their query,
+    and a probe is much cheaper than sending a data URL to the LLM path.
+    """
+    
+    def __init__(
+        self,
+        engine: DownloadEngine,
+        cache_path: Optional[Path] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        probe_bytes: int = 4096
+    ):
+        """
+        Initialize the pre-flight checker
+        
+        Args:
+            engine: Download engine whose pooled sessions make the probes
+            cache_path: JSON file the verdicts are kept in (None for memory only)
+            ttl_seconds: Age after which a stored verdict is probed again
+            probe_bytes: Bytes requested to sniff the content
+        """
+        self.engine = engine
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.ttl_seconds = ttl_seconds
+        self.probe_bytes = probe_bytes
+        self._lock = threading.Lock()
+        self._verdicts: Dict[str, Dict[str, Any]] = {}
+        if self.cache_path and self.cache_path.exists():
+            try:
+                self._verdicts = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable pre-flight cache {self.cache_path}: {e}")
+    
+    def check(self, url: str, headers: Optional[Dict[str, str]] = None) -> PreflightResult:
+        """Classify a URL from the stored verdict for its pattern or a probe"""
+        key = url_pattern(url)
+        entry = self._entry(key)
+        if entry and entry["verdict"] == "data" and entry["count"] >= MIN_CONFIRMATIONS and is_file_url(url):
+            logger.debug(f"Pre-flight verdict for {key} from cache: {entry['verdict']}")
+            return PreflightResult(verdict=entry["verdict"], cached=True)
+        
+        result = self._probe(url, headers)
+        if result.verdict != "unknown":
+            self.record(url, result.verdict)
+        return result
+    
+    def record(self, url: str, verdict: str) -> None:
+        """Store a confirmed verdict for the URL's pattern"""
+        key = url_pattern(url)
+        entry = self._entry(key)
+        with self._lock:
+            count = 1
+            if entry and entry["verdict"] == verdict:
+                count = entry["count"] + 1
+            elif entry:
+                if entry["verdict"] != "mixed":
+                    logger.info(f"URLs matching {key} serve both data and HTML, probing them individually")
+                verdict = "mixed"
+            self._verdicts[key] = {"verdict": verdict, "count": count, "checked": time.time()}
+            self._save()
+    
+    def _entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored verdict for a pattern unless it has expired"""
+        with self._lock:
+            entry = self._verdicts.get(key)
+        if entry and time.time() - entry.get("checked", 0) < self.ttl_seconds:
+            return dict(entry, count=entry.get("count", 1))
+        return None
+    
+    def _probe(self, url: str, headers: Optional[Dict[str, str]]) -> PreflightResult:
+        probe_headers = dict(headers or {})
+        probe_headers["Range"] = f"bytes=0-{self.probe_bytes - 1}"
+        try:
+            response = self.engine.get(url, headers=probe_headers, stream=True)
+            try:
+                if response.status_code >= 400:
+                    # Let the download itself report the error
+                    return PreflightResult(verdict="unknown")
+                content = b""
+                for chunk in response.iter_content(chunk_size=1024):
+                    content += chunk
+                    if len(content) >= self.probe_bytes:
+                        break
+            finally:
+                response.close()
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"Pre-flight probe of {url} failed: {e}")
+            return PreflightResult(verdict="unknown")
+        
+        content_type = response.headers.get("Content-Type", "")
+        accepts_ranges = response.status_code == 206
+        size = None
+        if accepts_ranges:
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            size = int(total) if total.isdigit() else None
+        elif response.headers.get("Content-Length", "").isdigit():
+            size = int(response.headers["Content-Length"])
+        
+        verdict = sniff(content, content_type)
+        logger.info(
+            f"Pre-flight {url}: {verdict}"
+            + (f" ({content_type.split(';')[0]})" if content_type else "")
+            + (f", {size / (1024**2):.1f} MB" if size else "")
+        )
+        return PreflightResult(
+            verdict=verdict,
+            content_type=content_type,
+            size=size,
+            accepts_ranges=accepts_ranges
+        )
+    
+    def _save(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._verdicts, indent=2), encoding="utf-8")
+            tmp.replace(self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save pre-flight cache: {e}")
@@ -0,0 +1,316 @@
+"""
+Download Scheduler
+Admits downloads against disk quotas before any bytes are fetched and
+gives each tenant its own bandwidth budget
+"""
+
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+from dataclasses import dataclass
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+import asyncio
+import os
+import shutil
+import threading
+import time
+
+from geospatial_agents.download.bandwidth import BandwidthLimiter, limit_bandwidth
+
+logger = logging.getLogger(__name__)
+
+GB = 1024**3
+
+# Seconds a measured directory size is reused
+USAGE_TTL = 30.0
+
+
+class QuotaExceeded(Exception):
+    """A download does not fit the disk quota"""
+
+
+@dataclass
+class Reservation:
+    """Disk space held for a running download"""
+    size: int
+    tenant: str
+    request_id: str
+    label: str
+    large: bool = False
+
+
+def directory_size(path: Path) -> int:
+    """Bytes used by the files under path, counting hardlinked files once"""
+    seen = set()
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                info = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            if (info.st_dev, info.st_ino) in seen:
+                continue
+            seen.add((info.st_dev, info.st_ino))
+            total += info.st_size
+    return total
+
+
+def _gb(size: int) -> str:
+    return f"{size / GB:.2f} GB"
+
+
+class DownloadScheduler:
+    """Gatekeeper for downloads into a work directory
+    
+    Each dataset is admitted with its expected size (Content-Length, Zenodo
+    or HuggingFace file sizes) before it is fetched:
+    
+    - A request (one download step) may not pull more than request_quota_gb.
+    - The downloads directory may not grow beyond global_quota_gb, and at
+      least min_free_gb must stay free on its filesystem. Reclaimers (e.g.
+      an LRU janitor) are asked to free space first; a download that still
+      does not fit waits in a queue while other downloads are running.
+    - Downloads of large_job_gb or more run max_large_jobs at a time.
+    - Transfers inside a slot are charged to their tenant's bandwidth
+      budget as well as to the engine-wide one.
+    
+    Sizes that are unknown up front count as zero, so such downloads are
+    only held back by space that is already used.
+    """
+    
+    def __init__(
+        self,
+        downloads_dir: Path,
+        global_quota_gb: Optional[float] = None,
+        request_quota_gb: Optional[float] = None,
+        tenant_bandwidth_mbps: Optional[float] = None,
+        large_job_gb: Optional[float] = 5.0,
+        max_large_jobs: int = 1,
+        min_free_gb: Optional[float] = 1.0,
+        queue_timeout: float = 600.0
+    ):
+        """
+        Initialize the scheduler
+        
+        Args:
+            downloads_dir: Directory the downloads are written to
+            global_quota_gb: Maximum size of downloads_dir (None for no limit)
+            request_quota_gb: Maximum bytes a single request may download (None for no limit)
+            tenant_bandwidth_mbps: Bandwidth budget per tenant in megabits per second
+                (None for no per-tenant limit)
+            large_job_gb: Size from which downloads are serialized (None to disable)
+            max_large_jobs: Large downloads allowed at once
+            min_free_gb: Free space to leave on the filesystem (None to not check)
+            queue_timeout: Seconds a download waits for space or a large-job slot
+        """
+        self.downloads_dir = Path(downloads_dir)
+        self.global_quota = int(global_quota_gb * GB) if global_quota_gb else None
+        self.request_quota = int(request_quota_gb * GB) if request_quota_gb else None
+        self.tenant_bandwidth_mbps = tenant_bandwidth_mbps
+        self.large_job_bytes = int(large_job_gb * GB) if large_job_gb else None
+        self.min_free = int(min_free_gb * GB) if min_free_gb is not None else None
+        self.queue_timeout = queue_timeout
+        
+        self._condition = threading.Condition()
+        self._large_slots = threading.BoundedSemaphore(max(1, max_large_jobs))
+        self._reservations: List[Reservation] = []
+        self._requested: Dict[str, int] = defaultdict(int)
+        self._limiters: Dict[str, BandwidthLimiter] = {}
+        self._reclaimers: List[Callable[[int], int]] = []
+        self._used: Optional[int] = None
+        self._measured = 0.0
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0}
+    
+    def add_reclaimer(self, reclaim: Callable[[int], int]) -> None:
+        """Register a callable that tries to free the given bytes and returns the bytes freed"""
+        self._reclaimers.append(reclaim)
+    
+    def bandwidth_for(self, tenant: str) -> Optional[BandwidthLimiter]:
+        """The tenant's bandwidth budget (created on first use)"""
+        if not self.tenant_bandwidth_mbps:
+            return None
+        with self._condition:
+            if tenant not in self._limiters:
+                self._limiters[tenant] = BandwidthLimiter.from_mbps(self.tenant_bandwidth_mbps)
+            return self._limiters[tenant]
+    
+    @contextmanager
+    def slot(
+        self,
+        size: Optional[int],
+        tenant: str = "default",
+        request_id: str = "",
+        label: str = ""
+    ) -> Iterator[Reservation]:
+        """Hold an admission for the duration of a download, charging its transfers to the tenant"""
+        reservation = self.admit(size, tenant, request_id, label)
+        try:
+            with limit_bandwidth(self.bandwidth_for(tenant)):
+                yield reservation
+        finally:
+            self.release(reservation)
+    
+    @asynccontextmanager
+    async def aslot(
+        self,
+        size: Optional[int],
+        tenant: str = "default",
+        request_id: str = "",
+        label: str = ""
+    ) -> AsyncIterator[Reservation]:
+        """Like slot(), waiting for admission without blocking the event loop"""
+        reservation = await asyncio.to_thread(self.admit, size, tenant, request_id, label)
+        try:
+            with limit_bandwidth(self.bandwidth_for(tenant)):
+                yield reservation
+        finally:
+            self.release(reservation)
+    
+    def admit(
+        self,
+        size: Optional[int],
+        tenant: str = "default",
+        request_id: str = "",
+        label: str = ""
+    ) -> Reservation:
+        """
+        Reserve space for a download, waiting in the queue if necessary
+        
+        Raises:
+            QuotaExceeded: If the download can never fit, or no space was
+                freed within queue_timeout
+        """
+        size = max(0, int(size or 0))
+        label = label or "download"
+        with self._condition:
+            if self.request_quota and self._requested[request_id] + size > self.request_quota:
+                self._stats["rejected"] += 1
+                raise QuotaExceeded(
+                    f"{label} ({_gb(size)}) would exceed the per-request download quota of "
+                    f"{_gb(self.request_quota)} ({_gb(self._requested[request_id])} already requested)"
+                )
+            if self.global_quota and size > self.global_quota:
+                self._stats["rejected"] += 1
+                raise QuotaExceeded(f"{label} ({_gb(size)}) is larger than the download quota of {_gb(self.global_quota)}")
+            # Counted now so concurrent downloads of the same request see each other
+            self._requested[request_id] += size
+        
+        deadline = time.monotonic() + self.queue_timeout
+        large = bool(self.large_job_bytes and size >= self.large_job_bytes)
+        try:
+            if large:
+                if not self._large_slots.acquire(blocking=False):
+                    logger.info(f"Queueing {label} ({_gb(size)}) until a running large download finishes")
+                    with self._condition:
+                        self._stats["queued"] += 1
+                    if not self._large_slots.acquire(timeout=self.queue_timeout):
+                        raise QuotaExceeded(f"Timed out waiting to start large download {label} ({_gb(size)})")
+            try:
+                self._wait_for_space(size, label, deadline)
+            except QuotaExceeded:
+                if large:
+                    self._large_slots.release()
+                raise
+        except QuotaExceeded:
+            with self._condition:
+                self._requested[request_id] -= size
+                self._stats["rejected"] += 1
+            raise
+        
+        reservation = Reservation(size=size, tenant=tenant, request_id=request_id, label=label, large=large)
+        with self._condition:
+            self._reservations.append(reservation)
+            self._stats["admitted"] += 1
+        if size:
+            logger.info(f"Admitted {label} ({_gb(size)}) for tenant {tenant}")
+        return reservation
+    
+    def release(self, reservation: Reservation) -> None:
+        """Return a reservation once its download has finished or failed"""
+        with self._condition:
+            if reservation in self._reservations:
+                self._reservations.remove(reservation)
+            # Re-measure: the download is on disk now, or was removed
+            self._used = None
+            self._condition.notify_all()
+        if reservation.large:
+            self._large_slots.release()
+    
+    def end_request(self, request_id: str) -> None:
+        """Forget a finished request's quota usage"""
+        with self._condition:
+            self._requested.pop(request_id, None)
+    
+    def refresh(self) -> None:
+        """Re-measure disk usage (e.g. after files were deleted) and wake queued downloads"""
+        with self._condition:
+            self._used = None
+            self._condition.notify_all()
+    
+    def usage(self) -> Dict[str, Any]:
+        """Return used, reserved and quota bytes plus admission counters"""
+        with self._condition:
+            return dict(
+                self._stats,
+                used_bytes=self._used_bytes(),
+                reserved_bytes=sum(r.size for r in self._reservations),
+                running=len(self._reservations),
+                global_quota_bytes=self.global_quota,
+                request_quota_bytes=self.request_quota
+            )
+    
+    def _wait_for_space(self, size: int, label: str, deadline: float) -> None:
+        reclaimed = False
+        queued = False
+        with self._condition:
+            while True:
+                shortfall = self._shortfall(size)
+                if not shortfall:
+                    return
+                if not reclaimed and self._reclaimers:
+                    reclaimed = True
+                    self._condition.release()
+                    try:
+                        freed = sum(reclaim(shortfall) for reclaim in self._reclaimers)
+                    finally:
+                        self._condition.acquire()
+                    if freed:
+                        logger.info(f"Reclaimed {_gb(freed)} for {label}")
+                        self._used = None
+                        continue
+                remaining = deadline - time.monotonic()
+                if not self._reservations or remaining <= 0:
+                    raise QuotaExceeded(
+                        f"Not enough download space for {label}: {_gb(shortfall)} over the quota "
+                        f"({_gb(self._used_bytes())} used, {_gb(sum(r.size for r in self._reservations))} reserved)"
+                    )
+                if not queued:
+                    logger.info(f"Queueing {label} ({_gb(size)}): waiting for {len(self._reservations)} running download(s)")
+                    self._stats["queued"] += 1
+                    queued = True
+                self._condition.wait(remaining)
+                self._used = None
+                reclaimed = False
+    
+    def _shortfall(self, size: int) -> int:
+        """Bytes missing for a download of size to fit (0 if it fits); caller holds the lock"""
+        reserved = sum(r.size for r in self._reservations)
+        shortfall = 0
+        if self.global_quota:
+            shortfall = max(0, self._used_bytes() + reserved + size - self.global_quota)
+        if self.min_free is not None and size:
+            try:
+                free = shutil.disk_usage(self.downloads_dir).free
+            except OSError:
+                free = None
+            if free is not None:
+                shortfall = max(shortfall, reserved + size + self.min_free - free)
+        return shortfall
+    
+    def _used_bytes(self) -> int:
+        if self._used is None or time.monotonic() - self._measured > USAGE_TTL:
+            self._used = directory_size(self.downloads_dir) if self.downloads_dir.exists() else 0
+            self._measured = time.monotonic()
+        return self._used
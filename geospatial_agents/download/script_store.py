@@ -0,0 +1,180 @@
+"""
+Download Script Store
+Keeps LLM-generated download scripts that worked, per host, for reuse on later
+downloads from the same portal, and remembers the ones that failed
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+from urllib.parse import urlparse
+import hashlib
+import json
+import threading
+import time
+
+from geospatial_agents.download.preflight import sniff
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failures after which a stored script is retired
+MAX_FAILURES = 3
+
+# Files inspected when validating a downloaded directory
+MAX_VALIDATED_FILES = 20
+
+# Errors of failed scripts kept per host for new generation prompts
+MAX_FAILURE_NOTES = 5
+
+
+def host_key(url: str) -> str:
+    """Host a script is stored under ('www.' and the port are ignored)"""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def script_id(code: str) -> str:
+    """Identity of a script, insensitive to whitespace changes"""
+    normalized = "\n".join(line.rstrip() for line in code.strip().splitlines() if line.strip())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def validate_download(result_path: Any) -> Optional[Path]:
+    """
+    Check that a script produced data: result_path exists and is not an HTML page
+    
+    Returns:
+        The path if it holds data, else None
+    """
+    if not result_path:
+        return None
+    path = Path(result_path)
+    if not path.exists():
+        logger.warning(f"Download script reported {path}, which does not exist")
+        return None
+    files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())[:MAX_VALIDATED_FILES]
+    for file_path in files:
+        if file_path.stat().st_size == 0:
+            continue
+        with open(file_path, "rb") as f:
+            if sniff(f.read(8192)) != "html":
+                return path
+    logger.warning(f"Download script produced no data at {path} (empty or HTML only)")
+    return None
+
+
+class DownloadScriptStore:
+    """Per-host store of validated download scripts
+    
+    Scripts read the dataset from the SOURCE_URL, DATASET_NAME and
+    OUTPUT_DIR variables instead of hard-coding them, so a script that
+    downloaded one dataset from a portal can be run again for another.
+    Stored scripts are tried most-successful first; one that keeps failing
+    is retired, and the identities of failed scripts are kept so the same
+    code is never run again for that host. The latest failures' errors are
+    kept too, to tell the LLM what did not work when it writes a new script.
+    """
+    
+    def __init__(self, root: Path):
+        """
+        Initialize the store
+        
+        Args:
+            root: Directory holding the scripts and their index
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = {}
+        if self.index_path.exists():
+            try:
+                self._index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring unreadable download script index {self.index_path}: {e}")
+    
+    def candidates(self, url: str) -> List[Tuple[str, str]]:
+        """Stored (script id, code) pairs for the URL's host, most successful first"""
+        host = host_key(url)
+        with self._lock:
+            scripts = dict(self._host(host)["scripts"])
+        ranked = sorted(scripts.items(), key=lambda item: (-item[1]["successes"], item[1]["failures"]))
+        candidates = []
+        for sid, _ in ranked:
+            path = self._script_path(host, sid)
+            if path.exists():
+                candidates.append((sid, path.read_text(encoding="utf-8")))
+        return candidates
+    
+    def is_known_failure(self, url: str, code: str) -> bool:
+        """Whether this exact script already failed for the URL's host"""
+        with self._lock:
+            return script_id(code) in self._host(host_key(url))["failed"]
+    
+    def failures(self, url: str) -> List[Tuple[str, str]]:
+        """(script id, error) of the latest scripts that failed for the URL's host, oldest first"""
+        with self._lock:
+            return list(self._host(host_key(url)).get("errors", {}).items())
+    
+    def record_success(self, url: str, code: str) -> None:
+        """Keep a script that produced valid data"""
+        host = host_key(url)
+        sid = script_id(code)
+        path = self._script_path(host, sid)
+        with self._lock:
+            entry = self._host(host)["scripts"].setdefault(sid, {"successes": 0, "failures": 0})
+            entry["successes"] += 1
+            entry["failures"] = 0
+            entry["last_used"] = time.time()
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(code, encoding="utf-8")
+                logger.info(f"Stored download script {sid} for {host}")
+            self._save()
+    
+    def record_failure(self, url: str, code: str, error: Optional[str] = None) -> None:
+        """Count a failure; new scripts and scripts failing MAX_FAILURES times in a row are blacklisted"""
+        host = host_key(url)
+        sid = script_id(code)
+        with self._lock:
+            record = self._host(host)
+            entry = record["scripts"].get(sid)
+            if entry is not None:
+                entry["failures"] += 1
+                if entry["failures"] < MAX_FAILURES:
+                    self._save()
+                    return
+                logger.info(f"Retiring download script {sid} for {host} after {entry['failures']} failures")
+                del record["scripts"][sid]
+                try:
+                    self._script_path(host, sid).unlink()
+                except OSError:
+                    pass
+            if sid not in record["failed"]:
+                record["failed"].append(sid)
+            errors = record.setdefault("errors", {})
+            errors.pop(sid, None)
+            errors[sid] = (error or "unknown error")[:500]
+            for old_sid in list(errors)[:-MAX_FAILURE_NOTES]:
+                del errors[old_sid]
+            self._save()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return stored and failed script counts"""
+        with self._lock:
+            return {
+                "hosts": len(self._index),
+                "scripts": sum(len(record["scripts"]) for record in self._index.values()),
+                "failed": sum(len(record["failed"]) for record in self._index.values())
+            }
+    
+    def _host(self, host: str) -> Dict[str, Any]:
+        return self._index.setdefault(host, {"scripts": {}, "failed": [], "errors": {}})
+    
+    def _script_path(self, host: str, sid: str) -> Path:
+        return self.root / (host or "_") / f"{sid}.py"
+    
+    def _save(self) -> None:
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._index, indent=2), encoding="utf-8")
+        tmp_path.replace(self.index_path)
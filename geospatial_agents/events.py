@@ -0,0 +1,108 @@
+"""
+Workflow Events
+Typed progress events streamed from the orchestrator while a workflow runs
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+from contextvars import ContextVar
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkflowEvent:
+    """Base class for all workflow events"""
+    timestamp: float = field(default_factory=time.time, init=False)
+    
+    @property
+    def kind(self) -> str:
+        return self.__class__.__name__
+
+
+@dataclass
+class PlanReadyEvent(WorkflowEvent):
+    """The planner produced the workflow plan"""
+    plan: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class StepStartedEvent(WorkflowEvent):
+    """A workflow step began executing"""
+    step_index: int = 0
+    step_type: str = ""
+    description: str = ""
+    total_steps: int = 0
+
+
+@dataclass
+class StepFinishedEvent(WorkflowEvent):
+    """A workflow step finished, successfully or not"""
+    step_index: int = 0
+    step_type: str = ""
+    errors: List[str] = field(default_factory=list)
+    
+    @property
+    def success(self) -> bool:
+        return not self.errors
+
+
+@dataclass
+class SearchResultsEvent(WorkflowEvent):
+    """Search results; partial results arrive before LLM enhancement"""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    partial: bool = False
+    step_index: Optional[int] = None
+
+
+@dataclass
+class DownloadProgressEvent(WorkflowEvent):
+    """Aggregate byte progress of a running download"""
+    total_files: int = 0
+    completed_files: int = 0
+    failed_files: int = 0
+    total_bytes: int = 0
+    downloaded_bytes: int = 0
+    elapsed_seconds: float = 0.0
+    bytes_per_second: float = 0.0
+
+
+@dataclass
+class ArtifactEvent(WorkflowEvent):
+    """A step produced an output (downloaded dataset, processed file, map, export)"""
+    artifact_type: str = ""
+    name: str = ""
+    path: str = ""
+    step_index: Optional[int] = None
+
+
+@dataclass
+class WorkflowFinishedEvent(WorkflowEvent):
+    """The workflow completed; result is the dict returned by execute()"""
+    result: Dict[str, Any] = field(default_factory=dict)
+
+
+# Sink receiving the events of the workflow running in the current context.
+# Context variables follow asyncio tasks and asyncio.to_thread, so agents can
+# emit events without the sink being passed through every call.
+_event_sink: ContextVar[Optional[Callable[[WorkflowEvent], None]]] = ContextVar(
+    "geoagent_event_sink", default=None
+)
+
+
+def set_event_sink(sink: Optional[Callable[[WorkflowEvent], None]]) -> None:
+    """Route events emitted in the current context to sink"""
+    _event_sink.set(sink)
+
+
+def emit(event: WorkflowEvent) -> None:
+    """Send an event to the current sink, if anyone is listening"""
+    sink = _event_sink.get()
+    if sink is None:
+        return
+    try:
+        sink(event)
+    except Exception as e:
+        logger.debug(f"Event sink failed for {event.kind}: {e}")
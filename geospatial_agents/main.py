@@ -15,12 +15,38 @@ if __name__ == "__main__":
         sys.path.insert(0, str(parent_dir))
 
 from geospatial_agents.orchestrator_langgraph import GeoOrchestratorLangGraph
+from geospatial_agents.events import (
+    SearchResultsEvent,
+    DownloadProgressEvent,
+    ArtifactEvent,
+    WorkflowFinishedEvent
+)
 
 # Set logging level to WARNING to hide INFO messages
 logging.basicConfig(level=logging.WARNING, format='%(levelname)s:%(name)s:%(message)s')
 logger = logging.getLogger(__name__)
 
 
+def print_event(event) -> None:
+    """Show streamed progress that the step banners don't cover"""
+    if isinstance(event, SearchResultsEvent) and event.partial:
+        print(f"   ⏳ {len(event.results)} candidate dataset(s), adding metadata...")
+        for dataset in event.results[:5]:
+            print(f"      - {dataset.get('name', 'Unknown Dataset')}")
+    elif isinstance(event, DownloadProgressEvent):
+        total = f"/{event.total_bytes / (1024**2):.1f}" if event.total_bytes else ""
+        print(
+            f"\r   ⏬ {event.downloaded_bytes / (1024**2):.1f}{total} MB "
+            f"({event.bytes_per_second / (1024**2):.1f} MB/s)",
+            end="",
+            flush=True
+        )
+        if event.completed_files + event.failed_files >= event.total_files:
+            print()
+    elif isinstance(event, ArtifactEvent) and event.artifact_type in ("processed", "download"):
+        print(f"   📄 {event.artifact_type}: {event.path}")
+
+
 def main():
     """Main entry point"""
     print("=" * 70)
@@ -63,8 +89,13 @@ def main():
             
             print("\n🔄 Processing workflow...\n")
             
-            # Execute workflow
-            result = orchestrator.execute(user_input)
+            # Execute workflow, showing progress as it streams in
+            result = {}
+            for event in orchestrator.stream(user_input):
+                if isinstance(event, WorkflowFinishedEvent):
+                    result = event.result
+                else:
+                    print_event(event)
             
             # Display results
             print("\n" + "=" * 70)
@@ -4,16 +4,20 @@ Multi-agent orchestration for geospatial data science workflows
 """
 
 import logging
-from typing import TypedDict, Annotated, Sequence, Optional
+import asyncio
+from typing import TypedDict, Annotated, Sequence, Optional, Iterator, AsyncIterator
 from typing_extensions import Literal
 import operator
+import queue
+import threading
+import contextvars
+import weakref
 from pathlib import Path
 import json
 
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from langchain_core.runnables import RunnableLambda
 
 try:
     # Try relative imports first (when used as a package)
@@ -25,6 +29,26 @@ try:
     from .agents.analysis_agent import AnalysisAgent
     from .agents.visualization_agent import VisualizationAgent
     from .agents.export_agent import ExportAgent
+    from .utils.llm_cache import LLMResponseCache, CachedChatModel
+    from .utils.code_cache import CodeCache
+    from .utils.workspace_janitor import WorkspaceJanitor
+    from .sandbox import SandboxPool
+    from .download.blob_store import BlobStore
+    from .download.script_store import DownloadScriptStore
+    from .download.scheduler import DownloadScheduler
+    from .search.dataset_index import DatasetIndex
+    from .search.enrichment_store import EnrichmentStore
+    from .events import (
+        emit,
+        set_event_sink,
+        WorkflowEvent,
+        PlanReadyEvent,
+        StepStartedEvent,
+        StepFinishedEvent,
+        SearchResultsEvent,
+        ArtifactEvent,
+        WorkflowFinishedEvent
+    )
 except ImportError:
     # Fall back to absolute imports (when run directly)
     from geospatial_agents.agents.search_agent import SearchAgent
@@ -35,6 +59,26 @@ except ImportError:
     from geospatial_agents.agents.analysis_agent import AnalysisAgent
     from geospatial_agents.agents.visualization_agent import VisualizationAgent
     from geospatial_agents.agents.export_agent import ExportAgent
+    from geospatial_agents.utils.llm_cache import LLMResponseCache, CachedChatModel
+    from geospatial_agents.utils.code_cache import CodeCache
+    from geospatial_agents.utils.workspace_janitor import WorkspaceJanitor
+    from geospatial_agents.sandbox import SandboxPool
+    from geospatial_agents.download.blob_store import BlobStore
+    from geospatial_agents.download.script_store import DownloadScriptStore
+    from geospatial_agents.download.scheduler import DownloadScheduler
+    from geospatial_agents.search.dataset_index import DatasetIndex
+    from geospatial_agents.search.enrichment_store import EnrichmentStore
+    from geospatial_agents.events import (
+        emit,
+        set_event_sink,
+        WorkflowEvent,
+        PlanReadyEvent,
+        StepStartedEvent,
+        StepFinishedEvent,
+        SearchResultsEvent,
+        ArtifactEvent,
+        WorkflowFinishedEvent
+    )
 
 logger = logging.getLogger(__name__)
 
@@ -61,13 +105,75 @@ class WorkflowState(TypedDict):
 class GeoOrchestratorLangGraph:
     """LangGraph-based orchestrator for geospatial workflows"""
     
+    # State keys a step may add to, merged back after each step in 'dag' mode
+    MERGED_STATE_KEYS = (
+        "search_results", "downloaded_data", "processed_data", "spatial_queries",
+        "transformations", "analysis_results", "visualizations", "exports",
+        "errors", "messages", "final_outputs"
+    )
+    
+    # Step type -> (agent attribute, label used in error messages)
+    STEP_AGENTS = {
+        "search": ("search_agent", "Search"),
+        "download": ("download_agent", "Download"),
+        "spatial_query": ("spatial_query_agent", "Spatial query"),
+        "transform": ("transform_agent", "Transform"),
+        "process": ("process_agent", "Process"),
+        "analysis": ("analysis_agent", "Analysis"),
+        "visualization": ("visualization_agent", "Visualization"),
+        "export": ("export_agent", "Export")
+    }
+    
+    # Agent attributes, created on first access
+    AGENT_ATTRS = tuple(agent_attr for agent_attr, _ in STEP_AGENTS.values())
+    
+    # Step types whose agents execute generated code
+    CODE_STEP_TYPES = ("spatial_query", "transform", "process", "analysis", "visualization", "export")
+    
+    # State key -> artifact type reported when a step adds entries to it
+    ARTIFACT_STATE_KEYS = {
+        "downloaded_data": "download",
+        "processed_data": "processed",
+        "visualizations": "visualization",
+        "exports": "export"
+    }
+    
     def __init__(
         self,
         llm_api_key: str = None,
         llm_model: str = "gpt-4o-mini",
         llm_provider: str = "openai",
         tavily_api_key: str = None,
-        work_dir: str = "./geospatial_data"
+        work_dir: str = "./geospatial_data",
+        execution_mode: str = "sequential",
+        max_parallel_steps: int = 4,
+        llm_cache: bool = True,
+        llm_cache_ttl: Optional[float] = 7 * 24 * 3600,
+        llm_cache_max_mb: int = 256,
+        code_cache: bool = True,
+        enrichment_cache: bool = True,
+        enrichment_cache_ttl: Optional[float] = 30 * 24 * 3600,
+        tavily_cache_ttl: Optional[float] = 3600,
+        dataset_index: bool = True,
+        local_search_min_results: int = 3,
+        search_mode: str = "single",
+        search_deadline: float = 10.0,
+        max_concurrent_downloads: int = 3,
+        download_bandwidth_mbps: Optional[float] = None,
+        download_quota_gb: Optional[float] = None,
+        download_request_quota_gb: Optional[float] = None,
+        tenant_bandwidth_mbps: Optional[float] = None,
+        tenant: str = "default",
+        workspace_max_gb: Optional[float] = None,
+        janitor_interval: float = 600.0,
+        huggingface_download_mode: str = "native",
+        blob_store: bool = True,
+        extract_geospatial_only: bool = True,
+        code_sandbox: bool = True,
+        sandbox_workers: int = 2,
+        sandbox_timeout: float = 600,
+        sandbox_cpu_seconds: Optional[float] = 300,
+        sandbox_memory_mb: Optional[int] = 8192
     ):
         """
         Initialize the orchestrator
@@ -78,6 +184,44 @@ class GeoOrchestratorLangGraph:
             llm_provider: LLM provider ('openai', 'anthropic')
             tavily_api_key: API key for Tavily search
             work_dir: Working directory for data
+            execution_mode: 'sequential' runs steps one at a time, 'dag' runs
+                independent steps concurrently based on their dependencies
+            max_parallel_steps: Maximum number of steps running at once in 'dag' mode
+            llm_cache: Cache LLM responses on disk under work_dir/.cache (code-generation
+                responses are not cached; code that ran is kept by code_cache)
+            llm_cache_ttl: Time-to-live for cached LLM responses in seconds (None to never expire)
+            llm_cache_max_mb: Maximum size of the LLM response cache in megabytes
+            code_cache: Reuse generated code that ran successfully for the same task and input schemas,
+                and LLM-generated download scripts per host
+            enrichment_cache: Remember LLM-generated metadata per dataset URL across searches
+            enrichment_cache_ttl: Seconds before stored dataset metadata is regenerated (None to keep forever)
+            tavily_cache_ttl: Seconds to reuse a Tavily response for an identical query (None or 0 to disable)
+            dataset_index: Answer searches from a local index of known datasets before searching remotely
+            local_search_min_results: Confident local matches needed to skip remote search
+            search_mode: 'single' (Tavily, or the LLM without a key) or 'federated' (Tavily, LLM,
+                HuggingFace Hub and Zenodo queried concurrently)
+            search_deadline: Seconds federated search waits for slow providers
+            max_concurrent_downloads: Datasets downloaded at once in a download step
+            download_bandwidth_mbps: Total download bandwidth budget in megabits per second (None for unlimited)
+            download_quota_gb: Maximum size of work_dir/downloads; larger downloads are rejected
+                and others wait for space (None for no limit)
+            download_request_quota_gb: Maximum data a single download step may fetch (None for no limit)
+            tenant_bandwidth_mbps: Bandwidth budget per tenant in megabits per second (None for no limit)
+            tenant: Tenant downloads are charged to (a step's 'tenant' parameter overrides it)
+            workspace_max_gb: Size budget of downloads, exports and visualizations; a background
+                janitor evicts the least recently used ones no running workflow uses (None to keep all)
+            janitor_interval: Seconds between the janitor's size checks
+            huggingface_download_mode: 'native' fetches only the needed files in-process,
+                'cli' downloads whole repositories with huggingface-cli
+            blob_store: Store downloaded files once by content under work_dir/.cache/blobs and
+                hardlink/reflink them into dataset directories
+            extract_geospatial_only: Extract only geospatial members (data, sidecars, docs) from
+                downloaded archives
+            code_sandbox: Run generated code in pre-warmed worker processes instead of in-process exec()
+            sandbox_workers: Number of sandbox worker processes
+            sandbox_timeout: Wall-clock limit per generated-code run in seconds
+            sandbox_cpu_seconds: CPU time limit per generated-code run (None for no limit)
+            sandbox_memory_mb: Memory (address space) limit per sandbox worker (None for no limit)
         """
         import os
         
@@ -87,82 +231,225 @@ class GeoOrchestratorLangGraph:
         self.tavily_api_key = tavily_api_key or os.getenv("TAVILY_API_KEY")
         self.work_dir = Path(work_dir)
         self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.execution_mode = execution_mode.lower()
+        self.max_parallel_steps = max(1, max_parallel_steps)
+        
+        if self.execution_mode not in ("sequential", "dag"):
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
         
         # Initialize LLM
+        self.llm = self._create_llm()
+        
+        # Put the response cache in front of the LLM shared by all agents
+        self.llm_cache = None
+        if llm_cache:
+            self.llm_cache = LLMResponseCache(
+                cache_dir=self.work_dir / ".cache",
+                ttl_seconds=llm_cache_ttl,
+                max_bytes=llm_cache_max_mb * 1024 * 1024
+            )
+            self.llm = CachedChatModel(
+                self.llm,
+                self.llm_cache,
+                provider=self.llm_provider,
+                model=self.llm_model,
+                temperature=0.3
+            )
+        
+        # Generated code shared by the code-executing agents
+        self.code_cache = CodeCache(self.work_dir / ".cache" / "code") if code_cache else None
+        # Download scripts the LLM wrote that worked, reused per host
+        self.download_scripts = DownloadScriptStore(self.work_dir / ".cache" / "download_scripts") if code_cache else None
+        
+        # Per-URL search result metadata, so known datasets skip the enrichment LLM call
+        self.tavily_cache_ttl = tavily_cache_ttl
+        self.enrichment_store = None
+        if enrichment_cache:
+            self.enrichment_store = EnrichmentStore(
+                self.work_dir / ".cache" / "enrichment.sqlite",
+                max_age_seconds=enrichment_cache_ttl
+            )
+        
+        # Content-addressed storage shared by all downloads
+        self.blob_store = BlobStore(self.work_dir / ".cache" / "blobs") if blob_store else None
+        # Admits downloads by their expected size against the disk quotas
+        self.download_scheduler = DownloadScheduler(
+            self.work_dir / "downloads",
+            global_quota_gb=download_quota_gb,
+            request_quota_gb=download_request_quota_gb,
+            tenant_bandwidth_mbps=tenant_bandwidth_mbps
+        )
+        self.tenant = tenant
+        # LRU eviction of datasets and outputs that no running workflow uses
+        self.janitor = WorkspaceJanitor(self.work_dir, max_gb=workspace_max_gb, on_evict=self._after_eviction)
+        self.download_scheduler.add_reclaimer(self.janitor.reclaim)
+        if workspace_max_gb:
+            self.janitor.start(janitor_interval)
+        
+        # Local catalog of datasets, seeded from geo_databases.md and grown from search results
+        self.local_search_min_results = local_search_min_results
+        self.search_mode = search_mode
+        self.search_deadline = search_deadline
+        self.max_concurrent_downloads = max_concurrent_downloads
+        self.download_bandwidth_mbps = download_bandwidth_mbps
+        self.huggingface_download_mode = huggingface_download_mode
+        self.extract_geospatial_only = extract_geospatial_only
+        self.dataset_index = None
+        if dataset_index:
+            self.dataset_index = DatasetIndex(self.work_dir / ".cache" / "dataset_index.sqlite")
+        
+        # Isolated worker processes for generated code, started once a plan needs them
+        self.sandbox = None
+        if code_sandbox:
+            self.sandbox = SandboxPool(
+                max_workers=sandbox_workers,
+                cpu_seconds=sandbox_cpu_seconds,
+                memory_mb=sandbox_memory_mb,
+                timeout=sandbox_timeout
+            )
+            # Stops the workers when the orchestrator is garbage collected or at interpreter
+            # exit if close() was never called
+            self._sandbox_finalizer = weakref.finalize(self, self.sandbox.close)
+        
+        # Agents are created on first use (see _create_agent), so a request only
+        # pays for the agents its plan actually needs
+        self._agent_lock = threading.Lock()
+        
+        # Step type -> node function, shared by the graph and the DAG executor
+        self.step_handlers = {
+            "search": self._execute_search,
+            "download": self._execute_download,
+            "spatial_query": self._execute_spatial_query,
+            "transform": self._execute_transform,
+            "process": self._execute_process,
+            "analysis": self._execute_analysis,
+            "visualization": self._execute_visualization,
+            "export": self._execute_export
+        }
+        
+        # Build workflow graph
+        self.workflow = self._build_workflow()
+        
+        logger.info("GeoOrchestratorLangGraph initialized")
+    
+    def close(self) -> None:
+        """Stop the sandbox worker processes and the janitor's background thread"""
+        if self.sandbox:
+            self._sandbox_finalizer()
+        self.janitor.stop()
+    
+    def __enter__(self) -> "GeoOrchestratorLangGraph":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _after_eviction(self) -> None:
+        """Free blobs only the evicted datasets used and let queued downloads re-check the space"""
+        if self.blob_store:
+            self.blob_store.gc()
+        self.download_scheduler.refresh()
+    
+    def _create_llm(self):
+        """Create the chat model, importing only the configured provider's SDK"""
         if self.llm_provider == "openai":
-            self.llm = ChatOpenAI(
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(
                 api_key=self.llm_api_key,
                 model=self.llm_model,
                 temperature=0.3
             )
         elif self.llm_provider == "anthropic":
-            self.llm = ChatAnthropic(
+            from langchain_anthropic import ChatAnthropic
+            return ChatAnthropic(
                 api_key=self.llm_api_key,
                 model=self.llm_model,
                 temperature=0.3
             )
         else:
-            raise ValueError(f"Unknown provider: {llm_provider}")
+            raise ValueError(f"Unknown provider: {self.llm_provider}")
+    
+    def __getattr__(self, name: str):
+        # Only called for missing attributes: build agents lazily on first access
+        if name in self.AGENT_ATTRS and "_agent_lock" in self.__dict__:
+            with self._agent_lock:
+                if name not in self.__dict__:
+                    self.__dict__[name] = self._create_agent(name)
+            return self.__dict__[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+    
+    def _create_agent(self, name: str):
+        """Create the agent stored under attribute name"""
+        logger.debug(f"Creating {name}")
+        if name == "search_agent":
+            return SearchAgent(
+                llm=self.llm,
+                tavily_api_key=self.tavily_api_key,
+                work_dir=self.work_dir,
+                enrichment_store=self.enrichment_store,
+                tavily_cache_ttl=self.tavily_cache_ttl,
+                dataset_index=self.dataset_index,
+                local_min_results=self.local_search_min_results,
+                search_mode=self.search_mode,
+                search_deadline=self.search_deadline
+            )
+        if name == "download_agent":
+            return DownloadAgent(
+                llm=self.llm,
+                work_dir=self.work_dir,
+                max_concurrent_datasets=self.max_concurrent_downloads,
+                bandwidth_limit_mbps=self.download_bandwidth_mbps,
+                huggingface_mode=self.huggingface_download_mode,
+                blob_store=self.blob_store,
+                script_store=self.download_scripts,
+                extract_geospatial_only=self.extract_geospatial_only,
+                scheduler=self.download_scheduler,
+                tenant=self.tenant,
+                janitor=self.janitor
+            )
         
-        # Initialize agents
-        self.search_agent = SearchAgent(
-            llm=self.llm,
-            tavily_api_key=self.tavily_api_key,
-            work_dir=self.work_dir
-        )
-        self.download_agent = DownloadAgent(
-            llm=self.llm,
-            work_dir=self.work_dir
-        )
-        self.spatial_query_agent = SpatialQueryAgent(
-            llm=self.llm,
-            work_dir=self.work_dir
-        )
-        self.transform_agent = TransformAgent(
-            llm=self.llm,
-            work_dir=self.work_dir
-        )
-        self.process_agent = ProcessAgent(
-            llm=self.llm,
-            work_dir=self.work_dir
-        )
-        self.analysis_agent = AnalysisAgent(
-            llm=self.llm,
-            work_dir=self.work_dir
-        )
-        self.visualization_agent = VisualizationAgent(
-            llm=self.llm,
-            work_dir=self.work_dir
-        )
-        self.export_agent = ExportAgent(
+        code_agents = {
+            "spatial_query_agent": SpatialQueryAgent,
+            "transform_agent": TransformAgent,
+            "process_agent": ProcessAgent,
+            "analysis_agent": AnalysisAgent,
+            "visualization_agent": VisualizationAgent,
+            "export_agent": ExportAgent
+        }
+        return code_agents[name](
             llm=self.llm,
-            work_dir=self.work_dir
+            work_dir=self.work_dir,
+            code_cache=self.code_cache,
+            sandbox=self.sandbox
         )
-        
-        # Build workflow graph
-        self.workflow = self._build_workflow()
-        
-        logger.info("GeoOrchestratorLangGraph initialized")
     
     def _build_workflow(self) -> StateGraph:
         """Build the LangGraph workflow"""
         workflow = StateGraph(WorkflowState)
         
-        # Add nodes
-        workflow.add_node("planner", self._plan_workflow)
-        workflow.add_node("search", self._execute_search)
-        workflow.add_node("download", self._execute_download)
-        workflow.add_node("spatial_query", self._execute_spatial_query)
-        workflow.add_node("transform", self._execute_transform)
-        workflow.add_node("process", self._execute_process)
-        workflow.add_node("analysis", self._execute_analysis)
-        workflow.add_node("visualization", self._execute_visualization)
-        workflow.add_node("export", self._execute_export)
-        workflow.add_node("router", self._route_next_step)
+        # Add nodes; each node also has an async implementation used by aexecute()
+        workflow.add_node("planner", RunnableLambda(self._plan_workflow, afunc=self._aplan_workflow))
         
         # Set entry point
         workflow.set_entry_point("planner")
         
+        if self.execution_mode == "dag":
+            # The DAG executor runs the whole plan itself, scheduling steps by dependencies
+            workflow.add_node("dag_executor", RunnableLambda(self._execute_dag, afunc=self._aexecute_dag))
+            workflow.add_edge("planner", "dag_executor")
+            workflow.add_edge("dag_executor", END)
+            return workflow.compile()
+        
+        workflow.add_node("search", RunnableLambda(self._run_step, afunc=self._aexecute_step))
+        workflow.add_node("download", RunnableLambda(self._run_step, afunc=self._aexecute_step))
+        workflow.add_node("spatial_query", RunnableLambda(self._run_step, afunc=self._aexecute_step))
+        workflow.add_node("transform", RunnableLambda(self._run_step, afunc=self._aexecute_step))
+        workflow.add_node("process", RunnableLambda(self._run_step, afunc=self._aexecute_step))
+        workflow.add_node("analysis", RunnableLambda(self._run_step, afunc=self._aexecute_step))
+        workflow.add_node("visualization", RunnableLambda(self._run_step, afunc=self._aexecute_step))
+        workflow.add_node("export", RunnableLambda(self._run_step, afunc=self._aexecute_step))
+        workflow.add_node("router", self._route_next_step)
+        
         # Add edges
         workflow.add_edge("planner", "router")
         workflow.add_conditional_edges(
@@ -389,6 +676,22 @@ class GeoOrchestratorLangGraph:
         if requested_limit:
             logger.info(f"Extracted limit from user request: {requested_limit}")
         
+        response = self.llm.invoke(self._planner_messages(state, requested_limit))
+        return self._apply_workflow_plan(state, response.content, requested_limit)
+    
+    async def _aplan_workflow(self, state: WorkflowState) -> WorkflowState:
+        """Plan the workflow without blocking the event loop"""
+        logger.info(f"Planning workflow for: {state['user_request']}")
+        
+        requested_limit = self._extract_number(state['user_request'])
+        if requested_limit:
+            logger.info(f"Extracted limit from user request: {requested_limit}")
+        
+        response = await self.llm.ainvoke(self._planner_messages(state, requested_limit))
+        return self._apply_workflow_plan(state, response.content, requested_limit)
+    
+    def _planner_messages(self, state: WorkflowState, requested_limit: Optional[int]) -> list:
+        """Build the LLM messages for workflow planning"""
         prompt = f"""Analyze this geospatial data science request and create a detailed workflow plan: "{state['user_request']}"
 
             IMPORTANT: The user explicitly requested to "{state['user_request']}". 
@@ -455,14 +758,18 @@ class GeoOrchestratorLangGraph:
             ]
         """
         
-        messages = [
+        return [
             SystemMessage(content="You are an expert geospatial data science workflow planner. Always return valid JSON."),
             HumanMessage(content=prompt)
         ]
-        
-        response = self.llm.invoke(messages)
-        plan_text = response.content
-        
+    
+    def _apply_workflow_plan(
+        self,
+        state: WorkflowState,
+        plan_text: str,
+        requested_limit: Optional[int]
+    ) -> WorkflowState:
+        """Parse the planner response and store the workflow plan in the state"""
         # Parse workflow plan with better error handling
         workflow_plan = []
         try:
@@ -536,6 +843,11 @@ class GeoOrchestratorLangGraph:
         print()
         
         state["messages"].append(AIMessage(content=f"Workflow planned with {len(workflow_plan)} steps: {', '.join(step_types)}"))
+        emit(PlanReadyEvent(plan=list(workflow_plan)))
+        
+        if self.sandbox and any(s.get("step_type") in self.CODE_STEP_TYPES for s in workflow_plan):
+            # Workers import the geospatial stack while search and download steps run
+            self.sandbox.warm()
         
         return state
     
@@ -570,8 +882,244 @@ class GeoOrchestratorLangGraph:
         step_type = step.get("step_type", "")
         return step_type if step_type else "end"
     
-    def _execute_search(self, state: WorkflowState) -> WorkflowState:
-        """Execute search step"""
+    def _resolve_dependencies(self, workflow_plan: list) -> list:
+        """Return the set of valid dependency indices for each step in the plan"""
+        resolved = []
+        for idx, step in enumerate(workflow_plan):
+            deps = set()
+            for dep_idx in step.get("dependencies", []) or []:
+                try:
+                    dep_idx = int(dep_idx)
+                except (TypeError, ValueError):
+                    logger.warning(f"Ignoring invalid dependency {dep_idx!r} in step {idx}")
+                    continue
+                if 0 <= dep_idx < len(workflow_plan) and dep_idx != idx:
+                    deps.add(dep_idx)
+                else:
+                    logger.warning(f"Ignoring out-of-range dependency {dep_idx} in step {idx}")
+            resolved.append(deps)
+        return resolved
+    
+    def _snapshot_state(self, state: WorkflowState, step_index: int) -> WorkflowState:
+        """Copy the state for a single step so concurrent steps don't share containers"""
+        snapshot = dict(state)
+        for key, value in state.items():
+            if isinstance(value, dict):
+                snapshot[key] = dict(value)
+            elif isinstance(value, list):
+                snapshot[key] = list(value)
+        snapshot["current_step"] = step_index
+        return snapshot
+    
+    def _merge_step_state(self, state: WorkflowState, before: WorkflowState, after: WorkflowState) -> None:
+        """Merge what a step added to its state snapshot back into the shared state"""
+        for key in self.MERGED_STATE_KEYS:
+            old_value = before.get(key)
+            new_value = after.get(key)
+            if isinstance(old_value, dict) and isinstance(new_value, dict):
+                state[key].update({
+                    k: v for k, v in new_value.items()
+                    if k not in old_value or old_value[k] is not v
+                })
+            elif isinstance(old_value, list) and isinstance(new_value, list):
+                if new_value[:len(old_value)] == old_value:
+                    state[key].extend(new_value[len(old_value):])
+                else:
+                    # The step replaced the list (e.g. search results); the last writer wins,
+                    # as when the steps run one after another
+                    state[key] = list(new_value)
+    
+    def _execute_dag(self, state: WorkflowState) -> WorkflowState:
+        """Execute the workflow plan as a DAG, running independent steps concurrently
+        
+        A step is started as soon as all steps it depends on have finished. Each
+        running step works on its own snapshot of the state, and its additions are
+        merged back once it completes, so dependent steps see their inputs.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        
+        workflow_plan = state.get("workflow_plan", [])
+        dependencies = self._resolve_dependencies(workflow_plan)
+        pending = set(range(len(workflow_plan)))
+        completed = set()
+        running = {}
+        
+        logger.info(f"Executing {len(workflow_plan)} steps as a DAG (max {self.max_parallel_steps} concurrent)")
+        
+        with ThreadPoolExecutor(max_workers=self.max_parallel_steps) as pool:
+            while pending or running:
+                # A skipped step completes at once and may unblock others, so keep
+                # looking for ready steps until a pass finds no new ones
+                ready = True
+                while ready:
+                    ready = False
+                    for idx in sorted(i for i in pending if dependencies[i] <= completed):
+                        pending.discard(idx)
+                        step_type = workflow_plan[idx].get("step_type", "")
+                        handler = self.step_handlers.get(step_type)
+                        if handler is None:
+                            logger.warning(f"Skipping step {idx + 1} with unknown type: {step_type!r}")
+                            state["errors"].append(f"Step {idx + 1} has unknown type: {step_type!r}")
+                            completed.add(idx)
+                            ready = True
+                            continue
+                        before = self._snapshot_state(state, idx)
+                        step_state = self._snapshot_state(state, idx)
+                        # Run in a copy of this context so the step's events reach the same listener
+                        future = pool.submit(contextvars.copy_context().run, self._run_step, step_state)
+                        running[future] = (idx, before, step_state)
+                
+                if not running:
+                    if pending:
+                        # Nothing can run and nothing will finish: the remaining steps form a cycle
+                        blocked = [i + 1 for i in sorted(pending)]
+                        logger.error(f"Cyclic dependencies between steps {blocked}, skipping them")
+                        state["errors"].append(f"Steps {blocked} skipped due to cyclic dependencies")
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, before, step_state = running.pop(future)
+                    try:
+                        self._merge_step_state(state, before, future.result())
+                    except Exception as e:
+                        logger.error(f"Step {idx + 1} error: {e}")
+                        state["errors"].append(f"Step {idx + 1} failed: {str(e)}")
+                    completed.add(idx)
+        
+        state["current_step"] = len(workflow_plan)
+        return state
+    
+    async def _aexecute_dag(self, state: WorkflowState) -> WorkflowState:
+        """Execute the workflow plan as a DAG on the event loop (see _execute_dag)"""
+        workflow_plan = state.get("workflow_plan", [])
+        dependencies = self._resolve_dependencies(workflow_plan)
+        pending = set(range(len(workflow_plan)))
+        completed = set()
+        running = {}
+        
+        logger.info(f"Executing {len(workflow_plan)} steps as a DAG (max {self.max_parallel_steps} concurrent)")
+        
+        while pending or running:
+            ready = True
+            while ready:
+                ready = False
+                for idx in sorted(i for i in pending if dependencies[i] <= completed):
+                    if len(running) >= self.max_parallel_steps:
+                        break
+                    pending.discard(idx)
+                    step_type = workflow_plan[idx].get("step_type", "")
+                    if step_type not in self.STEP_AGENTS:
+                        logger.warning(f"Skipping step {idx + 1} with unknown type: {step_type!r}")
+                        state["errors"].append(f"Step {idx + 1} has unknown type: {step_type!r}")
+                        completed.add(idx)
+                        ready = True
+                        continue
+                    before = self._snapshot_state(state, idx)
+                    step_state = self._snapshot_state(state, idx)
+                    task = asyncio.ensure_future(self._aexecute_step(step_state))
+                    running[task] = (idx, before, step_state)
+            
+            if not running:
+                if pending:
+                    blocked = [i + 1 for i in sorted(pending)]
+                    logger.error(f"Cyclic dependencies between steps {blocked}, skipping them")
+                    state["errors"].append(f"Steps {blocked} skipped due to cyclic dependencies")
+                break
+            
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                idx, before, step_state = running.pop(task)
+                try:
+                    self._merge_step_state(state, before, task.result())
+                except Exception as e:
+                    logger.error(f"Step {idx + 1} error: {e}")
+                    state["errors"].append(f"Step {idx + 1} failed: {str(e)}")
+                completed.add(idx)
+        
+        state["current_step"] = len(workflow_plan)
+        return state
+    
+    def _run_step(self, state: WorkflowState) -> WorkflowState:
+        """Run the current step with its handler, emitting start and output events"""
+        current_step = state.get("current_step", 0)
+        step = state.get("workflow_plan", [])[current_step]
+        step_type = step.get("step_type", "")
+        
+        before = self._step_started(state, current_step, step)
+        state = self.step_handlers[step_type](state)
+        self._step_finished(state, before, current_step, step_type)
+        return state
+    
+    def _step_started(self, state: WorkflowState, step_index: int, step: dict) -> WorkflowState:
+        """Emit a StepStartedEvent and return a snapshot to diff the step's outputs against"""
+        emit(StepStartedEvent(
+            step_index=step_index,
+            step_type=step.get("step_type", ""),
+            description=step.get("description", ""),
+            total_steps=state.get("total_steps", 0)
+        ))
+        return self._snapshot_state(state, step_index)
+    
+    def _step_finished(
+        self,
+        state: WorkflowState,
+        before: WorkflowState,
+        step_index: int,
+        step_type: str
+    ) -> None:
+        """Emit events for the results, artifacts and errors a step added"""
+        if step_type == "search" and state.get("search_results") is not before.get("search_results"):
+            emit(SearchResultsEvent(results=list(state["search_results"]), step_index=step_index))
+        
+        for key, artifact_type in self.ARTIFACT_STATE_KEYS.items():
+            old_value, new_value = before.get(key), state.get(key)
+            if isinstance(new_value, dict):
+                added = [(k, v) for k, v in new_value.items() if k not in old_value or old_value[k] is not v]
+            else:
+                added = [(Path(str(v)).name, v) for v in new_value[len(old_value):]]
+            for name, path in added:
+                if path:
+                    emit(ArtifactEvent(artifact_type=artifact_type, name=name, path=str(path), step_index=step_index))
+        
+        emit(StepFinishedEvent(
+            step_index=step_index,
+            step_type=step_type,
+            errors=list(state.get("errors", [])[len(before.get("errors", [])):])
+        ))
+    
+    async def _aexecute_step(self, state: WorkflowState) -> WorkflowState:
+        """Run the current step's agent asynchronously, then record its results"""
+        current_step = state.get("current_step", 0)
+        step = state.get("workflow_plan", [])[current_step]
+        step_type = step.get("step_type", "")
+        agent_attr, label = self.STEP_AGENTS[step_type]
+        before = self._step_started(state, current_step, step)
+        
+        task_desc = step.get("description", "")
+        if step_type == "download":
+            # Use original user request for better context (contains location, dates, etc.)
+            task_desc = state.get("user_request", task_desc)
+        
+        try:
+            results = await getattr(self, agent_attr).aexecute(
+                task_description=task_desc,
+                parameters=step.get("parameters", {}),
+                context=state
+            )
+        except Exception as e:
+            logger.error(f"{label} error: {e}")
+            print(f"   ❌ {label} failed: {str(e)}\n")
+            state["errors"].append(f"{label} step failed: {str(e)}")
+            state["current_step"] = current_step + 1
+        else:
+            state = self.step_handlers[step_type](state, results=results)
+        
+        self._step_finished(state, before, current_step, step_type)
+        return state
+    
+    def _execute_search(self, state: WorkflowState, results: Optional[dict] = None) -> WorkflowState:
+        """Execute search step (results are precomputed on the async path)"""
         current_step = state.get("current_step", 0)
         workflow_plan = state.get("workflow_plan", [])
         step = workflow_plan[current_step]
@@ -579,11 +1127,12 @@ class GeoOrchestratorLangGraph:
         try:
             print(f"🔍 Step {current_step + 1}/{state.get('total_steps', 1)}: Searching for datasets...")
             params = step.get("parameters", {})
-            results = self.search_agent.execute(
-                task_description=step.get("description", ""),
-                parameters=params,
-                context=state
-            )
+            if results is None:
+                results = self.search_agent.execute(
+                    task_description=step.get("description", ""),
+                    parameters=params,
+                    context=state
+                )
             
             search_results = results.get("results", [])
             state["search_results"] = search_results
@@ -603,8 +1152,8 @@ class GeoOrchestratorLangGraph:
         
         return state
     
-    def _execute_download(self, state: WorkflowState) -> WorkflowState:
-        """Execute download step"""
+    def _execute_download(self, state: WorkflowState, results: Optional[dict] = None) -> WorkflowState:
+        """Execute download step (results are precomputed on the async path)"""
         current_step = state.get("current_step", 0)
         workflow_plan = state.get("workflow_plan", [])
         step = workflow_plan[current_step]
@@ -614,19 +1163,23 @@ class GeoOrchestratorLangGraph:
             params = step.get("parameters", {})
             # Use original user request for better context (contains location, dates, etc.)
             task_desc = state.get("user_request", step.get("description", ""))
-            results = self.download_agent.execute(
-                task_description=task_desc,
-                parameters=params,
-                context=state
-            )
+            if results is None:
+                results = self.download_agent.execute(
+                    task_description=task_desc,
+                    parameters=params,
+                    context=state
+                )
             
             # Update downloaded data
             downloaded_count = 0
             if "downloaded_data" in results:
                 state["downloaded_data"].update(results["downloaded_data"])
                 downloaded_count = len(results["downloaded_data"])
+                self.janitor.use(results["downloaded_data"].values())
             
             state["current_step"] = current_step + 1
+            for name, error in results.get("errors", {}).items():
+                print(f"   ⚠️  {name}: {error}")
             if downloaded_count > 0:
                 print(f"   ✅ Downloaded {downloaded_count} dataset(s)\n")
             else:
@@ -640,19 +1193,20 @@ class GeoOrchestratorLangGraph:
         
         return state
     
-    def _execute_spatial_query(self, state: WorkflowState) -> WorkflowState:
-        """Execute spatial query step"""
+    def _execute_spatial_query(self, state: WorkflowState, results: Optional[dict] = None) -> WorkflowState:
+        """Execute spatial query step (results are precomputed on the async path)"""
         current_step = state.get("current_step", 0)
         workflow_plan = state.get("workflow_plan", [])
         step = workflow_plan[current_step]
         
         try:
             params = step.get("parameters", {})
-            results = self.spatial_query_agent.execute(
-                task_description=step.get("description", ""),
-                parameters=params,
-                context=state
-            )
+            if results is None:
+                results = self.spatial_query_agent.execute(
+                    task_description=step.get("description", ""),
+                    parameters=params,
+                    context=state
+                )
             
             if "filtered_data" in results:
                 state["processed_data"][f"spatial_query_{current_step}"] = results["filtered_data"]
@@ -666,19 +1220,20 @@ class GeoOrchestratorLangGraph:
         
         return state
     
-    def _execute_transform(self, state: WorkflowState) -> WorkflowState:
-        """Execute transform step"""
+    def _execute_transform(self, state: WorkflowState, results: Optional[dict] = None) -> WorkflowState:
+        """Execute transform step (results are precomputed on the async path)"""
         current_step = state.get("current_step", 0)
         workflow_plan = state.get("workflow_plan", [])
         step = workflow_plan[current_step]
         
         try:
             params = step.get("parameters", {})
-            results = self.transform_agent.execute(
-                task_description=step.get("description", ""),
-                parameters=params,
-                context=state
-            )
+            if results is None:
+                results = self.transform_agent.execute(
+                    task_description=step.get("description", ""),
+                    parameters=params,
+                    context=state
+                )
             
             if "transformed_data" in results:
                 state["processed_data"][f"transform_{current_step}"] = results["transformed_data"]
@@ -692,19 +1247,20 @@ class GeoOrchestratorLangGraph:
         
         return state
     
-    def _execute_process(self, state: WorkflowState) -> WorkflowState:
-        """Execute process step"""
+    def _execute_process(self, state: WorkflowState, results: Optional[dict] = None) -> WorkflowState:
+        """Execute process step (results are precomputed on the async path)"""
         current_step = state.get("current_step", 0)
         workflow_plan = state.get("workflow_plan", [])
         step = workflow_plan[current_step]
         
         try:
             params = step.get("parameters", {})
-            results = self.process_agent.execute(
-                task_description=step.get("description", ""),
-                parameters=params,
-                context=state
-            )
+            if results is None:
+                results = self.process_agent.execute(
+                    task_description=step.get("description", ""),
+                    parameters=params,
+                    context=state
+                )
             
             if "processed_data" in results:
                 state["processed_data"][f"process_{current_step}"] = results["processed_data"]
@@ -718,19 +1274,20 @@ class GeoOrchestratorLangGraph:
         
         return state
     
-    def _execute_analysis(self, state: WorkflowState) -> WorkflowState:
-        """Execute analysis step"""
+    def _execute_analysis(self, state: WorkflowState, results: Optional[dict] = None) -> WorkflowState:
+        """Execute analysis step (results are precomputed on the async path)"""
         current_step = state.get("current_step", 0)
         workflow_plan = state.get("workflow_plan", [])
         step = workflow_plan[current_step]
         
         try:
             params = step.get("parameters", {})
-            results = self.analysis_agent.execute(
-                task_description=step.get("description", ""),
-                parameters=params,
-                context=state
-            )
+            if results is None:
+                results = self.analysis_agent.execute(
+                    task_description=step.get("description", ""),
+                    parameters=params,
+                    context=state
+                )
             
             state["analysis_results"][f"analysis_{current_step}"] = results.get("analysis", {})
             state["current_step"] = current_step + 1
@@ -742,8 +1299,8 @@ class GeoOrchestratorLangGraph:
         
         return state
     
-    def _execute_visualization(self, state: WorkflowState) -> WorkflowState:
-        """Execute visualization step"""
+    def _execute_visualization(self, state: WorkflowState, results: Optional[dict] = None) -> WorkflowState:
+        """Execute visualization step (results are precomputed on the async path)"""
         current_step = state.get("current_step", 0)
         workflow_plan = state.get("workflow_plan", [])
         step = workflow_plan[current_step]
@@ -751,14 +1308,16 @@ class GeoOrchestratorLangGraph:
         try:
             print(f"🗺️  Step {current_step + 1}/{state.get('total_steps', 1)}: Creating visualization...")
             params = step.get("parameters", {})
-            results = self.visualization_agent.execute(
-                task_description=step.get("description", ""),
-                parameters=params,
-                context=state
-            )
+            if results is None:
+                results = self.visualization_agent.execute(
+                    task_description=step.get("description", ""),
+                    parameters=params,
+                    context=state
+                )
             
             if "visualization_path" in results and results["visualization_path"]:
                 state["visualizations"].append(str(results["visualization_path"]))
+                self.janitor.use([results["visualization_path"]])
                 print(f"   ✅ Created visualization: {results['visualization_path']}\n")
             elif "error" in results:
                 print(f"   ⚠️  Visualization skipped: {results['error']}\n")
@@ -775,23 +1334,25 @@ class GeoOrchestratorLangGraph:
         
         return state
     
-    def _execute_export(self, state: WorkflowState) -> WorkflowState:
-        """Execute export step"""
+    def _execute_export(self, state: WorkflowState, results: Optional[dict] = None) -> WorkflowState:
+        """Execute export step (results are precomputed on the async path)"""
         current_step = state.get("current_step", 0)
         workflow_plan = state.get("workflow_plan", [])
         step = workflow_plan[current_step]
         
         try:
             params = step.get("parameters", {})
-            results = self.export_agent.execute(
-                task_description=step.get("description", ""),
-                parameters=params,
-                context=state
-            )
+            if results is None:
+                results = self.export_agent.execute(
+                    task_description=step.get("description", ""),
+                    parameters=params,
+                    context=state
+                )
             
             if "export_path" in results and results["export_path"]:
                 state["exports"].append(str(results["export_path"]))
                 state["final_outputs"].append(str(results["export_path"]))
+                self.janitor.use([results["export_path"]])
                 print(f"   ✅ Exported to: {results['export_path']}\n")
             elif "error" in results:
                 print(f"   ⚠️  Export skipped: {results['error']}\n")
@@ -817,7 +1378,104 @@ class GeoOrchestratorLangGraph:
         Returns:
             Final workflow state
         """
-        initial_state = WorkflowState(
+        # Run workflow; the datasets it uses are pinned until it finishes
+        with self.janitor.run():
+            final_state = self.workflow.invoke(self._initial_state(user_request))
+        return self._workflow_result(final_state)
+    
+    async def aexecute(self, user_request: str) -> dict:
+        """
+        Execute a complete workflow asynchronously
+        
+        LLM calls, searches and direct downloads are awaited, so several
+        requests can share one event loop.
+        
+        Args:
+            user_request: Natural language request
+            
+        Returns:
+            Final workflow state
+        """
+        with self.janitor.run():
+            final_state = await self.workflow.ainvoke(self._initial_state(user_request))
+        return self._workflow_result(final_state)
+    
+    def stream(self, user_request: str) -> Iterator[WorkflowEvent]:
+        """
+        Execute a workflow, yielding events as it progresses
+        
+        Yields PlanReadyEvent, StepStartedEvent, SearchResultsEvent (partial
+        results first), DownloadProgressEvent, ArtifactEvent and
+        StepFinishedEvent as they happen, and finally a WorkflowFinishedEvent
+        carrying the same result dict execute() returns.
+        
+        Args:
+            user_request: Natural language request
+        """
+        events = queue.Queue()
+        
+        def run():
+            set_event_sink(events.put)
+            try:
+                result = self.execute(user_request)
+            except Exception as e:
+                logger.error(f"Workflow error: {e}")
+                result = self._failed_result(e)
+            events.put(WorkflowFinishedEvent(result=result))
+        
+        # A fresh thread starts with an empty context, so the sink only sees this workflow
+        threading.Thread(target=run, name="geoagent-workflow", daemon=True).start()
+        
+        while True:
+            event = events.get()
+            yield event
+            if isinstance(event, WorkflowFinishedEvent):
+                return
+    
+    async def astream(self, user_request: str) -> AsyncIterator[WorkflowEvent]:
+        """
+        Execute a workflow asynchronously, yielding events as it progresses
+        
+        Async counterpart of stream(); the workflow runs through aexecute().
+        
+        Args:
+            user_request: Natural language request
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        
+        async def run():
+            # Events may be emitted from worker threads, so hand them to the loop
+            set_event_sink(lambda event: loop.call_soon_threadsafe(events.put_nowait, event))
+            try:
+                result = await self.aexecute(user_request)
+            except Exception as e:
+                logger.error(f"Workflow error: {e}")
+                result = self._failed_result(e)
+            loop.call_soon_threadsafe(events.put_nowait, WorkflowFinishedEvent(result=result))
+        
+        # The task runs in a copy of the current context, so the sink stays local to it
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                event = await events.get()
+                yield event
+                if isinstance(event, WorkflowFinishedEvent):
+                    return
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    def _failed_result(self, error: Exception) -> dict:
+        """Result dict for a workflow that raised before finishing"""
+        result = self._workflow_result({})
+        result["success"] = False
+        result["errors"] = [f"Workflow failed: {str(error)}"]
+        return result
+    
+    def _initial_state(self, user_request: str) -> WorkflowState:
+        """Build the starting state for a request"""
+        return WorkflowState(
             user_request=user_request,
             workflow_plan=[],
             current_step=0,
@@ -834,10 +1492,9 @@ class GeoOrchestratorLangGraph:
             messages=[HumanMessage(content=user_request)],
             final_outputs=[]
         )
-        
-        # Run workflow
-        final_state = self.workflow.invoke(initial_state)
-        
+    
+    def _workflow_result(self, final_state: WorkflowState) -> dict:
+        """Summarize the final workflow state"""
         return {
             "success": len(final_state.get("errors", [])) == 0,
             "search_results": final_state.get("search_results", []),
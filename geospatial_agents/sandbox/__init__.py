@@ -0,0 +1,13 @@
+"""
+Process sandbox for LLM-generated code
+"""
+
+from geospatial_agents.sandbox.pool import SandboxPool, SandboxResult, DEFAULT_PRELOAD
+from geospatial_agents.sandbox.worker import import_namespace
+
+__all__ = [
+    "SandboxPool",
+    "SandboxResult",
+    "DEFAULT_PRELOAD",
+    "import_namespace"
+]
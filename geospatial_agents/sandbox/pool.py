@@ -0,0 +1,227 @@
+"""
+Sandbox Pool
+Pool of pre-warmed worker processes that run LLM-generated code in isolation
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+import multiprocessing
+import queue
+import threading
+import time
+
+from geospatial_agents.sandbox.worker import worker_main
+
+logger = logging.getLogger(__name__)
+
+# Modules every worker imports once at startup instead of on every run
+DEFAULT_PRELOAD = (
+    "numpy",
+    "pandas",
+    "shapely.geometry",
+    "pyproj",
+    "geopandas",
+    "rasterio",
+    "rasterio.warp",
+    "matplotlib.pyplot",
+    "folium"
+)
+
+# Globals the code agents read back after generated code has run
+DEFAULT_RESULT_KEYS = ("result_path", "output_path", "viz_path", "analysis_results")
+
+
+@dataclass
+class SandboxResult:
+    """Outcome of running code in the sandbox"""
+    namespace: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    duration: float = 0.0
+    
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class _Worker:
+    """A worker process and the parent end of its pipe"""
+    
+    def __init__(self, context: Any, preload: Iterable[str]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(child_conn, list(preload)),
+            name="geoagent-sandbox",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+    
+    def stop(self, timeout: float = 1.0) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout)
+        self.conn.close()
+
+
+class SandboxPool:
+    """Runs generated code in separate worker processes
+    
+    Workers import the geospatial stack once and then execute code sent over
+    a pipe, with per-run limits on CPU time, address space and wall-clock
+    time. A worker that crashes, exceeds a limit or times out is killed and
+    replaced, so runaway code can't take down the orchestrator.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = 2,
+        cpu_seconds: Optional[float] = 300,
+        memory_mb: Optional[int] = 8192,
+        timeout: float = 600,
+        max_tasks_per_worker: int = 50,
+        preload: Iterable[str] = DEFAULT_PRELOAD
+    ):
+        """
+        Initialize the pool (workers start on warm() or the first run)
+        
+        Args:
+            max_workers: Number of worker processes
+            cpu_seconds: CPU time limit per run (None for no limit)
+            memory_mb: Address space limit per worker in megabytes (None for no limit)
+            timeout: Wall-clock limit per run in seconds
+            max_tasks_per_worker: Runs after which a worker is replaced, bounding leaks
+            preload: Modules imported by each worker at startup
+        """
+        self.max_workers = max(1, max_workers)
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * 1024 * 1024 if memory_mb else None
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.preload = tuple(preload)
+        
+        methods = multiprocessing.get_all_start_methods()
+        # Never fork: the parent holds threads, sessions and open sockets
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+    
+    def warm(self) -> None:
+        """Start the worker processes so they import the geospatial stack ahead of use"""
+        with self._lock:
+            if self._started or self._closed:
+                return
+            self._started = True
+            for _ in range(self.max_workers):
+                self._idle.put(_Worker(self._context, self.preload))
+        logger.info(f"Started {self.max_workers} sandbox worker(s)")
+    
+    def run(
+        self,
+        code: str,
+        modules: Dict[str, str],
+        values: Optional[Dict[str, Any]] = None,
+        agent: Any = None,
+        result_keys: Iterable[str] = DEFAULT_RESULT_KEYS
+    ) -> SandboxResult:
+        """
+        Execute code in a worker process
+        
+        Args:
+            code: Python code to run
+            modules: Global name -> 'module' or 'module:attribute' to import for the code
+            values: Picklable globals (data_paths, output_path, ...)
+            agent: Agent whose plain attributes (directories, settings) are exposed as 'self'
+            result_keys: Globals returned to the caller after the run
+        
+        Returns:
+            SandboxResult with the requested globals or an error message
+        """
+        if self._closed:
+            raise RuntimeError("Sandbox pool is closed")
+        self.warm()
+        
+        task = {
+            "code": code,
+            "modules": modules,
+            "values": values or {},
+            "agent_attrs": self._agent_attrs(agent),
+            "result_keys": list(result_keys),
+            "cpu_seconds": self.cpu_seconds,
+            "memory_bytes": self.memory_bytes
+        }
+        
+        started = time.monotonic()
+        worker = self._idle.get()
+        healthy = False
+        try:
+            worker.conn.send(task)
+            if not worker.conn.poll(self.timeout):
+                return SandboxResult(
+                    error=f"Timed out after {self.timeout:.0f}s",
+                    duration=time.monotonic() - started
+                )
+            status, payload = worker.conn.recv()
+            healthy = True
+            worker.tasks += 1
+            if status == "ok":
+                return SandboxResult(namespace=payload, duration=time.monotonic() - started)
+            return SandboxResult(error=payload, duration=time.monotonic() - started)
+        except (EOFError, OSError) as e:
+            worker.process.join(1.0)
+            return SandboxResult(
+                error=self._describe_exit(worker.process.exitcode, e),
+                duration=time.monotonic() - started
+            )
+        finally:
+            if healthy and worker.tasks < self.max_tasks_per_worker and not self._closed:
+                self._idle.put(worker)
+            else:
+                self._replace(worker)
+    
+    def close(self) -> None:
+        """Stop all workers"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
+    
+    def _replace(self, worker: _Worker) -> None:
+        """Stop a worker and, unless the pool is closing, start a fresh one"""
+        worker.stop(timeout=0.1)
+        if not self._closed:
+            self._idle.put(_Worker(self._context, self.preload))
+    
+    def _describe_exit(self, exitcode: Optional[int], error: Exception) -> str:
+        """Explain why a worker died mid-run"""
+        import signal
+        
+        if exitcode == -getattr(signal, "SIGXCPU", 0):
+            return f"Exceeded CPU limit of {self.cpu_seconds}s"
+        if exitcode == -getattr(signal, "SIGKILL", 0):
+            return "Worker was killed (likely out of memory)"
+        return f"Worker exited unexpectedly (exit code {exitcode}): {error}"
+    
+    @staticmethod
+    def _agent_attrs(agent: Any) -> Dict[str, Any]:
+        """Plain, picklable agent attributes such as output directories"""
+        if agent is None:
+            return {}
+        return {
+            name: value for name, value in vars(agent).items()
+            if isinstance(value, (str, int, float, bool, Path, type(None)))
+        }
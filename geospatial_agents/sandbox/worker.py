@@ -0,0 +1,117 @@
+"""
+Sandbox Worker
+Child process that executes generated code with the geospatial stack pre-imported
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from types import SimpleNamespace
+import importlib
+import json
+import os
+import pickle
+
+logger = logging.getLogger(__name__)
+
+
+def import_namespace(modules: Dict[str, str]) -> Dict[str, Any]:
+    """Import the names generated code expects
+    
+    Args:
+        modules: Global name -> 'module' or 'module:attribute'
+    
+    Returns:
+        Dict of global name -> imported object
+    """
+    namespace = {}
+    for name, target in modules.items():
+        module_name, _, attribute = target.partition(":")
+        module = importlib.import_module(module_name)
+        namespace[name] = getattr(module, attribute) if attribute else module
+    return namespace
+
+
+def _apply_limits(cpu_seconds: Optional[float], memory_bytes: Optional[int]) -> None:
+    """Cap CPU time for the next run and the address space of this worker"""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows; the parent still enforces the wall-clock limit
+        return
+    
+    if cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = usage.ru_utime + usage.ru_stime
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(used + cpu_seconds) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    
+    if memory_bytes:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        soft = memory_bytes if hard == resource.RLIM_INFINITY else min(memory_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _picklable(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Make sure results survive the trip back to the parent"""
+    try:
+        pickle.dumps(results)
+        return results
+    except Exception:
+        return json.loads(json.dumps(results, default=str))
+
+
+def run_task(
+    code: str,
+    modules: Dict[str, str],
+    values: Dict[str, Any],
+    agent_attrs: Dict[str, Any],
+    result_keys: Iterable[str],
+    cpu_seconds: Optional[float] = None,
+    memory_bytes: Optional[int] = None
+) -> Tuple[str, Any]:
+    """Execute one piece of generated code
+    
+    Returns:
+        ('ok', {result_key: value}) or ('error', message)
+    """
+    try:
+        _apply_limits(cpu_seconds, memory_bytes)
+        exec_globals = import_namespace(modules)
+        exec_globals.update(values)
+        # Generated code refers to agent directories through 'self'
+        exec_globals["self"] = SimpleNamespace(**agent_attrs)
+        exec_globals["logger"] = logger
+        
+        exec(code, exec_globals)
+        results = {key: exec_globals[key] for key in result_keys if key in exec_globals}
+        return "ok", _picklable(results)
+    except BaseException as e:
+        # BaseException so sys.exit() in generated code doesn't end the worker
+        return "error", f"{type(e).__name__}: {e}"
+
+
+def worker_main(conn: Any, preload: List[str]) -> None:
+    """Worker process loop: import the geospatial stack once, then serve tasks
+    
+    Args:
+        conn: Pipe connection to the parent
+        preload: Modules imported before the first task
+    """
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    for module_name in preload:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            logger.debug(f"Sandbox worker could not preload {module_name}: {e}")
+    
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        conn.send(run_task(**task))
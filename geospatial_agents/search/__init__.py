@@ -0,0 +1,27 @@
+"""
+Search infrastructure for the Search Agent
+"""
+
+from geospatial_agents.search.urls import canonical_url
+from geospatial_agents.search.dataset_index import DatasetIndex
+from geospatial_agents.search.enrichment_store import EnrichmentStore
+from geospatial_agents.search.federated import FederatedSearch
+from geospatial_agents.search.providers import (
+    FunctionProvider,
+    HuggingFaceProvider,
+    SearchProvider,
+    ZenodoProvider
+)
+from geospatial_agents.search.tavily_cache import TavilySearchCache
+
+__all__ = [
+    "canonical_url",
+    "DatasetIndex",
+    "EnrichmentStore",
+    "FederatedSearch",
+    "SearchProvider",
+    "FunctionProvider",
+    "HuggingFaceProvider",
+    "ZenodoProvider",
+    "TavilySearchCache"
+]
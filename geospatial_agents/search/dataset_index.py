@@ -0,0 +1,424 @@
+"""
+Dataset Index
+Local full-text and vector index of known geospatial datasets for offline search
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from geospatial_agents.search.urls import canonical_url
+
+logger = logging.getLogger(__name__)
+
+# Catalog of major data sources shipped with the package
+DEFAULT_SEED_PATH = Path(__file__).resolve().parent.parent / "geo_databases.md"
+
+# Words that appear in almost every dataset query and carry no signal
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "get", "in", "is", "of", "on",
+    "or", "the", "to", "with", "data", "dataset", "datasets", "download", "downloads",
+    "find", "search", "geospatial", "show", "me", "some", "all", "available"
+})
+
+# Fields indexed alongside name and description
+INDEXED_FIELDS = (
+    "spatial_coverage",
+    "temporal_coverage",
+    "coordinate_system",
+    "download_method",
+    "file_formats",
+    "data_type"
+)
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Dimensions of the hashed n-gram embedding used when no embedding model is given
+HASH_DIMENSIONS = 1 << 18
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+
+
+def hashed_embedding(text: str) -> Dict[int, float]:
+    """Sparse unit vector of hashed word and character-trigram features
+    
+    Trigrams make near matches ("temperatures", "temperature") similar without
+    needing an embedding model, so the index works fully offline.
+    """
+    vector: Dict[int, float] = {}
+    for token in tokenize(text):
+        features = [token]
+        padded = f"#{token}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        for feature in features:
+            index = zlib.crc32(feature.encode("utf-8")) % HASH_DIMENSIONS
+            vector[index] = vector.get(index, 0.0) + 1.0
+    return _normalize(vector)
+
+
+def _normalize(vector: Dict[int, float]) -> Dict[int, float]:
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {index: value / norm for index, value in vector.items()}
+
+
+def _dot(query: Dict[int, float], document: Dict[int, float]) -> float:
+    if len(query) > len(document):
+        query, document = document, query
+    return sum(value * document.get(index, 0.0) for index, value in query.items())
+
+
+def parse_catalog(path: Path) -> List[Dict[str, Any]]:
+    """Read data sources from a geo_databases.md-style catalog
+    
+    Each '### N. **Name**' section with a '**Website:**' line becomes one
+    entry whose description lists the section's datasets.
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    entries = []
+    for section in re.split(r"^### ", text, flags=re.MULTILINE)[1:]:
+        header, _, body = section.partition("\n")
+        website = re.search(r"\*\*Website:\*\*\s*(\S+)", body)
+        if not website:
+            continue
+        name = re.sub(r"^\d+\.\s*", "", header.strip()).strip("* ")
+        
+        datasets = []
+        methods = []
+        current = None
+        for line in body.splitlines():
+            heading = re.match(r"\*\*(.+?):\*\*\s*$", line.strip())
+            if heading:
+                current = heading.group(1).lower()
+            elif line.startswith("- ") and current == "datasets":
+                datasets.append(line[2:].strip())
+            elif line.startswith("- ") and current == "download methods":
+                methods.append(line[2:].strip())
+        
+        entries.append({
+            "name": name,
+            "description": "; ".join(datasets),
+            "source": website.group(1),
+            "download_method": "; ".join(methods)
+        })
+    return entries
+
+
+class DatasetIndex:
+    """Searchable local catalog of geospatial datasets
+    
+    Every entry is indexed twice: an inverted index scored with BM25, and an
+    embedding for nearest-neighbour search. The index is seeded from the
+    bundled catalog of data sources and grows with every enriched search
+    result, so repeated and well-known queries are answered locally in
+    milliseconds instead of through a web search or an LLM call.
+    """
+    
+    def __init__(
+        self,
+        db_path: Path,
+        seed_path: Optional[Path] = DEFAULT_SEED_PATH,
+        embeddings: Any = None,
+        lexical_weight: float = 0.6
+    ):
+        """
+        Initialize the index (entries are loaded on first use)
+        
+        Args:
+            db_path: SQLite database file
+            seed_path: Markdown catalog of data sources to seed the index with (None to skip)
+            embeddings: Optional embedding model with embed_documents()/embed_query()
+                (e.g. a LangChain Embeddings); hashed n-gram vectors are used otherwise
+            lexical_weight: Weight of the BM25 match versus the embedding similarity in scores
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.seed_path = Path(seed_path) if seed_path else None
+        self.embeddings = embeddings
+        self.lexical_weight = lexical_weight
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS datasets (
+                key TEXT PRIMARY KEY,
+                entry TEXT NOT NULL,
+                vector TEXT,
+                updated REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        
+        self._loaded = False
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._vectors: Dict[str, Dict[int, float]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+    
+    def add_many(self, results: Iterable[Dict[str, Any]]) -> int:
+        """Add or update search results that have a URL, returning how many were indexed"""
+        entries = {}
+        for result in results:
+            url = self._result_url(result)
+            key = canonical_url(url) if url else ""
+            if not key:
+                continue
+            entry = {
+                field: result[field] for field in ("name", "description", *INDEXED_FIELDS)
+                if isinstance(result.get(field), str) and result[field]
+            }
+            entry["source"] = url
+            entries[key] = entry
+        if not entries:
+            return 0
+        
+        with self._lock:
+            self._ensure_loaded()
+            self._store(entries)
+        return len(entries)
+    
+    def search(self, query: str, limit: int = 5, min_score: float = 0.45) -> List[Dict[str, Any]]:
+        """
+        Find indexed datasets matching a query
+        
+        Args:
+            query: Free-text dataset query
+            limit: Maximum number of results
+            min_score: Minimum combined score (0-1) for a result to count as a match
+        
+        Returns:
+            Search results (same shape as web search results) with a 'score', best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        
+        with self._lock:
+            self._ensure_loaded()
+            if not self._entries:
+                return []
+            
+            lexical = self._bm25(terms)
+            query_vector = self._embed_query(query)
+            scored = []
+            for key, (coverage, bm25) in lexical.items():
+                similarity = _dot(query_vector, self._vectors.get(key, {})) if query_vector else 0.0
+                scored.append((self._combine(coverage, similarity), bm25, key))
+            if query_vector:
+                # Nearest neighbours that share no exact term (plurals, synonyms)
+                for key, vector in self._vectors.items():
+                    if key not in lexical:
+                        similarity = _dot(query_vector, vector)
+                        if similarity > 0:
+                            scored.append((self._combine(0.0, similarity), 0.0, key))
+            
+            scored.sort(reverse=True)
+            results = []
+            for score, _, key in scored[:limit]:
+                if score < min_score:
+                    break
+                result = dict(self._entries[key])
+                result["score"] = round(score, 4)
+                results.append(result)
+        
+        if results:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return index statistics"""
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                "entries": len(self._entries),
+                "terms": len(self._postings),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+    
+    def _ensure_loaded(self) -> None:
+        """Load entries from SQLite and (re)seed from the catalog when it changed (caller holds the lock)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        started = time.perf_counter()
+        
+        rows = self._conn.execute("SELECT key, entry, vector FROM datasets").fetchall()
+        embedder = self._embedder_name()
+        stored_embedder = self._get_meta("embedder")
+        missing = []
+        for key, entry, vector in rows:
+            self._index(key, json.loads(entry))
+            if self.embeddings is None:
+                self._vectors[key] = hashed_embedding(self._entry_text(self._entries[key]))
+            elif vector and stored_embedder == embedder:
+                self._vectors[key] = {int(i): v for i, v in json.loads(vector).items()}
+            else:
+                missing.append(key)
+        if missing:
+            self._embed_entries(missing)
+            self._persist(missing)
+        self._set_meta("embedder", embedder)
+        
+        if self.seed_path and self.seed_path.exists():
+            seed_version = str(self.seed_path.stat().st_mtime_ns)
+            if self._get_meta("seed_version") != seed_version:
+                seeds = {
+                    canonical_url(entry["source"]): entry
+                    for entry in parse_catalog(self.seed_path)
+                    if canonical_url(entry["source"])
+                }
+                # Never overwrite richer entries learned from enriched search results
+                self._store({key: entry for key, entry in seeds.items() if key not in self._entries})
+                self._set_meta("seed_version", seed_version)
+                logger.info(f"Seeded dataset index with {len(seeds)} catalog entries")
+        
+        logger.debug(
+            f"Loaded dataset index: {len(self._entries)} entries in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+    
+    def _store(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Index entries in memory and persist them (caller holds the lock)"""
+        if not entries:
+            return
+        for key, entry in entries.items():
+            self._index(key, entry)
+        self._embed_entries(list(entries))
+        self._persist(list(entries))
+    
+    def _persist(self, keys: List[str]) -> None:
+        now = time.time()
+        rows = [
+            (
+                key,
+                json.dumps(self._entries[key], sort_keys=True),
+                json.dumps(self._vectors.get(key, {})) if self.embeddings is not None else None,
+                now
+            )
+            for key in keys
+        ]
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO datasets (key, entry, vector, updated) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        self._conn.commit()
+    
+    def _index(self, key: str, entry: Dict[str, Any]) -> None:
+        """Add an entry to the inverted index, replacing its previous version"""
+        if key in self._entries:
+            for token in set(tokenize(self._entry_text(self._entries[key]))):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(key, None)
+                    if not postings:
+                        del self._postings[token]
+        
+        self._entries[key] = entry
+        tokens = tokenize(self._entry_text(entry))
+        self._lengths[key] = len(tokens)
+        for token in tokens:
+            postings = self._postings.setdefault(token, {})
+            postings[key] = postings.get(key, 0) + 1
+    
+    def _bm25(self, terms: List[str]) -> Dict[str, Tuple[float, float]]:
+        """Score entries containing any query term
+        
+        Returns:
+            Key -> (share of the query's IDF weight the entry matches, BM25 score)
+        """
+        count = len(self._entries)
+        average_length = sum(self._lengths.values()) / count or 1.0
+        idf = {}
+        for term in terms:
+            # Unknown terms get the highest IDF, so unmatched specifics lower coverage
+            frequency = len(self._postings.get(term, {}))
+            idf[term] = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+        total_idf = sum(idf.values()) or 1.0
+        
+        matched: Dict[str, List[float]] = {}
+        for term in terms:
+            for key, frequency in self._postings.get(term, {}).items():
+                length_norm = 1 - BM25_B + BM25_B * self._lengths[key] / average_length
+                term_score = idf[term] * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+                scores = matched.setdefault(key, [0.0, 0.0])
+                scores[0] += idf[term]
+                scores[1] += term_score
+        return {key: (weight / total_idf, bm25) for key, (weight, bm25) in matched.items()}
+    
+    def _combine(self, coverage: float, similarity: float) -> float:
+        return self.lexical_weight * coverage + (1 - self.lexical_weight) * similarity
+    
+    def _embed_entries(self, keys: List[str]) -> None:
+        texts = [self._entry_text(self._entries[key]) for key in keys]
+        if self.embeddings is None:
+            for key, text in zip(keys, texts):
+                self._vectors[key] = hashed_embedding(text)
+            return
+        try:
+            vectors = self.embeddings.embed_documents(texts)
+        except Exception as e:
+            logger.warning(f"Failed to embed {len(keys)} dataset entries: {e}")
+            return
+        for key, vector in zip(keys, vectors):
+            self._vectors[key] = _normalize(dict(enumerate(vector)))
+    
+    def _embed_query(self, query: str) -> Dict[int, float]:
+        if self.embeddings is None:
+            return hashed_embedding(query)
+        try:
+            return _normalize(dict(enumerate(self.embeddings.embed_query(query))))
+        except Exception as e:
+            logger.warning(f"Failed to embed query, using keyword matching only: {e}")
+            return {}
+    
+    def _embedder_name(self) -> str:
+        if self.embeddings is None:
+            return "hashed"
+        model = getattr(self.embeddings, "model", None) or getattr(self.embeddings, "model_name", None)
+        return f"{type(self.embeddings).__name__}:{model}"
+    
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self._conn.commit()
+    
+    @staticmethod
+    def _entry_text(entry: Dict[str, Any]) -> str:
+        parts = [entry.get("name", ""), entry.get("description", "")]
+        parts.extend(entry.get(field, "") for field in INDEXED_FIELDS)
+        return " ".join(part for part in parts if part)
+    
+    @staticmethod
+    def _result_url(result: Dict[str, Any]) -> str:
+        source = result.get("source", "")
+        if isinstance(source, dict):
+            source = source.get("url", "")
+        if isinstance(source, str) and source.startswith(("http://", "https://")):
+            return source
+        return ""
@@ -0,0 +1,121 @@
+"""
+Enrichment Store
+Persistent per-URL cache of the geospatial metadata the LLM adds to search results
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Optional
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import time
+
+from geospatial_agents.search.urls import canonical_url
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentStore:
+    """SQLite store of enrichment fields keyed by canonical dataset URL
+    
+    Coverage, CRS, access method and formats depend on the dataset rather
+    than the query, so a URL enriched once can skip the LLM on later searches
+    until its entry is older than max_age_seconds.
+    """
+    
+    def __init__(self, db_path: Path, max_age_seconds: Optional[float] = 30 * 24 * 3600):
+        """
+        Initialize the store
+        
+        Args:
+            db_path: SQLite database file
+            max_age_seconds: Age after which an entry is stale and re-enriched (None to never expire)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS enrichments (
+                url TEXT PRIMARY KEY,
+                fields TEXT NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+    
+    def get_many(self, urls: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """Return fresh enrichment fields for the given URLs, keyed by the URLs as passed"""
+        keys = {}
+        for url in urls:
+            key = canonical_url(url)
+            if key:
+                keys.setdefault(key, []).append(url)
+        if not keys:
+            return {}
+        
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds is not None else None
+        found = {}
+        with self._lock:
+            key_list = list(keys)
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT url, fields, updated FROM enrichments WHERE url IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, fields, updated in rows:
+                    if cutoff is not None and updated < cutoff:
+                        continue
+                    for url in keys[key]:
+                        found[url] = json.loads(fields)
+        
+        self.hits += len(found)
+        self.misses += sum(len(urls) for urls in keys.values()) - len(found)
+        return found
+    
+    def put_many(self, enrichments: Dict[str, Dict[str, Any]]) -> None:
+        """Store enrichment fields for each URL"""
+        now = time.time()
+        rows = [
+            (canonical_url(url), json.dumps(fields, sort_keys=True), now)
+            for url, fields in enrichments.items()
+            if fields and canonical_url(url)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO enrichments (url, fields, updated) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+    
+    def invalidate(self, url: str) -> None:
+        """Force a URL to be re-enriched on its next search"""
+        with self._lock:
+            self._conn.execute("DELETE FROM enrichments WHERE url = ?", (canonical_url(url),))
+            self._conn.commit()
+    
+    def prune(self) -> int:
+        """Delete stale entries, returning how many were removed"""
+        if self.max_age_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM enrichments WHERE updated < ?",
+                (time.time() - self.max_age_seconds,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return store statistics"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM enrichments").fetchone()[0]
+        return {"entries": count, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,162 @@
+"""
+Federated Search
+Queries several search providers concurrently and returns as soon as enough good results arrive
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import asyncio
+import contextvars
+import time
+
+from geospatial_agents.search.providers import SearchProvider, search_deadline
+from geospatial_agents.search.urls import canonical_url
+
+logger = logging.getLogger(__name__)
+
+
+class _Collector:
+    """Merges provider results, deduplicated by canonical URL"""
+    
+    def __init__(self, limit: int, min_score: float):
+        self.limit = limit
+        self.min_score = min_score
+        self.results: Dict[str, Dict[str, Any]] = {}
+    
+    def add(self, provider: str, results: List[Dict[str, Any]]) -> None:
+        for result in results:
+            source = result.get("source", "")
+            if isinstance(source, dict):
+                source = source.get("url", "")
+            key = canonical_url(source) if isinstance(source, str) else ""
+            key = key or f"{provider}:{result.get('name', '')}".lower()
+            
+            result = dict(result, provider=provider)
+            existing = self.results.get(key)
+            if existing is None or result.get("score", 0) > existing.get("score", 0):
+                if existing is not None:
+                    result["provider"] = f"{existing['provider']},{provider}"
+                self.results[key] = result
+            elif provider not in existing["provider"].split(","):
+                existing["provider"] = f"{existing['provider']},{provider}"
+    
+    def enough(self) -> bool:
+        """Whether limit results scoring at least min_score are in hand"""
+        return sum(1 for r in self.results.values() if r.get("score", 0) >= self.min_score) >= self.limit
+    
+    def best(self) -> List[Dict[str, Any]]:
+        ranked = sorted(self.results.values(), key=lambda r: r.get("score", 0), reverse=True)
+        return ranked[:self.limit]
+
+
+class FederatedSearch:
+    """Fans a query out to all providers at once
+    
+    Results are merged as providers answer. The search returns as soon as
+    'limit' results score at least min_score or the deadline passes, so the
+    slowest provider no longer sets the latency; providers still running
+    are abandoned and their results discarded. Provider requests time out
+    at the deadline (see providers.request_timeout), so abandoned calls do
+    not hold worker threads and connections into later searches, and
+    abandoned async calls are cancelled.
+    """
+    
+    def __init__(
+        self,
+        providers: Sequence[SearchProvider],
+        deadline: float = 10.0,
+        min_score: float = 0.5
+    ):
+        """
+        Initialize federated search
+        
+        Args:
+            providers: Search backends to query
+            deadline: Seconds to wait for providers before returning what has arrived
+            min_score: Score a result needs to count towards returning early
+        """
+        self.providers = list(providers)
+        self.deadline = deadline
+        self.min_score = min_score
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Search all providers and return up to limit deduplicated results, best first"""
+        if not self.providers:
+            return []
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=len(self.providers) * 2,
+                thread_name_prefix="federated-search"
+            )
+        
+        started = time.monotonic()
+        collector = _Collector(limit, self.min_score)
+        with search_deadline(started + self.deadline):
+            futures = {
+                self._executor.submit(contextvars.copy_context().run, provider.search, query, limit): provider
+                for provider in self.providers
+            }
+        pending = set(futures)
+        while pending and not collector.enough():
+            remaining = self.deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = futures[future]
+                try:
+                    collector.add(provider.name, future.result())
+                except Exception as e:
+                    logger.warning(f"Search provider {provider.name} failed: {e}")
+        
+        for future in pending:
+            future.cancel()
+        self._log(started, futures, pending, collector)
+        return collector.best()
+    
+    async def asearch(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Search all providers without blocking the event loop (see search)"""
+        if not self.providers:
+            return []
+        
+        started = time.monotonic()
+        collector = _Collector(limit, self.min_score)
+        with search_deadline(started + self.deadline):
+            # Tasks copy the context, deadline included, when they are created
+            tasks = {
+                asyncio.ensure_future(provider.asearch(query, limit)): provider
+                for provider in self.providers
+            }
+        pending = set(tasks)
+        try:
+            while pending and not collector.enough():
+                remaining = self.deadline - (time.monotonic() - started)
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = tasks[task]
+                    try:
+                        collector.add(provider.name, task.result())
+                    except Exception as e:
+                        logger.warning(f"Search provider {provider.name} failed: {e}")
+        finally:
+            for task in pending:
+                task.cancel()
+        self._log(started, tasks, pending, collector)
+        return collector.best()
+    
+    def close(self) -> None:
+        """Stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def _log(self, started: float, jobs: Dict[Any, SearchProvider], pending: set, collector: _Collector) -> None:
+        skipped = ", ".join(jobs[job].name for job in pending)
+        logger.info(
+            f"Federated search: {len(collector.results)} unique results in {time.monotonic() - started:.2f}s"
+            + (f" (did not wait for {skipped})" if skipped else "")
+        )
@@ -0,0 +1,228 @@
+"""
+Search Providers
+Pluggable dataset search backends used by federated search
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import os
+import re
+import time
+
+from geospatial_agents.search.dataset_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "GEOAGENT/1.0 (geospatial dataset search)"
+
+# time.monotonic() by which the federated search a provider runs for stops waiting
+_search_deadline: ContextVar[Optional[float]] = ContextVar("search_deadline", default=None)
+
+
+@contextmanager
+def search_deadline(deadline: float) -> Iterator[None]:
+    """Bound the requests of provider calls started inside the block by a time.monotonic() deadline"""
+    token = _search_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _search_deadline.reset(token)
+
+
+def request_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    Timeout for a provider request, capped by the time left before the search deadline
+    
+    Raises:
+        TimeoutError: If the deadline has already passed
+    """
+    deadline = _search_deadline.get()
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Search deadline passed")
+    return min(timeout, remaining) if timeout else remaining
+
+
+def text_relevance(query: str, text: str) -> float:
+    """Share of the query's informative words that appear in text (0-1)"""
+    terms = set(tokenize(query))
+    if not terms:
+        return 0.0
+    return len(terms & set(tokenize(text))) / len(terms)
+
+
+class SearchProvider:
+    """Base class for a dataset search backend
+    
+    Subclasses implement search() and return results shaped like the Search
+    Agent's: name, description, source (URL) and a 0-1 score. asearch()
+    runs search() in a worker thread unless a subclass has a native async
+    implementation.
+    """
+    
+    name = "provider"
+    
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    async def asearch(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.search, query, limit)
+
+
+class FunctionProvider(SearchProvider):
+    """Provider backed by plain search functions, such as the Search Agent's Tavily and LLM searches"""
+    
+    def __init__(
+        self,
+        name: str,
+        search_fn: Callable[[str, int], List[Dict[str, Any]]],
+        asearch_fn: Optional[Callable[[str, int], Awaitable[List[Dict[str, Any]]]]] = None,
+        default_score: float = 0.5
+    ):
+        """
+        Initialize the provider
+        
+        Args:
+            name: Provider name recorded on its results
+            search_fn: (query, limit) -> results
+            asearch_fn: Optional async (query, limit) -> results
+            default_score: Score for results that don't carry one
+        """
+        self.name = name
+        self.search_fn = search_fn
+        self.asearch_fn = asearch_fn
+        self.default_score = default_score
+    
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        return self._scored(self.search_fn(query, limit))
+    
+    async def asearch(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        if self.asearch_fn is None:
+            return await super().asearch(query, limit)
+        return self._scored(await self.asearch_fn(query, limit))
+    
+    def _scored(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for result in results:
+            if not isinstance(result.get("score"), (int, float)):
+                result["score"] = self.default_score
+        return results
+
+
+class HuggingFaceProvider(SearchProvider):
+    """Searches datasets on the HuggingFace Hub"""
+    
+    name = "huggingface"
+    API_URL = "https://huggingface.co/api/datasets"
+    
+    def __init__(self, token: Optional[str] = None, timeout: float = 10):
+        """
+        Initialize the provider
+        
+        Args:
+            token: HuggingFace token (defaults to the HF_TOKEN environment variable)
+            timeout: Request timeout in seconds
+        """
+        self.token = token or os.getenv("HF_TOKEN")
+        self.timeout = timeout
+    
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        import requests
+        
+        headers = {"User-Agent": USER_AGENT}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        
+        # Hub search matches substrings of dataset ids, so full sentences rarely match;
+        # try the informative words together, then the most specific one alone
+        terms = tokenize(query)
+        attempts = [" ".join(terms)]
+        if len(terms) > 1:
+            attempts.append(max(terms, key=len))
+        
+        items = []
+        for search in attempts:
+            response = requests.get(
+                self.API_URL,
+                params={"search": search, "limit": limit * 2, "full": "true", "sort": "downloads"},
+                headers=headers,
+                timeout=request_timeout(self.timeout)
+            )
+            response.raise_for_status()
+            items = response.json()
+            if items:
+                break
+        
+        results = []
+        for item in items:
+            dataset_id = item.get("id", "")
+            if not dataset_id:
+                continue
+            card = item.get("cardData") or {}
+            description = item.get("description") or card.get("pretty_name") or ""
+            tags = " ".join(tag for tag in item.get("tags", []) if ":" not in tag)
+            results.append({
+                "name": dataset_id,
+                "description": description.strip()[:200],
+                "source": f"https://huggingface.co/datasets/{dataset_id}",
+                "score": text_relevance(query, f"{dataset_id.replace('/', ' ')} {description} {tags}")
+            })
+        results.sort(key=lambda r: r["score"], reverse=True)
+        return results[:limit]
+
+
+class ZenodoProvider(SearchProvider):
+    """Searches dataset records on Zenodo"""
+    
+    name = "zenodo"
+    API_URL = "https://zenodo.org/api/records"
+    
+    def __init__(self, access_token: Optional[str] = None, timeout: float = 10):
+        """
+        Initialize the provider
+        
+        Args:
+            access_token: Zenodo token (defaults to the ZENODO_TOKEN environment variable)
+            timeout: Request timeout in seconds
+        """
+        self.access_token = access_token or os.getenv("ZENODO_TOKEN")
+        self.timeout = timeout
+    
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        import requests
+        
+        headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        
+        response = requests.get(
+            self.API_URL,
+            params={"q": " ".join(tokenize(query)) or query, "size": limit, "sort": "bestmatch", "type": "dataset"},
+            headers=headers,
+            timeout=request_timeout(self.timeout)
+        )
+        response.raise_for_status()
+        hits = response.json().get("hits", {}).get("hits", [])
+        
+        results = []
+        for rank, hit in enumerate(hits):
+            metadata = hit.get("metadata", {})
+            links = hit.get("links", {})
+            url = links.get("self_html") or links.get("html") or f"https://zenodo.org/records/{hit.get('id')}"
+            # Descriptions are HTML
+            description = re.sub(r"<[^>]+>", " ", metadata.get("description", ""))
+            description = " ".join(description.split())
+            keywords = " ".join(metadata.get("keywords", []))
+            relevance = text_relevance(query, f"{metadata.get('title', '')} {description} {keywords}")
+            results.append({
+                "name": metadata.get("title", "Unknown"),
+                "description": description[:200],
+                "source": url,
+                # Blend word overlap with Zenodo's own best-match ranking
+                "score": 0.7 * relevance + 0.3 * (1 - rank / max(len(hits), 1))
+            })
+        return results
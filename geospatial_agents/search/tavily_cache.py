@@ -0,0 +1,201 @@
+"""
+Tavily Search Cache
+TTL cache with single-flight request coalescing in front of a Tavily client
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import copy
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlight:
+    """A search being fetched by one caller while others wait for it"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class TavilySearchCache:
+    """Caches Tavily search responses and coalesces identical concurrent queries
+    
+    Responses are keyed on the normalized query, search depth and max_results.
+    While a query is in flight, identical queries wait for its response instead
+    of calling the API again. Any object with a TavilyClient-compatible
+    search(query=..., search_depth=..., max_results=...) method can be wrapped,
+    so tests can use a local stand-in client.
+    """
+    
+    def __init__(
+        self,
+        client: Any,
+        async_client: Any = None,
+        ttl_seconds: Optional[float] = 3600,
+        max_entries: int = 512
+    ):
+        """
+        Initialize the cache
+        
+        Args:
+            client: Synchronous Tavily client (or stand-in)
+            async_client: Optional AsyncTavilyClient used by asearch()
+            ttl_seconds: Time-to-live for cached responses (None or 0 disables caching)
+            max_entries: Maximum number of cached responses
+        """
+        self.client = client
+        self.async_client = async_client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple, _InFlight] = {}
+        self._async_inflight: Dict[Tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(query: str, search_depth: str, max_results: int) -> Tuple:
+        """Build the cache key for a search"""
+        return (" ".join(query.lower().split()), search_depth, max_results)
+    
+    def search(
+        self,
+        query: str,
+        search_depth: str = "basic",
+        max_results: int = 5,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Search through the cache (same signature as TavilyClient.search)"""
+        # The timeout isn't part of the key, and is only passed on when set
+        options = {"timeout": timeout} if timeout else {}
+        if kwargs:
+            # Extra options (domains, topics, ...) aren't part of the key
+            return self.client.search(query=query, search_depth=search_depth, max_results=max_results, **kwargs, **options)
+        
+        key = self.make_key(query, search_depth, max_results)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                self.misses += 1
+                inflight = self._inflight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            inflight.done.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return copy.deepcopy(inflight.result)
+        
+        try:
+            result = self.client.search(query=query, search_depth=search_depth, max_results=max_results, **options)
+            inflight.result = result
+            self._store(key, result)
+            return copy.deepcopy(result)
+        except BaseException as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.done.set()
+    
+    async def asearch(
+        self,
+        query: str,
+        search_depth: str = "basic",
+        max_results: int = 5
+    ) -> Dict[str, Any]:
+        """Search through the cache without blocking the event loop"""
+        if self.async_client is None:
+            # Share the thread-based coalescing with synchronous callers
+            return await asyncio.to_thread(
+                self.search, query=query, search_depth=search_depth, max_results=max_results
+            )
+        
+        key = self.make_key(query, search_depth, max_results)
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop),) + key
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            future = self._async_inflight.get(loop_key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = self._async_inflight[loop_key] = loop.create_future()
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            return copy.deepcopy(await asyncio.shield(future))
+        
+        try:
+            result = await self.async_client.search(
+                query=query,
+                search_depth=search_depth,
+                max_results=max_results
+            )
+            self._store(key, result)
+            future.set_result(result)
+            return copy.deepcopy(result)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_inflight.pop(loop_key, None)
+    
+    def clear(self) -> None:
+        """Drop all cached responses"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced
+            }
+    
+    def _lookup(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Return a copy of a fresh cached response (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, result = entry
+            if self.ttl_seconds and time.monotonic() - stored_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                logger.debug(f"Tavily cache hit: {key[0]!r}")
+                return copy.deepcopy(result)
+            del self._entries[key]
+        return None
+    
+    def _store(self, key: Tuple, result: Dict[str, Any]) -> None:
+        if not self.ttl_seconds:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,36 @@
+"""
+URL Normalization
+Canonical dataset URLs so the same source is recognized across searches
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the referrer and never change the target
+TRACKING_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "gclid", "fbclid", "ref"}
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL for use as a cache or dedupe key
+    
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes, sorts the query string and treats
+    http and https as the same resource.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    scheme = "https" if parts.scheme.lower() in ("http", "https") else parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    
+    path = parts.path.rstrip("/") or ""
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
@@ -0,0 +1,23 @@
+"""
+Shared utilities for GEOAGENT agents
+"""
+
+from geospatial_agents.utils.llm_cache import (
+    LLMResponseCache,
+    CachedChatModel,
+    CachedStructuredModel,
+    uncached
+)
+from geospatial_agents.utils.code_cache import CodeCache, GeneratedCodeMixin, fingerprint_data_path
+from geospatial_agents.utils.workspace_janitor import WorkspaceJanitor
+
+__all__ = [
+    "LLMResponseCache",
+    "CachedChatModel",
+    "CachedStructuredModel",
+    "uncached",
+    "CodeCache",
+    "GeneratedCodeMixin",
+    "fingerprint_data_path",
+    "WorkspaceJanitor"
+]
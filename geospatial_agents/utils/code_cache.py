@@ -0,0 +1,312 @@
+"""
+Generated Code Cache
+Reuses LLM-generated code when the task and input data schemas are unchanged
+"""
+
+import logging
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+from pathlib import Path
+import hashlib
+import json
+import re
+
+from geospatial_agents.utils.llm_cache import uncached
+
+logger = logging.getLogger(__name__)
+
+VECTOR_SUFFIXES = {".shp", ".geojson", ".json", ".gpkg", ".kml", ".gml", ".fgb", ".gdb"}
+RASTER_SUFFIXES = {".tif", ".tiff", ".nc", ".hdf", ".h5", ".img", ".vrt", ".jp2", ".asc", ".grb"}
+TABULAR_SUFFIXES = {".csv", ".tsv", ".txt"}
+
+# Maximum number of files fingerprinted inside a directory input
+MAX_DIRECTORY_FILES = 50
+
+
+def _fingerprint_vector(path: Path) -> Dict[str, Any]:
+    """Fingerprint a vector file: driver, CRS, geometry type and column schema per layer"""
+    import fiona
+    
+    layers = []
+    for layer in fiona.listlayers(str(path)):
+        with fiona.open(str(path), layer=layer) as src:
+            layers.append({
+                "layer": layer,
+                "driver": src.driver,
+                "crs": src.crs_wkt,
+                "geometry": src.schema.get("geometry"),
+                "properties": list(src.schema.get("properties", {}).items())
+            })
+    return {"kind": "vector", "layers": layers}
+
+
+def _fingerprint_raster(path: Path) -> Dict[str, Any]:
+    """Fingerprint a raster file: driver, CRS and band layout"""
+    import rasterio
+    
+    with rasterio.open(str(path)) as src:
+        return {
+            "kind": "raster",
+            "driver": src.driver,
+            "crs": src.crs.to_wkt() if src.crs else None,
+            "count": src.count,
+            "dtypes": list(src.dtypes),
+            "nodata": src.nodata,
+            "descriptions": list(src.descriptions)
+        }
+
+
+def _fingerprint_tabular(path: Path) -> Dict[str, Any]:
+    """Fingerprint a delimited text file by its header row"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        header = f.readline().strip()
+    return {"kind": "tabular", "header": header}
+
+
+def _fingerprint_parquet(path: Path) -> Dict[str, Any]:
+    """Fingerprint a Parquet file by its Arrow schema"""
+    import pyarrow.parquet as pq
+    
+    schema = pq.read_schema(str(path))
+    return {"kind": "parquet", "columns": [[f.name, str(f.type)] for f in schema]}
+
+
+def fingerprint_data_path(path: Path) -> Dict[str, Any]:
+    """Describe the schema of a data file or directory, ignoring its contents
+    
+    Two inputs with the same fingerprint can be processed by the same code,
+    wherever they are stored; only paths inside a directory input count.
+    Falls back to the file suffix when the geospatial libraries can't read it.
+    """
+    path = Path(path)
+    fingerprint = {}
+    
+    if path.is_dir():
+        files = sorted(p for p in path.rglob("*") if p.is_file())[:MAX_DIRECTORY_FILES]
+        fingerprint["files"] = [
+            dict(fingerprint_data_path(p), path=str(p.relative_to(path))) for p in files
+        ]
+        return fingerprint
+    
+    suffix = path.suffix.lower()
+    fingerprint["suffix"] = suffix
+    try:
+        if suffix in VECTOR_SUFFIXES:
+            fingerprint.update(_fingerprint_vector(path))
+        elif suffix in RASTER_SUFFIXES:
+            fingerprint.update(_fingerprint_raster(path))
+        elif suffix in TABULAR_SUFFIXES:
+            fingerprint.update(_fingerprint_tabular(path))
+        elif suffix == ".parquet":
+            fingerprint.update(_fingerprint_parquet(path))
+    except ImportError as e:
+        logger.debug(f"Cannot read schema of {path}: {e}")
+    except Exception as e:
+        logger.debug(f"Failed to fingerprint {path}: {e}")
+    return fingerprint
+
+
+class CodeCache:
+    """File-based store of generated code that ran successfully
+    
+    Keys combine the agent name, task text, parameters and a schema fingerprint
+    of every input file, so code is only reused for structurally identical inputs.
+    """
+    
+    def __init__(self, cache_dir: Path):
+        """
+        Initialize the cache
+        
+        Args:
+            cache_dir: Directory where code artifacts are stored
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def make_key(
+        self,
+        agent: str,
+        task_description: str,
+        parameters: Dict[str, Any],
+        data_paths: List[Path]
+    ) -> str:
+        """Build the cache key for a code generation request"""
+        payload = json.dumps({
+            "agent": agent,
+            "task": " ".join(task_description.split()),
+            "parameters": parameters,
+            "inputs": [fingerprint_data_path(p) for p in data_paths]
+        }, sort_keys=True, default=str)
+        return f"{agent}/{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+    
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.py"
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return cached code for key, or None"""
+        path = self._path_for(key)
+        if not path.exists():
+            return None
+        logger.info(f"Reusing cached code: {key}")
+        return path.read_text(encoding="utf-8")
+    
+    def put(self, key: str, code: str) -> None:
+        """Store code that executed successfully"""
+        path = self._path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(code, encoding="utf-8")
+        tmp_path.replace(path)
+        logger.debug(f"Cached generated code: {key}")
+    
+    def invalidate(self, key: str) -> None:
+        """Drop cached code that failed to run"""
+        path = self._path_for(key)
+        if path.exists():
+            path.unlink()
+            logger.info(f"Invalidated cached code: {key}")
+
+
+def extract_code(content: str) -> str:
+    """Extract the Python code block from an LLM response"""
+    code_match = re.search(r'```python\n(.*?)\n```', content, re.DOTALL)
+    return code_match.group(1) if code_match else content
+
+
+def code_messages(system: str, prompt: str, failed_code: Optional[str] = None) -> list:
+    """
+    Build the LLM messages for a code generation prompt
+    
+    Args:
+        system: System message describing the agent's expertise
+        prompt: Task prompt
+        failed_code: Cached code that fails on the current inputs, shown so new code differs
+    """
+    # Cached code is reused for other files with the same schemas
+    prompt += """
+The input files are also available as the data_paths list (pathlib.Path objects); read them
+from data_paths instead of hard-coding their paths.
+"""
+    if failed_code:
+        # Regenerating because cached code stopped working (e.g. the input schemas changed)
+        prompt += f"""
+This code worked for the same task before but fails on the current data files; write new code for them:
+```python
+{failed_code}
+```
+"""
+    
+    from langchain_core.messages import SystemMessage, HumanMessage
+    
+    return [SystemMessage(content=system), HumanMessage(content=prompt)]
+
+
+def returned_value(result: Any) -> bool:
+    """Default success check for generated code: it produced a result"""
+    return result is not None
+
+
+class GeneratedCodeMixin:
+    """Generate, run and cache LLM-generated code for an agent
+    
+    Code cached for the same task and input schemas runs first. If it no
+    longer succeeds it is dropped and shown to the LLM, which writes new
+    code; new code is cached once it succeeds. Agents using the mixin have
+    llm and code_cache attributes and pass callables that build the
+    generation messages, run code and judge its result.
+    """
+    
+    llm: Any
+    code_cache: Optional[CodeCache]
+    
+    def _run_generated_code(
+        self,
+        cache_name: str,
+        task_description: str,
+        parameters: Dict[str, Any],
+        data_paths: List[Path],
+        messages: Callable[[Optional[str]], list],
+        execute: Callable[[str], Any],
+        succeeded: Callable[[Any], bool] = returned_value
+    ) -> Any:
+        """
+        Run cached or newly generated code for a task
+        
+        Args:
+            cache_name: Agent name the code is cached under
+            task_description: Task the code performs
+            parameters: Task parameters
+            data_paths: Input files
+            messages: Builds the generation messages from the failed cached code (or None)
+            execute: Runs code and returns its result
+            succeeded: Whether a result means the code worked
+        
+        Returns:
+            The result of the code that ran last
+        """
+        cache_key, result, cached_ok, failed_code = self._run_cached_code(
+            cache_name, task_description, parameters, data_paths, execute, succeeded
+        )
+        if cached_ok:
+            return result
+        
+        response = uncached(self.llm).invoke(messages(failed_code))
+        code = extract_code(response.content)
+        result = execute(code)
+        if cache_key and succeeded(result):
+            self.code_cache.put(cache_key, code)
+        return result
+    
+    async def _arun_generated_code(
+        self,
+        cache_name: str,
+        task_description: str,
+        parameters: Dict[str, Any],
+        data_paths: List[Path],
+        messages: Callable[[Optional[str]], list],
+        execute: Callable[[str], Any],
+        succeeded: Callable[[Any], bool] = returned_value
+    ) -> Any:
+        """Like _run_generated_code(), without blocking the event loop"""
+        cache_key, result, cached_ok, failed_code = await asyncio.to_thread(
+            self._run_cached_code, cache_name, task_description, parameters, data_paths, execute, succeeded
+        )
+        if cached_ok:
+            return result
+        
+        response = await uncached(self.llm).ainvoke(messages(failed_code))
+        code = extract_code(response.content)
+        result = await asyncio.to_thread(execute, code)
+        if cache_key and succeeded(result):
+            await asyncio.to_thread(self.code_cache.put, cache_key, code)
+        return result
+    
+    def _run_cached_code(
+        self,
+        cache_name: str,
+        task_description: str,
+        parameters: Dict[str, Any],
+        data_paths: List[Path],
+        execute: Callable[[str], Any],
+        succeeded: Callable[[Any], bool]
+    ) -> tuple:
+        """Run previously successful code for this task, if cached
+        
+        Returns:
+            (cache_key, result, success, failed_code); cache_key is None when caching is disabled,
+            failed_code is cached code that no longer runs on these inputs
+        """
+        if not self.code_cache:
+            return None, None, False, None
+        
+        cache_key = self.code_cache.make_key(cache_name, task_description, parameters, data_paths)
+        cached_code = self.code_cache.get(cache_key)
+        if not cached_code:
+            return cache_key, None, False, None
+        
+        result = execute(cached_code)
+        if succeeded(result):
+            return cache_key, result, True, None
+        
+        self.code_cache.invalidate(cache_key)
+        return cache_key, None, False, cached_code
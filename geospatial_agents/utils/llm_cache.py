@@ -0,0 +1,313 @@
+"""
+LLM Response Cache
+Persistent, content-addressed cache for chat model responses
+"""
+
+import logging
+from typing import Any, Dict, Optional, Sequence
+from pathlib import Path
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Disk-backed LLM response cache with TTL and size-bounded LRU eviction
+    
+    Entries are keyed by a hash of provider, model, temperature and the
+    normalized messages, so the same prompt sent by any agent hits the same entry.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        max_entries: int = 5000,
+        max_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Initialize the cache
+        
+        Args:
+            cache_dir: Directory holding the cache database
+            ttl_seconds: Time-to-live for entries (None to never expire)
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached responses in bytes
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.cache_dir / "llm_cache.sqlite"
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed)")
+        self._conn.commit()
+    
+    @staticmethod
+    def normalize_messages(messages: Any) -> list:
+        """Normalize messages to (role, content) pairs with collapsed whitespace
+        
+        Prompts are built from indented f-strings, so whitespace-only differences
+        are folded together and map to the same entry.
+        """
+        if isinstance(messages, str):
+            messages = [messages]
+        
+        normalized = []
+        for message in messages:
+            if isinstance(message, str):
+                role, content = "human", message
+            elif isinstance(message, (tuple, list)) and len(message) == 2:
+                role, content = message
+            else:
+                role = getattr(message, "type", message.__class__.__name__)
+                content = getattr(message, "content", str(message))
+            if not isinstance(content, str):
+                content = json.dumps(content, sort_keys=True, default=str)
+            normalized.append([str(role), " ".join(content.split())])
+        return normalized
+    
+    def make_key(
+        self,
+        provider: str,
+        model: str,
+        temperature: Optional[float],
+        messages: Any
+    ) -> str:
+        """Build the content-addressed key for a request"""
+        payload = json.dumps({
+            "provider": provider,
+            "model": model,
+            "temperature": temperature,
+            "messages": self.normalize_messages(messages)
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            content, created = row
+            if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return content
+    
+    def put(self, key: str, content: str) -> None:
+        """Store a response and evict least-recently-used entries if over budget"""
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, content, size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+    
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used ones until within limits"""
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+        
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        
+        evict_keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evict_keys.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evict_keys)
+        logger.debug(f"Evicted {len(evict_keys)} LLM cache entries")
+    
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics"""
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class CachedChatModel:
+    """Chat model wrapper that answers repeated prompts from an LLMResponseCache
+    
+    Exposes the same invoke()/ainvoke() interface the agents use; every other attribute is
+    delegated to the wrapped model. Code-generation calls bypass it through uncached().
+    """
+    
+    def __init__(
+        self,
+        llm: Any,
+        cache: LLMResponseCache,
+        provider: str,
+        model: str,
+        temperature: Optional[float] = None
+    ):
+        """
+        Initialize the wrapper
+        
+        Args:
+            llm: Language model instance to wrap
+            cache: Response cache
+            provider: LLM provider name, part of the cache key
+            model: LLM model name, part of the cache key
+            temperature: Sampling temperature, part of the cache key
+        """
+        self.llm = llm
+        self.cache = cache
+        self.provider = provider
+        self.model = model
+        self.temperature = temperature
+    
+    def invoke(self, messages: Sequence[Any], *args, **kwargs) -> Any:
+        """Invoke the model, returning a cached response when available"""
+        if args or kwargs:
+            # Extra call options (stop sequences, config, ...) change the output
+            return self.llm.invoke(messages, *args, **kwargs)
+        
+        key = self.cache.make_key(self.provider, self.model, self.temperature, messages)
+        content = self.cache.get(key)
+        if content is not None:
+            logger.debug(f"LLM cache hit: {key[:12]}")
+            from langchain_core.messages import AIMessage
+            return AIMessage(content=content)
+        
+        response = self.llm.invoke(messages)
+        if isinstance(getattr(response, "content", None), str) and response.content:
+            self.cache.put(key, response.content)
+        return response
+    
+    async def ainvoke(self, messages: Sequence[Any], *args, **kwargs) -> Any:
+        """Asynchronously invoke the model, returning a cached response when available"""
+        if args or kwargs:
+            return await self.llm.ainvoke(messages, *args, **kwargs)
+        
+        key = self.cache.make_key(self.provider, self.model, self.temperature, messages)
+        content = self.cache.get(key)
+        if content is not None:
+            logger.debug(f"LLM cache hit: {key[:12]}")
+            from langchain_core.messages import AIMessage
+            return AIMessage(content=content)
+        
+        response = await self.llm.ainvoke(messages)
+        if isinstance(getattr(response, "content", None), str) and response.content:
+            self.cache.put(key, response.content)
+        return response
+    
+    def with_structured_output(self, schema: Any, **kwargs) -> "CachedStructuredModel":
+        """Bind a structured-output schema, caching the parsed results like plain responses"""
+        return CachedStructuredModel(self.llm.with_structured_output(schema, **kwargs), self, schema)
+    
+    def __getattr__(self, name: str) -> Any:
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+
+def uncached(llm: Any) -> Any:
+    """The model behind a CachedChatModel, for calls whose responses must not be reused
+    
+    Generated code is only kept once it has run successfully (see CodeCache);
+    caching the raw response would hand back the same failing code for
+    the whole TTL.
+    """
+    return llm.llm if isinstance(llm, CachedChatModel) else llm
+
+
+class CachedStructuredModel:
+    """Structured-output runnable backed by the same LLMResponseCache
+    
+    The schema is part of the cache key; only JSON-serializable results
+    (dicts and lists) are cached.
+    """
+    
+    def __init__(self, runnable: Any, chat_model: CachedChatModel, schema: Any):
+        """
+        Initialize the wrapper
+        
+        Args:
+            runnable: Result of the wrapped model's with_structured_output()
+            chat_model: Cached chat model providing the cache and key parameters
+            schema: Output schema, part of the cache key
+        """
+        self.runnable = runnable
+        self.chat_model = chat_model
+        self.schema_key = json.dumps(schema, sort_keys=True, default=str)
+    
+    def _make_key(self, messages: Sequence[Any]) -> str:
+        chat = self.chat_model
+        return chat.cache.make_key(
+            chat.provider,
+            chat.model,
+            chat.temperature,
+            [("schema", self.schema_key)] + list(messages)
+        )
+    
+    def _store(self, key: str, result: Any) -> None:
+        if isinstance(result, (dict, list)):
+            self.chat_model.cache.put(key, json.dumps(result, default=str))
+    
+    def invoke(self, messages: Sequence[Any]) -> Any:
+        """Invoke the structured model, returning a cached result when available"""
+        key = self._make_key(messages)
+        content = self.chat_model.cache.get(key)
+        if content is not None:
+            return json.loads(content)
+        result = self.runnable.invoke(messages)
+        self._store(key, result)
+        return result
+    
+    async def ainvoke(self, messages: Sequence[Any]) -> Any:
+        """Asynchronously invoke the structured model, returning a cached result when available"""
+        key = self._make_key(messages)
+        content = self.chat_model.cache.get(key)
+        if content is not None:
+            return json.loads(content)
+        result = await self.runnable.ainvoke(messages)
+        self._store(key, result)
+        return result
@@ -0,0 +1,313 @@
+"""
+Workspace Janitor
+Keeps downloads, exports and visualizations under a size watermark by
+evicting the least recently used datasets that no workflow run is using
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+import json
+import os
+import shutil
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+GB = 1024**3
+
+# Work directory subdirectories whose entries are managed
+MANAGED_DIRS = ("downloads", "exports", "visualizations")
+
+# Paths pinned by the workflow run in the current context
+_run_pins: ContextVar[Optional[Set[str]]] = ContextVar("janitor_run_pins", default=None)
+
+
+def measure(path: Path) -> Tuple[int, float]:
+    """Bytes used by a file or directory (hardlinks counted once) and its newest modification time"""
+    if path.is_file():
+        info = path.stat()
+        return info.st_size, info.st_mtime
+    seen = set()
+    total = 0
+    newest = path.stat().st_mtime
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                info = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            newest = max(newest, info.st_mtime)
+            if (info.st_dev, info.st_ino) in seen:
+                continue
+            seen.add((info.st_dev, info.st_ino))
+            total += info.st_size
+    return total, newest
+
+
+class WorkspaceJanitor:
+    """LRU eviction for the datasets and outputs in a work directory
+    
+    Every top-level entry of downloads/, exports/ and visualizations/ is one
+    item (a dataset directory or an output file). Workflow runs pin the
+    items they download or produce for as long as they run, and each use
+    refreshes the item's access time; using an item that an earlier use had
+    already put on disk counts as a hit. When the managed directories grow
+    beyond the high watermark, unpinned items are deleted least recently
+    used first until they are back under the low watermark. Items modified
+    within grace_seconds are never evicted, so downloads still being written
+    (and not yet pinned) are safe, and hidden files such as the download
+    catalog are left alone, as are partial downloads and their resume state.
+    """
+    
+    def __init__(
+        self,
+        work_dir: Path,
+        max_gb: Optional[float] = None,
+        high_watermark: float = 0.9,
+        low_watermark: float = 0.75,
+        grace_seconds: float = 3600,
+        on_evict: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Initialize the janitor
+        
+        Args:
+            work_dir: Work directory holding the managed directories
+            max_gb: Size budget of the managed directories (None to only track usage)
+            high_watermark: Fraction of max_gb above which a collection evicts
+            low_watermark: Fraction of max_gb a collection evicts down to
+            grace_seconds: Age below which an item is never evicted
+            on_evict: Called after items were evicted (e.g. blob store GC)
+        """
+        self.work_dir = Path(work_dir)
+        self.max_bytes = int(max_gb * GB) if max_gb else None
+        self.high_watermark = high_watermark
+        self.low_watermark = min(low_watermark, high_watermark)
+        self.grace_seconds = grace_seconds
+        self.on_evict = on_evict
+        self.index_path = self.work_dir / ".cache" / "janitor.json"
+        
+        self._lock = threading.Lock()
+        self._refcounts: Dict[str, int] = {}
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "evicted_bytes": 0}
+        self._last_collect: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if self.index_path.exists():
+            try:
+                self._index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring unreadable janitor index {self.index_path}: {e}")
+    
+    def item_key(self, path: Any) -> Optional[str]:
+        """Managed item a path belongs to ('downloads/<name>'), or None if it is not managed"""
+        try:
+            relative = Path(path).resolve().relative_to(self.work_dir.resolve())
+        except (ValueError, OSError):
+            return None
+        parts = relative.parts
+        if len(parts) < 2 or parts[0] not in MANAGED_DIRS or parts[1].startswith("."):
+            return None
+        return f"{parts[0]}/{parts[1]}"
+    
+    @contextmanager
+    def run(self) -> Iterator[None]:
+        """Scope of a workflow run; items used inside it stay pinned until it ends
+        
+        A run started inside another one joins it, so its pins last until the
+        outer run ends.
+        """
+        if _run_pins.get() is not None:
+            yield
+            return
+        pins: Set[str] = set()
+        token = _run_pins.set(pins)
+        try:
+            yield
+        finally:
+            _run_pins.reset(token)
+            self.release(pins)
+    
+    def use(self, paths: Iterable[Any]) -> None:
+        """Record that the current run uses paths, pinning their items until the run ends"""
+        pins = _run_pins.get()
+        now = time.time()
+        with self._lock:
+            for path in paths:
+                key = self.item_key(path)
+                if key is None:
+                    continue
+                entry = self._index.get(key)
+                if entry and entry.get("uses"):
+                    self._stats["hits"] += 1
+                else:
+                    self._stats["misses"] += 1
+                entry = self._index.setdefault(key, {"uses": 0})
+                entry["uses"] += 1
+                entry["accessed"] = now
+                self._pin(key, pins)
+            self._save()
+    
+    def pin(self, paths: Iterable[Any]) -> None:
+        """Pin paths' items until the current run ends without counting a use
+        
+        For paths a run is about to use, such as a download target that is
+        still being revalidated.
+        """
+        pins = _run_pins.get()
+        if pins is None:
+            return
+        with self._lock:
+            for path in paths:
+                key = self.item_key(path)
+                if key is not None:
+                    self._pin(key, pins)
+    
+    def release(self, keys: Iterable[str]) -> None:
+        """Drop one reference to each item"""
+        with self._lock:
+            for key in keys:
+                count = self._refcounts.get(key, 0) - 1
+                if count > 0:
+                    self._refcounts[key] = count
+                else:
+                    self._refcounts.pop(key, None)
+    
+    def _pin(self, key: str, pins: Optional[Set[str]]) -> None:
+        if pins is not None and key not in pins:
+            pins.add(key)
+            self._refcounts[key] = self._refcounts.get(key, 0) + 1
+    
+    def collect(self) -> int:
+        """Evict down to the low watermark if usage is above the high watermark, returning bytes freed"""
+        self._last_collect = time.time()
+        if not self.max_bytes:
+            return 0
+        items = self._scan()
+        total = sum(size for size, _ in items.values())
+        if total <= self.max_bytes * self.high_watermark:
+            return 0
+        excess = int(total - self.max_bytes * self.low_watermark)
+        logger.info(f"Workspace uses {total / GB:.2f} GB of {self.max_bytes / GB:.2f} GB, evicting {excess / GB:.2f} GB")
+        return self._evict(items, excess)
+    
+    def reclaim(self, nbytes: int) -> int:
+        """Evict unpinned downloads until nbytes are freed (a DownloadScheduler reclaimer)"""
+        items = {key: item for key, item in self._scan().items() if key.startswith("downloads/")}
+        return self._evict(items, nbytes)
+    
+    def start(self, interval: float = 600.0) -> None:
+        """Collect every interval seconds in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.collect()
+                except Exception as e:
+                    logger.warning(f"Workspace collection failed: {e}")
+        
+        self._thread = threading.Thread(target=loop, name="workspace-janitor", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return bytes per directory, item and pin counts, hit rate and eviction counters"""
+        items = self._scan()
+        by_dir = {name: 0 for name in MANAGED_DIRS}
+        for key, (size, _) in items.items():
+            by_dir[key.split("/", 1)[0]] += size
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                bytes=sum(by_dir.values()),
+                bytes_by_dir=by_dir,
+                items=len(items),
+                pinned=len(self._refcounts),
+                hit_rate=self._stats["hits"] / lookups if lookups else 0.0,
+                max_bytes=self.max_bytes,
+                last_collect=self._last_collect
+            )
+    
+    def _scan(self) -> Dict[str, Tuple[int, float]]:
+        """Size and newest modification time of every managed item"""
+        items = {}
+        for name in MANAGED_DIRS:
+            directory = self.work_dir / name
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if path.name.startswith(".") or path.name.endswith((".part", ".part.json")):
+                    continue
+                try:
+                    items[f"{name}/{path.name}"] = measure(path)
+                except OSError:
+                    continue
+        with self._lock:
+            # Forget items deleted by someone else
+            for key in [key for key in self._index if key not in items]:
+                del self._index[key]
+        return items
+    
+    def _evict(self, items: Dict[str, Tuple[int, float]], nbytes: int) -> int:
+        now = time.time()
+        with self._lock:
+            candidates: List[Tuple[float, str, int]] = [
+                (self._index.get(key, {}).get("accessed", mtime), key, size)
+                for key, (size, mtime) in items.items()
+                if key not in self._refcounts and now - mtime >= self.grace_seconds
+            ]
+        candidates.sort()
+        
+        freed = 0
+        for _, key, size in candidates:
+            if freed >= nbytes:
+                break
+            with self._lock:
+                if key in self._refcounts:
+                    # Pinned since the candidates were listed
+                    continue
+                path = self.work_dir / key
+                try:
+                    if path.is_dir() and not path.is_symlink():
+                        shutil.rmtree(path)
+                    else:
+                        path.unlink()
+                except OSError as e:
+                    logger.warning(f"Could not evict {key}: {e}")
+                    continue
+                self._index.pop(key, None)
+                self._stats["evictions"] += 1
+                self._stats["evicted_bytes"] += size
+            freed += size
+            logger.info(f"Evicted {key} ({size / (1024**2):.1f} MB)")
+        
+        if freed:
+            with self._lock:
+                self._save()
+            if self.on_evict:
+                self.on_evict()
+        return freed
+    
+    def _save(self) -> None:
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._index, indent=2), encoding="utf-8")
+            tmp_path.replace(self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not save janitor index: {e}")